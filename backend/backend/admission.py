@@ -0,0 +1,199 @@
+import math
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger('context-backend')
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries a Retry-After hint in seconds."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class TokenBucket:
+    """Classic token bucket: ``rate`` cost units per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, cost: float) -> float:
+        """
+        Take ``cost`` tokens. Returns 0 on success, otherwise the number of
+        seconds until enough tokens will be available (nothing is taken).
+        """
+        now = time.monotonic()
+        self._refill(now)
+        # A request bigger than the whole bucket may go through once it is full
+        cost = min(cost, self.capacity)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def refund(self, cost: float):
+        self.tokens = min(self.capacity, self.tokens + cost)
+
+
+class EndpointGate:
+    """
+    Bounds the total estimated cost in flight for one endpoint.
+
+    Requests that do not fit wait in a bounded queue for at most ``max_wait``
+    seconds; when the queue is full they are rejected immediately so that the
+    accepted requests keep a predictable latency.
+    """
+
+    def __init__(self, name: str, max_cost: float, max_queue: int, max_wait: float):
+        self.name = name
+        self.max_cost = max_cost
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+
+        self._cond = threading.Condition()
+        self._inflight_cost = 0.0
+        self._inflight = 0
+        self._waiting = 0
+        self._waiting_cost = 0.0
+        self._seconds_per_cost: Optional[float] = None
+        self._admitted = 0
+        self._rejected = 0
+
+    def _fits(self, cost: float) -> bool:
+        # An oversized request is still admitted once the endpoint is idle
+        return self._inflight_cost == 0 or self._inflight_cost + cost <= self.max_cost
+
+    def _estimate_wait(self, cost: float) -> float:
+        per_cost = self._seconds_per_cost or 1.0
+        backlog = self._inflight_cost + self._waiting_cost + cost
+        return per_cost * backlog / max(1.0, self.max_cost)
+
+    def admit(self, cost: float):
+        """Block until ``cost`` fits, or raise ``AdmissionRejected``."""
+        with self._cond:
+            if self._fits(cost) and not self._waiting:
+                self._enter(cost)
+                return
+
+            if self._waiting >= self.max_queue:
+                self._rejected += 1
+                raise AdmissionRejected(f"{self.name} queue is full", self._estimate_wait(cost))
+
+            self._waiting += 1
+            self._waiting_cost += cost
+            deadline = time.monotonic() + self.max_wait
+            try:
+                while not self._fits(cost):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._rejected += 1
+                        raise AdmissionRejected(f"{self.name} is overloaded", self._estimate_wait(cost))
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+                self._waiting_cost -= cost
+            self._enter(cost)
+
+    def _enter(self, cost: float):
+        self._inflight_cost += cost
+        self._inflight += 1
+        self._admitted += 1
+
+    def release(self, cost: float, elapsed: float):
+        with self._cond:
+            self._inflight_cost = max(0.0, self._inflight_cost - cost)
+            self._inflight = max(0, self._inflight - 1)
+            sample = elapsed / max(cost, 1e-9)
+            if self._seconds_per_cost is None:
+                self._seconds_per_cost = sample
+            else:
+                self._seconds_per_cost = 0.8 * self._seconds_per_cost + 0.2 * sample
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return {
+                'inflight': self._inflight,
+                'inflight_cost': self._inflight_cost,
+                'max_cost': self.max_cost,
+                'waiting': self._waiting,
+                'max_queue': self.max_queue,
+                'admitted': self._admitted,
+                'rejected': self._rejected,
+                'seconds_per_cost': self._seconds_per_cost,
+            }
+
+
+class AdmissionController:
+    """Per-endpoint cost gates plus a token bucket per client."""
+
+    # Upper bound on tracked clients; idle (full) buckets are dropped beyond it
+    MAX_CLIENTS = 10000
+
+    def __init__(self, limits: Dict[str, Dict], client_rate: float, client_burst: float):
+        self.gates = {
+            name: EndpointGate(name, cfg['max_cost'], cfg['max_queue'], cfg['max_wait'])
+            for name, cfg in limits.items()
+        }
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, client: str) -> TokenBucket:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            if len(self._buckets) >= self.MAX_CLIENTS:
+                self._prune()
+            bucket = TokenBucket(self.client_rate, self.client_burst)
+            self._buckets[client] = bucket
+        return bucket
+
+    def _prune(self):
+        now = time.monotonic()
+        for key, bucket in list(self._buckets.items()):
+            bucket._refill(now)
+            if bucket.tokens >= bucket.capacity:
+                del self._buckets[key]
+
+    def admit(self, endpoint: str, client: str, cost: float):
+        """Charge the client's bucket and wait for room on the endpoint gate."""
+        with self._lock:
+            bucket = self._bucket(client)
+            wait = bucket.take(cost)
+        if wait:
+            raise AdmissionRejected("Rate limit exceeded", wait)
+
+        gate = self.gates.get(endpoint)
+        if gate is None:
+            return
+        try:
+            gate.admit(cost)
+        except AdmissionRejected:
+            with self._lock:
+                bucket.refund(cost)
+            raise
+
+    def release(self, endpoint: str, cost: float, elapsed: float):
+        gate = self.gates.get(endpoint)
+        if gate is not None:
+            gate.release(cost, elapsed)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            clients = len(self._buckets)
+        return {
+            'clients': clients,
+            'endpoints': {name: gate.snapshot() for name, gate in self.gates.items()},
+        }
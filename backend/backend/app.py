@@ -1,8 +1,16 @@
-from flask import Flask, request, jsonify, send_file
+import time
+_startup_began = time.perf_counter()
+
+from flask import Flask, Response, request, jsonify, send_file, g, stream_with_context
 from flask_cors import CORS
 import io
 import os
 import sys
+import math
+import functools
+import json
+import hmac
+import threading
 import traceback
 import logging
 
@@ -30,38 +38,287 @@ logger.info(f"Added to path: {os.path.dirname(bundle_dir)}")
 
 try:
     logger.info("Importing backend modules...")
+    from backend.startup import StartupTimer, LazyComponent, importtime_report
     from backend.ollama_wrapper import OllamaWrapper
     from backend.language_detector import LanguageDetector
-    from backend.tts.engine import TTSEngine
-    from backend.parser import is_valid_url, method3_readability, clean_text
-    from backend.youtube_transcription import get_transcript
+    from backend.tts.engine import TTSEngine, DEFAULT_MODEL as TTS_MODEL
+    from backend.tts.audio import AUDIO_FORMATS
+    from backend.tts.store import AudioStore
+    from backend.parser import is_valid_url, method3_readability, clean_text, ExtractionError
+    from backend.youtube_transcription import get_transcript, get_timed_transcript
+    from backend.subtitles import SUBTITLE_FORMATS, SubtitleStats, make_cues, iter_translated_subtitles
+    from backend.ingest import IngestManager, UploadTooLarge
+    from backend.crawl import CrawlManager
+    from backend.incremental import IncrementalTranslator
+    from backend.prewarm import Prewarmer, UsageLog, anonymize_url
+    from backend.admission import AdmissionController, AdmissionRejected
+    from backend.warmup import WarmupState, start_warmup
+    from backend.cache import make_cache, make_key
+    from backend.profiling import Profile, ProfileStore, activate, deactivate, span
+    from backend.config import ADMISSION_LIMITS, CLIENT_RATE, CLIENT_BURST, CHUNK_SIZE
+    from backend.config import WARMUP_MODELS, WARMUP_TTS, WARMUP_ENABLED
+    from backend.config import ADMIN_TOKEN, PROFILE_DIR
+    from backend.config import CACHE_URL, CACHE_SCRAPE_TTL
+    from backend.config import PREWARM_ENABLED, OLLAMA_MAX_CONCURRENCY
     logger.info("Backend modules imported successfully")
 except Exception as e:
     logger.error(f"Error importing modules: {str(e)}")
     logger.error(traceback.format_exc())
     sys.exit(1)
 
+startup_timer = StartupTimer(_startup_began)
+startup_timer.mark('imports')
+
 app = Flask(__name__)
 CORS(app)
 
-# Initialize components
+# Counts of requested cache entries, replayed off-peak by the prewarmer
+usage_log = UsageLog() if PREWARM_ENABLED else None
+if usage_log is not None:
+    usage_log.load()
+
+# Initialize components. Heavy ones (TTS pulls in torch) are built on
+# first use, or during warm-up when WARMUP_TTS is set.
 try:
     logger.info("Initializing backend components...")
-    ollama_wrapper = OllamaWrapper()
-    language_detector = LanguageDetector()
-    tts_engine = TTSEngine()
+    # One cache shared by every worker process (SQLite/Redis) or, with
+    # memory://, by this process only
+    try:
+        cache = make_cache(CACHE_URL)
+    except Exception as e:
+        logger.error(f"Error opening cache {CACHE_URL}: {str(e)}, falling back to an in-process cache")
+        cache = make_cache('memory://')
+    ollama_wrapper = OllamaWrapper(cache=cache, usage=usage_log)
+    language_detector = LanguageDetector(cache=cache, ollama=ollama_wrapper)
+    tts_engine = LazyComponent(TTSEngine, 'tts_engine')
+    audio_store = AudioStore()
+    ingest_manager = IngestManager()
+    crawl_manager = CrawlManager()
+    incremental_translator = IncrementalTranslator(ollama_wrapper)
     logger.info("Backend components initialized successfully")
 except Exception as e:
     logger.error(f"Error initializing components: {str(e)}")
     logger.error(traceback.format_exc())
     # Continue without failing - the error will show up when the components are used
 
+admission = AdmissionController(ADMISSION_LIMITS, CLIENT_RATE, CLIENT_BURST)
+warmup_state = WarmupState()
+profile_store = ProfileStore(PROFILE_DIR)
+subtitle_stats = SubtitleStats()
+startup_timer.mark('components')
+
+_background_lock = threading.Lock()
+_background_started = False
+
+def start_background_tasks():
+    """
+    Start warm-up and the prewarmer once per process. Called on the first
+    request, so it also runs when the app is imported by a WSGI server, and
+    at launch from ``__main__`` so a directly started server warms up
+    straight away.
+    """
+    global _background_started
+    with _background_lock:
+        if _background_started:
+            return
+        _background_started = True
+
+    if prewarmer is not None:
+        prewarmer.start()
+    if not WARMUP_ENABLED:
+        warmup_state.status = 'done'
+        return
+    logger.info("Starting warm-up...")
+    start_warmup(
+        warmup_state, ollama_wrapper, language_detector,
+        models=WARMUP_MODELS,
+        tts_loader=tts_engine.get if WARMUP_TTS else None,
+    )
+
+def _is_admin():
+    # Admin-only features are disabled unless CONTEXT_ADMIN_TOKEN is set
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+@app.before_request
+def ensure_background_tasks():
+    if not _background_started:
+        start_background_tasks()
+
+@app.before_request
+def start_profile():
+    """
+    Profile this request when an admin asks for it with an ``X-Profile``
+    header or ``?profile=`` flag (``cprofile`` also records a cProfile summary).
+    """
+    mode = request.headers.get('X-Profile') or request.args.get('profile')
+    if not mode or not _is_admin():
+        return
+    profile = Profile(f"{request.method} {request.path}", 'cprofile' if mode == 'cprofile' else 'spans')
+    g.profile = profile
+    g.profile_token = activate(profile)
+    if profile.mode == 'cprofile':
+        profile.start_cprofile()
+    with span('request.json'):
+        request.get_json(silent=True)
+
+@app.after_request
+def finish_profile(response):
+    profile = g.pop('profile', None)
+    if profile is None:
+        return response
+    profile.stop_cprofile()
+    profile.add_span(f"request {profile.name}", profile.started, time.perf_counter(),
+                     {'status': response.status_code})
+    try:
+        profile_store.save(profile)
+        response.headers['X-Profile-Id'] = profile.id
+    except OSError as e:
+        logger.error(f"Error saving profile {profile.id}: {str(e)}")
+    return response
+
+@app.before_request
+def note_activity():
+    # Polling (GET) does not count as traffic that keeps the prewarmer waiting
+    if request.method != 'GET' and prewarmer is not None:
+        prewarmer.touch()
+
+@app.teardown_request
+def clear_profile(exc):
+    token = g.pop('profile_token', None)
+    if token is not None:
+        deactivate(token)
+
+def admission_controlled(endpoint, cost_fn):
+    """
+    Admit the request through the endpoint's cost gate and the client's token
+    bucket, or answer 429 with Retry-After straight away.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            data = request.get_json(silent=True)
+            cost = cost_fn(data if isinstance(data, dict) else {})
+            try:
+                admission.admit(endpoint, request.remote_addr or 'unknown', cost)
+            except AdmissionRejected as e:
+                logger.warning(f"Rejected {endpoint} request (cost {cost:.1f}): {str(e)}")
+                response = jsonify({'error': str(e), 'retry_after': e.retry_after})
+                response.status_code = 429
+                response.headers['Retry-After'] = str(e.retry_after)
+                return response
+
+            started = time.monotonic()
+            release = lambda: admission.release(endpoint, cost, time.monotonic() - started)
+            try:
+                result = view(*args, **kwargs)
+            except BaseException:
+                release()
+                raise
+            # A streamed response keeps its slot until the stream is closed
+            if isinstance(result, Response) and result.is_streamed:
+                result.call_on_close(release)
+            else:
+                release()
+            return result
+        return wrapper
+    return decorator
+
+def _text_length(data):
+    text = data.get('text')
+    return len(text) if isinstance(text, str) else 0
+
+def _translate_cost(data):
+    # One Ollama call per chunk and target language, plus one for auto-detection
+    targets = data.get('target_lang')
+    cost = max(1, math.ceil(_text_length(data) / CHUNK_SIZE))
+    if isinstance(targets, list):
+        cost *= max(1, len(targets))
+    if data.get('source_lang', 'auto') == 'auto':
+        cost += 1
+    return cost
+
+def _incremental_cost(data):
+    # One Ollama call per segment that changed since the stored version
+    doc_id, text = data.get('doc_id'), data.get('text')
+    if not doc_id or not isinstance(text, str):
+        return 1
+    source_lang = data.get('source_lang', 'auto')
+    try:
+        cost = incremental_translator.pending_segments(
+            str(doc_id), text, source_lang, data.get('target_lang', 'en'), data.get('model'))
+    except Exception:
+        cost = _translate_cost(data)
+    if source_lang == 'auto':
+        cost += 1
+    return max(1, cost)
+
+def _summarize_cost(data):
+    # A single call whose prompt processing grows with the text
+    return 1 + _text_length(data) / CHUNK_SIZE
+
+def _detect_cost(data):
+    return 1
+
+def _subtitles_cost(data):
+    # Transcript length is unknown until it is fetched; batches run at most
+    # OLLAMA_MAX_CONCURRENCY at a time
+    return OLLAMA_MAX_CONCURRENCY
+
 @app.route('/health', methods=['GET'])
 def health_check():
     logger.info("Health check endpoint called")
-    return jsonify({"status": "healthy"})
+    # The server is live as soon as it answers; it is ready once warm-up is done
+    return jsonify({
+        "status": "healthy" if warmup_state.ready else "warming_up",
+        "ready": warmup_state.ready,
+        "warmup": warmup_state.to_dict(),
+    })
+
+@app.route('/debug/startup', methods=['GET'])
+def startup_report():
+    """Startup milestones; ``?importtime=1`` adds a fresh -X importtime summary (admin only)."""
+    report = {
+        'marks': startup_timer.to_dict(),
+        'lazy_components': {'tts_engine': tts_engine.loaded},
+    }
+    if request.args.get('importtime'):
+        # Spawns a Python subprocess, so it is admin only like /profiles
+        if not _is_admin():
+            return jsonify({'error': 'Admin token required'}), 403
+        try:
+            top = int(request.args.get('top', 15))
+        except ValueError:
+            return jsonify({'error': 'top must be an integer'}), 400
+        if top < 1:
+            return jsonify({'error': 'top must be an integer'}), 400
+        report['importtime'] = importtime_report(top=top)
+    return jsonify(report)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Runtime metrics: Ollama concurrency per model, admission queues, cache and draft escalation rates."""
+    return jsonify({
+        'ollama': ollama_wrapper.metrics(),
+        'admission': admission.snapshot(),
+        'cache': cache.stats(),
+        'tiering': ollama_wrapper.tiering.snapshot(),
+        'prewarm': prewarmer.snapshot() if prewarmer is not None else None,
+        'subtitles': subtitle_stats.snapshot(),
+    })
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Chrome trace of a profiled request, loadable in Perfetto or speedscope."""
+    if not _is_admin():
+        return jsonify({'error': 'Admin token required'}), 403
+    path = profile_store.path(profile_id)
+    if not profile_id.isalnum() or not os.path.exists(path):
+        return jsonify({'error': 'Unknown profile'}), 404
+    return send_file(path, mimetype='application/json', download_name=f'{profile_id}.trace.json')
 
 @app.route('/translate', methods=['POST'])
+@admission_controlled('translate', _translate_cost)
 def translate():
     try:
         data = request.get_json()
@@ -73,15 +330,37 @@ def translate():
         source_lang = data.get('source_lang', 'auto')
         target_lang = data.get('target_lang', 'en')
         model = data.get('model')  # Get model from request
+        response_mode = data.get('response_mode', 'text')
+        if response_mode not in ('text', 'segments'):
+            return jsonify({'error': "response_mode must be 'text' or 'segments'"}), 400
+        if response_mode == 'segments' and isinstance(target_lang, list):
+            return jsonify({'error': "response_mode 'segments' needs a single target_lang"}), 400
         
+        if isinstance(target_lang, list):
+            target_langs = list(dict.fromkeys(target_lang))
+            if not target_langs or not all(isinstance(t, str) for t in target_langs):
+                return jsonify({'error': 'target_lang must be a language code or a non-empty list of codes'}), 400
+            invalid = [t for t in target_langs if t not in ollama_wrapper.supported_languages]
+            if invalid:
+                return jsonify({'error': f'Invalid language code: {invalid[0]}'}), 400
+
         # Auto-detect source language if not specified
         if source_lang == 'auto':
             try:
                 source_lang = language_detector.detect_language(text)
             except Exception as e:
                 return jsonify({'error': f'Language detection failed: {str(e)}'}), 500
+
+        if isinstance(target_lang, list):
+            if source_lang not in ollama_wrapper.supported_languages:
+                return jsonify({'error': f'Invalid language code: {source_lang}'}), 400
+            return _translate_many(text, source_lang, target_langs, model, bool(data.get('stream')))
         
         try:
+            if response_mode == 'segments':
+                # Chunk offsets into the source, translations and timings as parallel lists
+                segments = ollama_wrapper.translate_segments(text, source_lang, target_lang, model)
+                return jsonify({'translated_text': segments.text(), 'segments': segments.to_dict()})
             translated_text = ollama_wrapper.translate(text, source_lang, target_lang, model)
             return jsonify({'translated_text': translated_text})
         except Exception as e:
@@ -90,8 +369,97 @@ def translate():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _translate_many(text, source_lang, target_langs, model, stream):
+    """
+    Fan one text out to several target languages. The text is detected and
+    chunked once; with ``stream`` the chunks are sent as NDJSON lines as
+    they finish, followed by one ``done`` line per language.
+    """
+    if not stream:
+        try:
+            translations, errors = ollama_wrapper.translate_many(text, source_lang, target_langs, model)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        body = {'source_lang': source_lang, 'translations': translations}
+        if errors:
+            body['errors'] = errors
+        return jsonify(body), 200 if translations else 500
+
+    def events():
+        parts = {}
+        for result in ollama_wrapper.iter_translate_many(text, source_lang, target_langs, model):
+            event = result._asdict()
+            if result.error is None:
+                del event['error']
+            yield json.dumps(event, ensure_ascii=False) + '\n'
+            if result.error is not None:
+                continue
+            done = parts.setdefault(result.target_lang, [None] * result.total)
+            done[result.index] = result.text
+            if all(part is not None for part in done):
+                yield json.dumps({
+                    'target_lang': result.target_lang,
+                    'done': True,
+                    'translated_text': ollama_wrapper._join_chunks(done),
+                }, ensure_ascii=False) + '\n'
+
+    response = Response(stream_with_context(events()), mimetype='application/x-ndjson')
+    response.headers['X-Source-Lang'] = source_lang
+    return response
+
+@app.route('/translate/incremental', methods=['POST'])
+@admission_controlled('translate', _incremental_cost)
+def translate_incremental():
+    """
+    Translate a new version of a document, re-translating only the segments
+    that changed since the version last sent with the same ``doc_id``.
+    """
+    try:
+        data = request.get_json()
+
+        if not data or 'text' not in data or not data.get('doc_id'):
+            return jsonify({'error': 'Both doc_id and text are required'}), 400
+
+        text = data['text']
+        doc_id = str(data['doc_id'])
+        source_lang = data.get('source_lang', 'auto')
+        target_lang = data.get('target_lang', 'en')
+        model = data.get('model')
+
+        if len(doc_id) > 200:
+            return jsonify({'error': 'doc_id is too long'}), 400
+
+        # Auto-detect source language if not specified
+        if source_lang == 'auto':
+            try:
+                source_lang = language_detector.detect_language(text)
+            except Exception as e:
+                return jsonify({'error': f'Language detection failed: {str(e)}'}), 500
+
+        for lang in (source_lang, target_lang):
+            if lang not in ollama_wrapper.supported_languages:
+                return jsonify({'error': f'Invalid language code: {lang}'}), 400
+
+        try:
+            result = incremental_translator.update(doc_id, text, source_lang, target_lang, model)
+            result['source_lang'] = source_lang
+            return jsonify(result)
+        except Exception as e:
+            return jsonify({'error': f'Translation failed: {str(e)}'}), 500
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/translate/incremental/<path:doc_id>', methods=['DELETE'])
+def forget_document(doc_id):
+    """Drop the stored version of a document."""
+    if not incremental_translator.store.delete(doc_id):
+        return jsonify({'error': 'Unknown document'}), 404
+    return jsonify({'deleted': doc_id})
+
 @app.route("/detect-language", methods=["POST"])
 @app.route("/detect_language", methods=["POST"])
+@admission_controlled('detect_language', _detect_cost)
 def detect_language():
     try:
         data = request.get_json()
@@ -120,21 +488,67 @@ def text_to_speech():
         
         text = data['text']
         lang = data['lang']
+        fmt = data.get('format', 'wav')
+
+        if fmt not in AUDIO_FORMATS:
+            return jsonify({'error': f"Unsupported format: {fmt} (use one of {', '.join(AUDIO_FORMATS)})"}), 400
+        ext, mimetype = AUDIO_FORMATS[fmt]
         
         try:
-            audio_data = tts_engine.text_to_speech(text, lang)
-            return send_file(
-                io.BytesIO(audio_data),
-                mimetype='audio/wav',
+            # Identical requests are served from the audio store without re-synthesis
+            key = audio_store.key(TTS_MODEL, lang, fmt, text)
+            if usage_log is not None:
+                usage_log.record('tts', key, {'text': text, 'lang': lang, 'format': fmt})
+            path = audio_store.get(key, ext)
+            cached = path is not None
+            if not cached:
+                path = audio_store.create(key, ext, lambda out: tts_engine.synthesize(text, lang, fmt, out))
+            response = send_file(
+                path,
+                mimetype=mimetype,
                 as_attachment=True,
-                download_name='speech.wav'
+                download_name=f'speech.{ext}',
+                conditional=True
             )
+            # A GET on this URL supports Range requests, e.g. for seeking in an <audio> element
+            response.headers['X-Audio-Url'] = f'/tts/audio/{key}.{ext}'
+            response.headers['X-Cache'] = 'hit' if cached else 'miss'
+            return response
         except Exception as e:
             return jsonify({'error': f'Text-to-speech failed: {str(e)}'}), 500
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/tts/audio/<key>.<ext>', methods=['GET'])
+def tts_audio(key, ext):
+    """Stored audio by content hash, with HTTP Range support."""
+    formats = {e: m for e, m in AUDIO_FORMATS.values()}
+    if ext not in formats or not key.isalnum():
+        return jsonify({'error': 'Unknown audio'}), 404
+    path = audio_store.get(key, ext)
+    if path is None:
+        return jsonify({'error': 'Unknown audio'}), 404
+    # Content never changes for a given name
+    return send_file(path, mimetype=formats[ext], conditional=True, max_age=365 * 24 * 3600)
+
+class ScrapeFailed(Exception):
+    pass
+
+def _scrape(url):
+    # Use readability parser as it usually gives the best results
+    try:
+        content = method3_readability(url)
+    except ExtractionError as e:
+        raise ScrapeFailed(str(e))
+
+    # Raising keeps empty results out of the cache
+    if not content:
+        raise ScrapeFailed("No content extracted")
+
+    # Clean the scraped text
+    return clean_text(content)
+
 @app.route('/scrape-url', methods=['POST'])
 def scrape_url():
     try:
@@ -149,23 +563,62 @@ def scrape_url():
             return jsonify({'error': 'Invalid URL'}), 400
         
         try:
-            # Use readability parser as it usually gives the best results
-            content = method3_readability(url)
-            
-            if not content or content.startswith("Ошибка"):
-                return jsonify({'error': 'Failed to extract content from URL'}), 500
-                
-            # Clean the scraped text
-            clean_content = clean_text(content)
-            
+            key = make_key('scrape', url)
+            public_url = anonymize_url(url)
+            if usage_log is not None and public_url:
+                usage_log.record('scrape', key, {'url': public_url})
+            clean_content = cache.get_or_compute(key, lambda: _scrape(url), CACHE_SCRAPE_TTL)
             return jsonify({'content': clean_content})
+        except ScrapeFailed:
+            return jsonify({'error': 'Failed to extract content from URL'}), 500
         except Exception as e:
             return jsonify({'error': f'Scraping failed: {str(e)}'}), 500
             
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _prewarm_scrape(key, payload):
+    # Pages change, so scrapes are always refreshed rather than only filled
+    cache.set(key, _scrape(payload['url']), CACHE_SCRAPE_TTL)
+    return True
+
+def _prewarm_translation(key, payload):
+    if cache.get(key) is not None:
+        return False
+    ollama_wrapper._cached_translate_chunk(
+        payload['text'], payload['source_lang'], payload['target_lang'], payload['model'])
+    return True
+
+def _prewarm_tts(key, payload):
+    ext, _ = AUDIO_FORMATS[payload['format']]
+    if audio_store.get(key, ext) is not None:
+        return False
+    audio_store.create(key, ext, lambda out: tts_engine.synthesize(
+        payload['text'], payload['lang'], payload['format'], out))
+    return True
+
+def _server_idle():
+    endpoints = admission.snapshot()['endpoints'].values()
+    return (all(gate['inflight'] == 0 and gate['waiting'] == 0 for gate in endpoints)
+            and all(limiter['inflight'] == 0 for limiter in ollama_wrapper.metrics().values()))
+
+prewarmer = Prewarmer(usage_log, {
+    'scrape': _prewarm_scrape,
+    'translation': _prewarm_translation,
+    'tts': _prewarm_tts,
+}, _server_idle) if usage_log is not None else None
+
+@app.route('/prewarm', methods=['POST'])
+def prewarm():
+    """Run a prewarm cycle now, e.g. from a scheduler shortly before peak hours."""
+    if not _is_admin():
+        return jsonify({'error': 'Admin token required'}), 403
+    if prewarmer is None:
+        return jsonify({'error': 'Prewarming is disabled'}), 404
+    return jsonify(prewarmer.run_once(force=True))
+
 @app.route('/summarize', methods=['POST'])
+@admission_controlled('summarize', _summarize_cost)
 def summarize():
     try:
         data = request.get_json()
@@ -221,7 +674,201 @@ def youtube_transcript():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/youtube-subtitles', methods=['POST'])
+@admission_controlled('translate', _subtitles_cost)
+def youtube_subtitles():
+    """
+    Translated subtitles of a YouTube video as SRT or WebVTT. Cues keep their
+    timestamps; batches of cues are translated concurrently and the file is
+    streamed in order as they finish.
+    """
+    try:
+        data = request.get_json()
+
+        if not data or 'url' not in data:
+            return jsonify({'error': 'No YouTube URL provided'}), 400
+
+        url = data['url']
+        source_lang = data.get('source_lang', 'auto')
+        target_lang = data.get('target_lang', 'en')
+        fmt = data.get('format', 'srt')
+        model = data.get('model')
+
+        if fmt not in SUBTITLE_FORMATS:
+            return jsonify({'error': f"Unsupported format: {fmt} (use one of {', '.join(SUBTITLE_FORMATS)})"}), 400
+        if target_lang not in ollama_wrapper.supported_languages:
+            return jsonify({'error': f'Invalid language code: {target_lang}'}), 400
+
+        try:
+            transcript_lang, entries = get_timed_transcript(url)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            return jsonify({'error': f'Failed to get YouTube transcript: {str(e)}'}), 500
+        cues = make_cues(entries)
+        if not cues:
+            return jsonify({'error': 'No transcript available for this video'}), 404
+
+        if source_lang == 'auto':
+            # Transcripts are labelled with codes like "en" or "en-GB"
+            source_lang = (transcript_lang or '').split('-')[0].lower()
+            if source_lang not in ollama_wrapper.supported_languages:
+                try:
+                    source_lang = language_detector.detect_language(' '.join(cue.text for cue in cues[:50]))
+                except Exception as e:
+                    return jsonify({'error': f'Language detection failed: {str(e)}'}), 500
+        if source_lang not in ollama_wrapper.supported_languages:
+            return jsonify({'error': f'Invalid language code: {source_lang}'}), 400
+
+        ext, mimetype = SUBTITLE_FORMATS[fmt]
+        response = Response(
+            stream_with_context(iter_translated_subtitles(ollama_wrapper, cues, source_lang, target_lang, fmt, model,
+                                                          stats=subtitle_stats)),
+            mimetype=mimetype,
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename=subtitles.{target_lang}.{ext}'
+        response.headers['X-Source-Lang'] = source_lang
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/ingest', methods=['POST'])
+def ingest_document():
+    """
+    Upload a document for translation. Accepts either a multipart ``file`` field
+    or a raw request body (pass ``filename`` as a query parameter). The body is
+    streamed to a spool file and translated in the background.
+    """
+    try:
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('file')
+            if upload is None:
+                return jsonify({'error': 'No file provided'}), 400
+            params = request.form
+            stream = upload.stream
+            filename = upload.filename
+            content_type = upload.mimetype
+        else:
+            params = request.args
+            stream = request.stream
+            filename = request.args.get('filename')
+            content_type = request.mimetype
+
+        try:
+            job = ingest_manager.create_job(
+                stream,
+                filename=filename,
+                content_type=content_type,
+                source_lang=params.get('source_lang', 'auto'),
+                target_lang=params.get('target_lang', 'en'),
+                model=params.get('model'),
+                kind=params.get('kind'),
+            )
+        except UploadTooLarge as e:
+            return jsonify({'error': str(e)}), 413
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        ingest_manager.start(job, ollama_wrapper, language_detector.detect_language)
+        return jsonify(job.to_dict()), 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/ingest/<job_id>', methods=['GET'])
+def ingest_status(job_id):
+    job = ingest_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/ingest/<job_id>/result', methods=['GET'])
+def ingest_result(job_id):
+    """Download the translated text; supports HTTP Range so it can be fetched in pieces."""
+    job = ingest_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if not os.path.exists(job.result_path):
+        return jsonify({'error': 'Result not available yet'}), 404
+    response = send_file(
+        job.result_path,
+        mimetype='text/plain; charset=utf-8',
+        conditional=True,
+        download_name=f'{job_id}.txt'
+    )
+    response.headers['X-Job-Status'] = job.status
+    return response
+
+@app.route('/crawl', methods=['POST'])
+def crawl():
+    """Start a crawl job over a list of URLs or a sitemap, optionally translating each page."""
+    try:
+        data = request.get_json()
+
+        if not data or not (data.get('urls') or data.get('sitemap')):
+            return jsonify({'error': 'No URLs or sitemap provided'}), 400
+
+        urls = data.get('urls') or []
+        if not isinstance(urls, list):
+            return jsonify({'error': 'urls must be a list'}), 400
+
+        target_lang = data.get('target_lang')
+        if target_lang and target_lang not in ollama_wrapper.supported_languages:
+            return jsonify({'error': f'Invalid language code: {target_lang}'}), 400
+
+        try:
+            job = crawl_manager.create_job(
+                urls=urls,
+                sitemap=data.get('sitemap'),
+                source_lang=data.get('source_lang', 'auto'),
+                target_lang=target_lang,
+                model=data.get('model'),
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        crawl_manager.start(job, ollama_wrapper, language_detector.detect_language)
+        return jsonify(job.to_dict()), 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/crawl/<job_id>', methods=['GET'])
+def crawl_status(job_id):
+    job = crawl_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict(include_pages=bool(request.args.get('pages'))))
+
+@app.route('/crawl/<job_id>/resume', methods=['POST'])
+def crawl_resume(job_id):
+    """Retry every page of a job that has not finished, e.g. after a restart."""
+    job = crawl_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    crawl_manager.start(job, ollama_wrapper, language_detector.detect_language)
+    return jsonify(job.to_dict()), 202
+
+@app.route('/crawl/<job_id>/content/<content_hash>', methods=['GET'])
+def crawl_content(job_id, content_hash):
+    """Extracted text of one page (``?lang=xx`` for its translation)."""
+    job = crawl_manager.get(job_id)
+    if job is None or not content_hash.isalnum():
+        return jsonify({'error': 'Unknown job or page'}), 404
+    lang = request.args.get('lang')
+    if lang and not lang.isalpha():
+        return jsonify({'error': 'Invalid language code'}), 400
+    path = job.content_path(content_hash, lang)
+    if not os.path.exists(path):
+        return jsonify({'error': 'Content not available'}), 404
+    return send_file(path, mimetype='text/plain; charset=utf-8', conditional=True)
+
 if __name__ == '__main__':
+    if '--startup-report' in sys.argv:
+        from backend.startup import main as startup_main
+        sys.exit(startup_main([a for a in sys.argv[1:] if a != '--startup-report']))
+
     # Check if model is available
     try:
         logger.info("Checking if Ollama model is available...")
@@ -232,6 +879,11 @@ if __name__ == '__main__':
     except Exception as e:
         logger.error(f"Error checking model availability: {str(e)}")
         logger.error(traceback.format_exc())
+
+    # Warm models and caches in the background; with the debug reloader only
+    # the serving child process (WERKZEUG_RUN_MAIN) does it
+    if getattr(sys, 'frozen', False) or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
     
     # Run the Flask app with error handling
     try:
@@ -246,7 +898,9 @@ if __name__ == '__main__':
         port = int(os.environ.get('PORT', 5002))
         
         # Print startup message
-        logger.info(f"Starting Flask server on port {port}, debug={'ON' if debug_mode else 'OFF'}")
+        startup_timer.mark('serving')
+        logger.info(f"Starting Flask server on port {port}, debug={'ON' if debug_mode else 'OFF'} "
+                    f"(startup took {startup_timer.marks['serving']:.2f}s)")
         
         app.run(debug=debug_mode, port=port, host='127.0.0.1')
     except Exception as e:
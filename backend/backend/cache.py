@@ -0,0 +1,434 @@
+"""
+Result cache shared by the translation, language detection and scraping paths.
+
+Three backends implement the same interface:
+
+* ``memory://``          in-process LRU (one worker only)
+* ``sqlite:///path``     SQLite in WAL mode, shared by every worker on the host;
+                         as in SQLAlchemy, ``sqlite:///cache.db`` is relative to
+                         the working directory and ``sqlite:////tmp/cache.db``
+                         is absolute
+* ``redis://host:port``  a Redis-compatible server (needs the ``redis`` package)
+
+Values are JSON, zlib-compressed above a small size. ``get_or_compute``
+lets only one caller per key compute a missing value: other threads wait
+on it in-process, and other workers wait on a short-lived lock in the
+shared store.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import unquote, urlsplit
+
+try:
+    from .config import CACHE_MAX_BYTES, CACHE_MAX_ENTRIES, CACHE_LOCK_TIMEOUT
+except ImportError:
+    CACHE_MAX_BYTES = 256 * 1024 * 1024
+    CACHE_MAX_ENTRIES = 10000
+    CACHE_LOCK_TIMEOUT = 120
+
+logger = logging.getLogger('context-backend')
+
+# Encoded values shorter than this are stored uncompressed
+COMPRESS_MIN_BYTES = 256
+
+_MISSING = object()
+
+
+def make_key(namespace: str, *parts) -> str:
+    """Cache key for ``parts``: hashed, so no source text or URL is stored in keys."""
+    digest = hashlib.sha256(json.dumps(parts, ensure_ascii=False, default=str).encode('utf-8')).hexdigest()
+    return f"{namespace}:{digest}"
+
+
+def encode_value(value: Any) -> bytes:
+    data = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if len(data) >= COMPRESS_MIN_BYTES:
+        return b'z' + zlib.compress(data, 6)
+    return b'j' + data
+
+
+def decode_value(blob: bytes) -> Any:
+    blob = bytes(blob)
+    data = zlib.decompress(blob[1:]) if blob[:1] == b'z' else blob[1:]
+    return json.loads(data.decode('utf-8'))
+
+
+class _Flight:
+    """One in-process computation of a key that other threads can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class Cache:
+    """
+    Common cache interface. Backends implement ``_get_raw``, ``_set_raw``,
+    ``delete``, ``clear`` and, when shared between processes, ``_try_lock``
+    and ``_unlock``.
+    """
+
+    backend = 'none'
+
+    def __init__(self, default_ttl: Optional[float] = None, lock_timeout: float = CACHE_LOCK_TIMEOUT):
+        self.default_ttl = default_ttl
+        self.lock_timeout = lock_timeout
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'computed': 0, 'waited': 0}
+
+    def _count(self, name: str, n: int = 1):
+        with self._stats_lock:
+            self._stats[name] += n
+
+    def get(self, key: str, default=None):
+        blob = self._get_raw(key)
+        if blob is None:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return decode_value(blob)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._set_raw(key, encode_value(value), time.time() + ttl if ttl else None)
+        self._count('sets')
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any], ttl: Optional[float] = None):
+        """
+        Return the cached value for ``key``, or compute and store it.
+
+        Concurrent callers for the same key share one computation; if it
+        raises, they all see the error and nothing is cached.
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self._count('waited')
+            if not flight.done.wait(self.lock_timeout):
+                return compute()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._compute_shared(key, compute, ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _compute_shared(self, key: str, compute: Callable[[], Any], ttl: Optional[float]):
+        # Another worker may be computing the same key: wait for its result
+        # until the lock expires, then compute it here anyway
+        if not self._try_lock(key):
+            deadline = time.monotonic() + self.lock_timeout
+            delay = 0.02
+            while time.monotonic() < deadline:
+                time.sleep(delay)
+                delay = min(delay * 2, 0.5)
+                blob = self._get_raw(key)
+                if blob is not None:
+                    self._count('waited')
+                    return decode_value(blob)
+                if self._try_lock(key):
+                    break
+            else:
+                logger.warning(f"Cache lock for {key} not released after {self.lock_timeout}s, computing anyway")
+
+        try:
+            value = compute()
+            self._count('computed')
+            self.set(key, value, ttl)
+            return value
+        finally:
+            self._unlock(key)
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        stats['backend'] = self.backend
+        return stats
+
+    def _get_raw(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _set_raw(self, key: str, blob: bytes, expires_at: Optional[float]):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def _try_lock(self, key: str) -> bool:
+        return True
+
+    def _unlock(self, key: str):
+        pass
+
+
+class MemoryCache(Cache):
+    """In-process LRU bounded by entry count and total encoded size."""
+
+    backend = 'memory'
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES, **kwargs):
+        super().__init__(**kwargs)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _get_raw(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            blob, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return blob
+
+    def _set_raw(self, key: str, blob: bytes, expires_at: Optional[float]):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (blob, expires_at)
+            self._size += len(blob)
+            evicted = 0
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+                evicted += 1
+        if evicted:
+            self._count('evictions', evicted)
+
+    def _remove(self, key: str):
+        blob, _ = self._entries.pop(key)
+        self._size -= len(blob)
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        with self._lock:
+            stats.update(entries=len(self._entries), bytes=self._size)
+        return stats
+
+
+class SQLiteCache(Cache):
+    """
+    Cache in a SQLite database in WAL mode, so every worker process on the
+    host reads and writes the same entries. Least recently used rows are
+    dropped once the stored values exceed ``max_bytes``.
+    """
+
+    backend = 'sqlite'
+
+    # Refresh a row's access time at most this often, to keep reads cheap
+    _TOUCH_INTERVAL = 60
+
+    def __init__(self, path: str, max_bytes: int = CACHE_MAX_BYTES, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._written = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+            " expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_locks (key TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get_raw(self, key: str) -> Optional[bytes]:
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT value, expires_at, accessed_at FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        blob, expires_at, accessed_at = row
+        now = time.time()
+        if expires_at is not None and expires_at <= now:
+            conn.execute("DELETE FROM cache WHERE key = ? AND expires_at <= ?", (key, now))
+            return None
+        if accessed_at < now - self._TOUCH_INTERVAL:
+            conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return blob
+
+    def _set_raw(self, key: str, blob: bytes, expires_at: Optional[float]):
+        self._conn().execute(
+            "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+            (key, sqlite3.Binary(blob), len(blob), expires_at, time.time()),
+        )
+        # Checking the total size costs a table scan, so only do it every
+        # twentieth of the budget written by this worker
+        with self._stats_lock:
+            self._written += len(blob)
+            evict = self._written >= self.max_bytes / 20
+            if evict:
+                self._written = 0
+        if evict:
+            self._evict()
+
+    def _evict(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - int(self.max_bytes * 0.9)
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+        self._count('evictions', len(victims))
+        logger.info(f"Evicted {len(victims)} cache entries from {self.path}")
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self):
+        conn = self._conn()
+        conn.execute("DELETE FROM cache")
+        conn.execute("DELETE FROM cache_locks")
+
+    def _try_lock(self, key: str) -> bool:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("DELETE FROM cache_locks WHERE key = ? AND expires_at <= ?", (key, now))
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO cache_locks (key, expires_at) VALUES (?, ?)", (key, now + self.lock_timeout)
+        )
+        return cursor.rowcount == 1
+
+    def _unlock(self, key: str):
+        self._conn().execute("DELETE FROM cache_locks WHERE key = ?", (key,))
+
+    def stats(self) -> Dict:
+        stats = super().stats()
+        entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        stats.update(entries=entries, bytes=size, path=self.path)
+        return stats
+
+
+class RedisCache(Cache):
+    """
+    Cache on a Redis-compatible server. Expiry uses native TTLs; size
+    eviction is left to the server's ``maxmemory`` policy (e.g. allkeys-lru).
+    """
+
+    backend = 'redis'
+
+    def __init__(self, url: str = None, prefix: str = 'context:', client=None, **kwargs):
+        super().__init__(**kwargs)
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError("The redis package is required for a redis:// cache URL")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self._lock_tokens: Dict[str, str] = {}
+
+    def _get_raw(self, key: str) -> Optional[bytes]:
+        return self.client.get(self.prefix + key)
+
+    def _set_raw(self, key: str, blob: bytes, expires_at: Optional[float]):
+        ttl = max(1, int(expires_at - time.time())) if expires_at else None
+        self.client.set(self.prefix + key, blob, ex=ttl)
+
+    def delete(self, key: str):
+        self.client.delete(self.prefix + key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+    def _try_lock(self, key: str) -> bool:
+        token = os.urandom(8).hex()
+        if self.client.set(f"{self.prefix}lock:{key}", token, nx=True, px=int(self.lock_timeout * 1000)):
+            self._lock_tokens[key] = token
+            return True
+        return False
+
+    def _unlock(self, key: str):
+        token = self._lock_tokens.pop(key, None)
+        lock_key = f"{self.prefix}lock:{key}"
+        current = self.client.get(lock_key)
+        if token is not None and current is not None and current.decode() == token:
+            self.client.delete(lock_key)
+
+
+def make_cache(url: str, **kwargs) -> Cache:
+    """Build a cache from a ``memory://``, ``sqlite:///path`` or ``redis://`` URL."""
+    if url.startswith('memory://'):
+        return MemoryCache(**kwargs)
+    if url.startswith('sqlite:'):
+        parts = urlsplit(url)
+        if parts.netloc or not parts.path.startswith('/'):
+            raise ValueError(f"SQLite cache URLs look like sqlite:///relative.db or sqlite:////abs.db: {url}")
+        # The path follows the third slash: relative, or absolute with a fourth
+        # slash or a drive letter (sqlite:///C:/... on Windows)
+        path = unquote(parts.path[1:])
+        if not path:
+            raise ValueError(f"SQLite cache URL has no path: {url}")
+        return SQLiteCache(path, **kwargs)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisCache(url, **kwargs)
+    raise ValueError(f"Unsupported cache URL: {url}")
@@ -0,0 +1,115 @@
+import threading
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger('context-backend')
+
+
+class AdaptiveLimiter:
+    """
+    AIMD concurrency limiter driven by Ollama latency feedback.
+
+    The limit grows additively (+1/limit per successful call) while the
+    limiter is actually saturated and responses stay fast, and shrinks
+    multiplicatively when calls fail or when per-token generation time rises
+    well above the best seen so far. Ollama's ``total_duration`` already
+    includes time spent queued inside the server, so it cannot tell queueing
+    apart from work; the eval rate is the signal that degrades under load.
+    """
+
+    def __init__(self, name: str, initial_limit: float = 2, min_limit: float = 1,
+                 max_limit: float = 8, backoff: float = 0.5, congestion_backoff: float = 0.9,
+                 tolerance: float = 2.0):
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.backoff = backoff
+        self.congestion_backoff = congestion_backoff
+        self.tolerance = tolerance
+
+        self._inflight = 0
+        self._cond = threading.Condition()
+        self._baseline: Optional[float] = None
+        self._latency_ewma: Optional[float] = None
+        self._successes = 0
+        self._errors = 0
+        self._decreases = 0
+
+    # ---------------------- Gate ---------------------- #
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Block until a slot is free. Returns False if ``timeout`` expired first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._inflight >= int(self.limit):
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            self._inflight += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self._inflight = max(0, self._inflight - 1)
+            self._cond.notify()
+
+    # ---------------------- Feedback ---------------------- #
+
+    def on_success(self, latency: float, eval_duration: float = None, eval_count: int = None):
+        """
+        Record a completed call. Durations are in seconds; ``eval_*`` come
+        from the Ollama response when available.
+        """
+        # Per-token time is comparable across short and long generations
+        if eval_duration and eval_count:
+            sample = eval_duration / eval_count
+        else:
+            sample = latency
+
+        with self._cond:
+            self._successes += 1
+            self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+
+            if self._baseline is None or sample < self._baseline:
+                self._baseline = sample
+            else:
+                # Let the baseline drift up slowly so a permanently slower
+                # model or machine does not pin the limit at the minimum
+                self._baseline += (sample - self._baseline) * 0.01
+
+            if sample > self._baseline * self.tolerance:
+                self._decrease(self.congestion_backoff)
+            elif self._inflight >= int(self.limit):
+                # Only probe upwards when the current limit is actually in use
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self._cond.notify()
+
+    def on_error(self):
+        """Record a failed or timed-out call."""
+        with self._cond:
+            self._errors += 1
+            self._decrease(self.backoff)
+
+    def _decrease(self, factor: float):
+        new_limit = max(self.min_limit, self.limit * factor)
+        if int(new_limit) < int(self.limit):
+            logger.info(f"Concurrency limit for {self.name} lowered to {int(new_limit)}")
+        if new_limit < self.limit:
+            self._decreases += 1
+        self.limit = new_limit
+
+    def snapshot(self) -> Dict:
+        with self._cond:
+            return {
+                'limit': int(self.limit),
+                'limit_exact': round(self.limit, 3),
+                'inflight': self._inflight,
+                'successes': self._successes,
+                'errors': self._errors,
+                'decreases': self._decreases,
+                'baseline_latency': self._baseline,
+                'latency_ewma': self._latency_ewma,
+            }
@@ -1,5 +1,119 @@
+import os
+import tempfile
+
 TEXT_SIZE_THRESHOLD = 5000  # Characters threshold for optional future use
 # Default chunking settings to stay well below typical model output limits.
 CHUNK_SIZE = 2000  # ~500‑700 tokens — keeps translation output within context window
 # Overlap to maintain context between chunks
-CHUNK_OVERLAP = 100  # Characters of overlap between chunks 
\ No newline at end of file
+CHUNK_OVERLAP = 100  # Characters of overlap between chunks
+
+# Document ingestion (/ingest)
+INGEST_DIR = os.path.join(tempfile.gettempdir(), "context-ingest")  # Spool and result files
+INGEST_BLOCK_SIZE = 64 * 1024  # Bytes read from the upload / spool file at a time
+INGEST_MAX_BYTES = 200 * 1024 * 1024  # Upload size limit
+INGEST_JOB_TTL = 24 * 3600  # Seconds a finished job and its result file are kept
+
+# Ollama server (point it at loadtest/mock_ollama.py for load tests)
+OLLAMA_URL = os.environ.get("OLLAMA_URL", "http://localhost:11434")
+
+# Ollama concurrency (adaptive AIMD limit per model, see concurrency.py)
+OLLAMA_INITIAL_CONCURRENCY = 2  # In-flight generations per model at startup
+OLLAMA_MAX_CONCURRENCY = 8  # Upper bound for the adaptive limit
+OLLAMA_REQUEST_TIMEOUT = 300  # Seconds before an Ollama call counts as failed
+
+# Admission control for Ollama-backed endpoints (see admission.py).
+# Cost is roughly the number of Ollama calls a request will make.
+ADMISSION_LIMITS = {
+    'translate': {'max_cost': 32, 'max_queue': 16, 'max_wait': 20},
+    'summarize': {'max_cost': 8, 'max_queue': 8, 'max_wait': 20},
+    'detect_language': {'max_cost': 8, 'max_queue': 16, 'max_wait': 10},
+}
+# Cost units per second refilled into each client's token bucket, and its capacity
+# (raised by the load-test harness, whose simulated clients share one address)
+CLIENT_RATE = float(os.environ.get("CONTEXT_CLIENT_RATE", 2.0))
+CLIENT_BURST = float(os.environ.get("CONTEXT_CLIENT_BURST", 60))
+
+# Structured (JSON schema) output for translation and detection
+STRUCTURED_OUTPUT = True  # Use Ollama's `format` schema instead of free-text replies
+NUM_PREDICT_PER_CHAR = 0.75  # Output token budget per input character
+NUM_PREDICT_MIN = 64  # Fixed token allowance on top of the per-character budget
+NUM_PREDICT_MAX = 4096  # Hard cap on generated tokens per call
+DETECTION_SAMPLE_CHARS = 1000  # Characters sent to the model for language detection
+
+# Startup warm-up (see warmup.py)
+OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps a model loaded after the last request
+WARMUP_MODELS = []  # Extra models to preload besides OllamaWrapper's default
+WARMUP_TTS = False  # Load the TTS model during warm-up instead of on first use
+WARMUP_ENABLED = os.environ.get("CONTEXT_WARMUP", "1") != "0"  # Starts with the first request, or at launch via app.py
+
+# Web page fetching for /scrape-url (see fetch.py)
+FETCH_MAX_BYTES = 5 * 1024 * 1024  # Bodies are truncated beyond this size
+FETCH_TIMEOUT = 15  # Seconds for connect/read and for the whole body
+FETCH_BLOCK_SIZE = 16 * 1024  # Bytes read from the socket at a time
+
+# Bulk crawl jobs (/crawl, see crawl.py)
+CRAWL_DIR = os.path.join(tempfile.gettempdir(), "context-crawl")  # Job state and extracted pages
+CRAWL_WORKERS = 8  # Pages processed concurrently per job (also the connection pool size)
+CRAWL_PER_HOST_CONCURRENCY = 2  # Simultaneous requests to one host
+CRAWL_MIN_DELAY = 0.25  # Seconds between request starts per host (robots Crawl-delay may raise it)
+CRAWL_MAX_URLS = 10000  # URLs accepted per job
+
+# Per-request profiling (see profiling.py). Requests opt in with an
+# `X-Profile` header or `?profile=` query flag plus the admin token.
+ADMIN_TOKEN = os.environ.get("CONTEXT_ADMIN_TOKEN")  # Profiling is disabled when unset
+PROFILE_DIR = os.path.join(tempfile.gettempdir(), "context-profiles")  # Saved Chrome trace files
+PROFILE_MAX_FILES = 200  # Oldest traces are deleted beyond this
+PROFILE_MAX_AGE = 7 * 24 * 3600  # Seconds a trace is kept
+
+# Result cache shared by all worker processes (see cache.py). Use
+# memory:// for a per-process LRU, or redis://host:6379/0 for a server.
+CACHE_URL = os.environ.get(
+    "CONTEXT_CACHE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "context-cache.sqlite3")
+)
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # Stored (compressed) bytes before LRU eviction
+CACHE_MAX_ENTRIES = 10000  # Entry limit of the in-process memory:// cache
+CACHE_TTL = 7 * 24 * 3600  # Seconds translations and language detections stay cached
+CACHE_SCRAPE_TTL = 3600  # Seconds scraped page text stays cached
+CACHE_LOCK_TIMEOUT = 120  # Seconds other callers wait for a key someone else is computing
+
+# Tiered translation (see tiering.py): a small draft model translates each
+# chunk first and only drafts failing the local checks go to the requested model
+TIERED_TRANSLATION = False  # Off by default; enable once DRAFT_MODEL is pulled
+DRAFT_MODEL = "gemma3:1b"  # Small, fast model used for drafts
+TIER_PAIRS = {}  # Per-pair overrides, e.g. {"en-ja": {"enabled": False}, "*-zh": {"length_ratio": (0.2, 1.5)}}
+TIER_LENGTH_RATIO = (0.4, 2.5)  # Accepted draft/source length ratio
+TIER_MIN_DETECT_CHARS = 24  # Shorter drafts skip the output-language check
+TIER_MAX_COPIED_RATIO = 0.5  # Max share of source words left untranslated in the draft
+
+# Incremental re-translation of edited documents (/translate/incremental, see incremental.py)
+INCREMENTAL_DIR = os.path.join(tempfile.gettempdir(), "context-documents")  # Last version of each document
+INCREMENTAL_SEGMENT_CHARS = 800  # Paragraphs longer than this are split at sentence ends
+INCREMENTAL_CONTEXT_CHARS = 300  # Characters of each neighbouring segment sent as context
+INCREMENTAL_DOC_TTL = 7 * 24 * 3600  # Seconds a document is kept after its last update
+
+# Text-to-speech output (see tts/audio.py and tts/store.py)
+AUDIO_DIR = os.path.join(tempfile.gettempdir(), "context-audio")  # Content-addressed synthesized audio
+AUDIO_STORE_MAX_BYTES = 1024 * 1024 * 1024  # Least recently used files are removed beyond this
+FFMPEG_BINARY = os.environ.get("FFMPEG_BINARY", "ffmpeg")  # Needed for the mp3 and opus formats
+MP3_BITRATE = "64k"
+OPUS_BITRATE = "32k"
+
+# Off-peak prewarming (see prewarm.py): the most requested scrapes, translated
+# chunks and TTS texts are counted and rebuilt while the server is idle
+PREWARM_ENABLED = os.environ.get("CONTEXT_PREWARM", "0") == "1"  # Record usage and replay it in the background
+PREWARM_DIR = os.environ.get(
+    "CONTEXT_PREWARM_DIR", os.path.join(tempfile.gettempdir(), "context-prewarm")
+)  # Private (0700) directory of the usage log
+PREWARM_FILE = os.path.join(PREWARM_DIR, "usage.json")  # Cache keys, hit counts and request inputs, mode 0600
+PREWARM_MAX_ENTRIES = 5000  # Least used entries are dropped beyond this
+PREWARM_TOP_N = 200  # Entries replayed per cycle
+PREWARM_MIN_HITS = 2  # Entries requested fewer times are never replayed
+PREWARM_MAX_AGE = 7 * 24 * 3600  # Seconds since the last request before an entry is dropped from the log
+PREWARM_IDLE_SECONDS = 300  # Seconds without client requests before a cycle may start
+PREWARM_INTERVAL = 1800  # Seconds between cycles
+PREWARM_MAX_SECONDS = 600  # Time budget of one cycle
+PREWARM_CPU_SHARE = 0.5  # Share of wall time a cycle spends working; it sleeps the rest
+PREWARM_OLLAMA_CALLS = 100  # Translations sent to Ollama per cycle
+
+# Translated YouTube subtitles (/youtube-subtitles, see subtitles.py)
+SUBTITLE_BATCH_TOKENS = 300  # Estimated source tokens of consecutive cues translated in one request
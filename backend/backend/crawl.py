@@ -0,0 +1,417 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+from xml.etree import ElementTree
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .fetch import fetch_html, USER_AGENT
+from .parser import is_valid_url, readability_text, clean_text
+
+try:
+    from .config import (
+        CRAWL_DIR, CRAWL_WORKERS, CRAWL_PER_HOST_CONCURRENCY, CRAWL_MIN_DELAY,
+        CRAWL_MAX_URLS, FETCH_TIMEOUT,
+    )
+except ImportError:
+    import tempfile
+    CRAWL_DIR = os.path.join(tempfile.gettempdir(), "context-crawl")
+    CRAWL_WORKERS = 8
+    CRAWL_PER_HOST_CONCURRENCY = 2
+    CRAWL_MIN_DELAY = 0.25
+    CRAWL_MAX_URLS = 10000
+    FETCH_TIMEOUT = 15
+
+logger = logging.getLogger('context-backend')
+
+# Product token matched against robots.txt user-agent lines
+ROBOTS_AGENT = 'ConText'
+
+_SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+
+# Pages whose readable text is shorter than this are treated as empty
+MIN_CONTENT_CHARS = 20
+
+
+def make_session(pool_size: int = CRAWL_WORKERS) -> requests.Session:
+    """A session whose connection pool is shared by all crawl workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+
+def iter_sitemap_urls(sitemap_url: str, session: requests.Session, depth: int = 0) -> Iterator[str]:
+    """Stream page URLs out of a sitemap, following nested sitemap indexes."""
+    response = session.get(sitemap_url, timeout=FETCH_TIMEOUT, stream=True)
+    try:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        nested = []
+        for event, elem in ElementTree.iterparse(response.raw, events=('end',)):
+            if elem.tag == _SITEMAP_NS + 'loc' and elem.text:
+                nested.append(elem.text.strip())
+            elif elem.tag == _SITEMAP_NS + 'url':
+                yield from nested
+                nested = []
+                elem.clear()
+            elif elem.tag == _SITEMAP_NS + 'sitemap':
+                # Entries of a sitemap index: collect and recurse afterwards
+                elem.clear()
+        remaining = nested
+    finally:
+        response.close()
+
+    if remaining and depth < 2:
+        for url in remaining:
+            yield from iter_sitemap_urls(url, session, depth + 1)
+
+
+def _interleave_by_host(urls: List[str]) -> List[str]:
+    """
+    Order URLs round-robin across hosts so workers are not all stuck behind
+    one host's gate while other hosts have work queued.
+    """
+    by_host: Dict[str, List[str]] = {}
+    for url in urls:
+        by_host.setdefault(urlparse(url).netloc, []).append(url)
+    queues = list(by_host.values())
+    ordered = []
+    for i in range(max((len(q) for q in queues), default=0)):
+        ordered.extend(q[i] for q in queues if i < len(q))
+    return ordered
+
+
+class RobotsUnavailable(Exception):
+    """robots.txt could not be fetched (server error or no connection); retry later."""
+
+
+class _HostGate:
+    """Per-host concurrency cap plus a minimum delay between request starts."""
+
+    def __init__(self, concurrency: int, delay: float):
+        self.delay = delay
+        self._semaphore = threading.Semaphore(concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.delay
+        if start > now:
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, *exc):
+        self._semaphore.release()
+
+
+class CrawlJob:
+    """
+    Scrape (and optionally translate) a list of URLs.
+
+    Progress is appended to ``state.jsonl`` in the job directory, one line per
+    finished URL, so a job can be resumed after a crash or restart.
+    """
+
+    def __init__(self, job_id: str, work_dir: str, urls: List[str], sitemap: str = None,
+                 source_lang: str = 'auto', target_lang: str = None, model: str = None):
+        self.id = job_id
+        self.dir = os.path.join(work_dir, job_id)
+        self.urls = urls
+        self.sitemap = sitemap
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.model = model
+        self.status = 'queued'
+        self.error = None
+        self.pages: Dict[str, Dict] = {}
+        self._hashes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._gates: Dict[str, _HostGate] = {}
+        self._robots: Dict[str, Optional[RobotFileParser]] = {}
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._hosts_lock = threading.Lock()
+
+    # ---------------------- Persistence ---------------------- #
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.dir, 'state.jsonl')
+
+    def _spec(self) -> Dict:
+        return {
+            'job_id': self.id, 'urls': self.urls, 'sitemap': self.sitemap,
+            'source_lang': self.source_lang, 'target_lang': self.target_lang, 'model': self.model,
+        }
+
+    def save_spec(self):
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'spec': self._spec()}) + '\n')
+
+    def _append_state(self, record: Dict):
+        with open(self.state_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'page': record}, ensure_ascii=False) + '\n')
+
+    @classmethod
+    def load(cls, work_dir: str, job_id: str) -> Optional['CrawlJob']:
+        """Rebuild a job from its state file; finished pages are kept, the rest will be retried."""
+        path = os.path.join(work_dir, job_id, 'state.jsonl')
+        if not os.path.exists(path):
+            return None
+        job = None
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                entry = json.loads(line)
+                if 'spec' in entry:
+                    spec = entry['spec']
+                    job = cls(spec['job_id'], work_dir, spec['urls'], spec.get('sitemap'),
+                              spec.get('source_lang', 'auto'), spec.get('target_lang'), spec.get('model'))
+                elif job is not None:
+                    page = entry['page']
+                    job.pages[page['url']] = page
+                    if page.get('status') == 'done':
+                        job._hashes[page['hash']] = page['url']
+        if job is not None:
+            job.status = 'interrupted' if job.pending_urls() else 'done'
+        return job
+
+    # ---------------------- Progress ---------------------- #
+
+    def pending_urls(self) -> List[str]:
+        with self._lock:
+            return [url for url in self.urls
+                    if self.pages.get(url, {}).get('status') not in ('done', 'duplicate', 'skipped')]
+
+    def to_dict(self, include_pages: bool = False) -> Dict:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for page in self.pages.values():
+                counts[page['status']] = counts.get(page['status'], 0) + 1
+            data = {
+                'job_id': self.id,
+                'status': self.status,
+                'error': self.error,
+                'total': len(self.urls),
+                'finished': sum(counts.values()),
+                'counts': counts,
+                'target_lang': self.target_lang,
+            }
+            if include_pages:
+                data['pages'] = list(self.pages.values())
+        return data
+
+    def content_path(self, content_hash: str, lang: str = None) -> str:
+        suffix = f'.{lang}' if lang else ''
+        return os.path.join(self.dir, f'{content_hash}{suffix}.txt')
+
+    # ---------------------- Crawling ---------------------- #
+
+    def _host_state(self, url: str, session: requests.Session):
+        """Return ``(gate, robots)`` for the URL's host, fetching robots.txt once."""
+        parsed = urlparse(url)
+        host = f'{parsed.scheme}://{parsed.netloc}'
+        with self._hosts_lock:
+            if host in self._gates:
+                return self._gates[host], self._robots[host]
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+
+        # Only workers for the same host wait on this robots.txt fetch
+        with host_lock:
+            with self._hosts_lock:
+                if host in self._gates:
+                    return self._gates[host], self._robots[host]
+            robots = self._fetch_robots(host, session)
+            delay = CRAWL_MIN_DELAY
+            if robots is not None:
+                delay = max(delay, float(robots.crawl_delay(ROBOTS_AGENT) or 0))
+            gate = _HostGate(CRAWL_PER_HOST_CONCURRENCY, delay)
+            with self._hosts_lock:
+                self._robots[host] = robots
+                self._gates[host] = gate
+            return gate, robots
+
+    def _fetch_robots(self, host: str, session: requests.Session) -> Optional[RobotFileParser]:
+        """
+        The host's parsed robots.txt, or None when there is none. Raises
+        RobotsUnavailable on a server error or failed connection, so the
+        host's pages fail (and are retried on resume) instead of being skipped.
+        """
+        try:
+            response = session.get(urljoin(host, '/robots.txt'), timeout=FETCH_TIMEOUT)
+        except requests.RequestException as e:
+            raise RobotsUnavailable(f"{host}/robots.txt: {str(e)}") from e
+        if response.status_code >= 500:
+            raise RobotsUnavailable(f"{host}/robots.txt returned {response.status_code}")
+        robots = RobotFileParser()
+        if response.status_code in (401, 403):
+            # Access denied: treat the host as off limits
+            logger.warning(f"{host}/robots.txt returned {response.status_code}, skipping the host")
+            robots.disallow_all = True
+            return robots
+        if response.status_code >= 400:
+            # No robots.txt (404, 410, ...): everything is allowed
+            return None
+        robots.parse(response.text.splitlines())
+        return robots
+
+    def _record(self, record: Dict):
+        with self._lock:
+            self.pages[record['url']] = record
+            self._append_state(record)
+
+    def _process(self, url: str, session: requests.Session, ollama_wrapper,
+                 detect_language: Callable[[str], str]):
+        record = {'url': url}
+        try:
+            gate, robots = self._host_state(url, session)
+            if robots is not None and not robots.can_fetch(ROBOTS_AGENT, url):
+                record['status'] = 'skipped'
+                record['error'] = 'Disallowed by robots.txt'
+                self._record(record)
+                return
+
+            with gate:
+                html, final_url = fetch_html(url, session=session)
+            text = clean_text(readability_text(html))
+            if len(text) < MIN_CONTENT_CHARS:
+                raise ValueError('No readable content')
+
+            content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+            record['hash'] = content_hash
+            record['chars'] = len(text)
+            with self._lock:
+                first_url = self._hashes.get(content_hash)
+                if first_url is None:
+                    self._hashes[content_hash] = url
+            if first_url is not None:
+                record['status'] = 'duplicate'
+                record['duplicate_of'] = first_url
+                self._record(record)
+                return
+
+            with open(self.content_path(content_hash), 'w', encoding='utf-8') as f:
+                f.write(text)
+
+            if self.target_lang:
+                source_lang = self.source_lang
+                if source_lang == 'auto':
+                    source_lang = detect_language(text)
+                record['source_lang'] = source_lang
+                if source_lang != self.target_lang:
+                    translated = ollama_wrapper.translate(text, source_lang, self.target_lang, self.model)
+                else:
+                    translated = text
+                with open(self.content_path(content_hash, self.target_lang), 'w', encoding='utf-8') as f:
+                    f.write(translated)
+
+            record['status'] = 'done'
+        except Exception as e:
+            with self._lock:
+                # Release the hash so a retry can claim it
+                if self._hashes.get(record.get('hash')) == url:
+                    del self._hashes[record['hash']]
+            record['status'] = 'failed'
+            record['error'] = str(e)
+            logger.warning(f"Crawl job {self.id}: {url} failed: {str(e)}")
+        self._record(record)
+
+    def run(self, ollama_wrapper=None, detect_language: Callable[[str], str] = None,
+            session: requests.Session = None):
+        """Process every URL that has not finished yet."""
+        self.status = 'running'
+        session = session or make_session()
+        try:
+            if self.sitemap and not self.urls:
+                urls: Dict[str, None] = {}
+                for url in iter_sitemap_urls(self.sitemap, session):
+                    if is_valid_url(url):
+                        urls[url] = None
+                    if len(urls) >= CRAWL_MAX_URLS:
+                        break
+                self.urls = list(urls)
+                # Persist the expanded list so a resume does not need the sitemap
+                with self._lock:
+                    self.save_spec()
+                    for record in self.pages.values():
+                        self._append_state(record)
+
+            with ThreadPoolExecutor(max_workers=CRAWL_WORKERS, thread_name_prefix=f'crawl-{self.id[:8]}') as pool:
+                for url in _interleave_by_host(self.pending_urls()):
+                    pool.submit(self._process, url, session, ollama_wrapper, detect_language)
+            self.status = 'done'
+        except Exception as e:
+            logger.error(f"Crawl job {self.id} failed: {str(e)}")
+            self.status = 'failed'
+            self.error = str(e)
+
+
+class CrawlManager:
+    """Creates, runs and resumes crawl jobs; state lives under ``work_dir``."""
+
+    def __init__(self, work_dir: str = CRAWL_DIR):
+        self.work_dir = work_dir
+        self._jobs: Dict[str, CrawlJob] = {}
+        self._lock = threading.Lock()
+        self._session = None
+
+    def _shared_session(self) -> requests.Session:
+        with self._lock:
+            if self._session is None:
+                self._session = make_session()
+            return self._session
+
+    def create_job(self, urls: List[str] = None, sitemap: str = None, source_lang: str = 'auto',
+                   target_lang: str = None, model: str = None) -> CrawlJob:
+        urls = list(dict.fromkeys(urls or []))
+        if not urls and not sitemap:
+            raise ValueError('Provide a list of URLs or a sitemap')
+        invalid = [url for url in urls + ([sitemap] if sitemap else []) if not is_valid_url(url)]
+        if invalid:
+            raise ValueError(f'Invalid URL: {invalid[0]}')
+        if len(urls) > CRAWL_MAX_URLS:
+            raise ValueError(f'Too many URLs (limit is {CRAWL_MAX_URLS})')
+
+        job = CrawlJob(uuid.uuid4().hex, self.work_dir, urls, sitemap, source_lang, target_lang, model)
+        job.save_spec()
+        with self._lock:
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[CrawlJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and job_id.isalnum():
+            job = CrawlJob.load(self.work_dir, job_id)
+            if job is not None:
+                with self._lock:
+                    job = self._jobs.setdefault(job_id, job)
+        return job
+
+    def start(self, job: CrawlJob, ollama_wrapper=None, detect_language: Callable[[str], str] = None):
+        # Marked running before the thread starts, so a second call cannot start it again
+        with self._lock:
+            if job.status == 'running':
+                return None
+            job.status = 'running'
+        thread = threading.Thread(
+            target=job.run, args=(ollama_wrapper, detect_language, self._shared_session()),
+            name=f'crawl-{job.id[:8]}', daemon=True,
+        )
+        thread.start()
+        return thread
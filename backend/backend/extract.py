@@ -0,0 +1,194 @@
+import codecs
+import os
+import re
+import zipfile
+import logging
+from html.parser import HTMLParser
+from typing import Iterator
+from xml.etree import ElementTree
+
+try:
+    from .config import INGEST_BLOCK_SIZE
+except ImportError:
+    INGEST_BLOCK_SIZE = 64 * 1024
+
+logger = logging.getLogger('context-backend')
+
+SUPPORTED_KINDS = ('text', 'html', 'docx', 'pdf')
+
+_EXTENSION_KINDS = {
+    '.txt': 'text',
+    '.md': 'text',
+    '.srt': 'text',
+    '.csv': 'text',
+    '.htm': 'html',
+    '.html': 'html',
+    '.xhtml': 'html',
+    '.docx': 'docx',
+    '.pdf': 'pdf',
+}
+
+_CONTENT_TYPE_KINDS = {
+    'text/plain': 'text',
+    'text/markdown': 'text',
+    'text/html': 'html',
+    'application/xhtml+xml': 'html',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
+    'application/pdf': 'pdf',
+}
+
+_WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+def detect_kind(filename: str = None, content_type: str = None) -> str:
+    """Guess the document kind from the file name, falling back to the content type."""
+    if filename:
+        ext = os.path.splitext(filename)[1].lower()
+        if ext in _EXTENSION_KINDS:
+            return _EXTENSION_KINDS[ext]
+    if content_type:
+        mime = content_type.split(';')[0].strip().lower()
+        if mime in _CONTENT_TYPE_KINDS:
+            return _CONTENT_TYPE_KINDS[mime]
+    return 'text'
+
+
+class HTMLTextExtractor(HTMLParser):
+    """
+    Streaming HTML-to-text converter.
+
+    Feed it markup in arbitrary pieces and collect text with ``pop_text()``;
+    no DOM is built, so memory is bounded by the text not yet collected.
+    """
+
+    SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'head', 'svg'}
+    BLOCK_TAGS = {
+        'p', 'div', 'br', 'li', 'ul', 'ol', 'tr', 'table', 'section', 'article',
+        'header', 'footer', 'blockquote', 'pre', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    }
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append('\n')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in self.BLOCK_TAGS:
+            self._parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in self.BLOCK_TAGS:
+            self._parts.append('\n')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+
+    def pop_text(self) -> str:
+        """Return and forget the text collected so far."""
+        text = ''.join(self._parts)
+        self._parts = []
+        return text
+
+
+def _normalize(text: str) -> str:
+    """Collapse runs of spaces and blank lines the same way the scraper does."""
+    text = re.sub(r'[ \t\r\f\v]+', ' ', text)
+    text = re.sub(r' ?\n ?', '\n', text)
+    return re.sub(r'\n{3,}', '\n\n', text)
+
+
+def iter_text_file(path: str, encoding: str = 'utf-8') -> Iterator[str]:
+    """Yield decoded text from a plain text file block by block."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(INGEST_BLOCK_SIZE)
+            if not block:
+                break
+            text = decoder.decode(block)
+            if text:
+                yield text
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
+
+def iter_html_file(path: str, encoding: str = 'utf-8') -> Iterator[str]:
+    """Yield visible text from an HTML file without building a DOM."""
+    extractor = HTMLTextExtractor()
+    for markup in iter_text_file(path, encoding):
+        extractor.feed(markup)
+        text = extractor.pop_text()
+        if text:
+            yield _normalize(text)
+    extractor.close()
+    text = extractor.pop_text()
+    if text:
+        yield _normalize(text)
+
+
+def iter_docx_file(path: str) -> Iterator[str]:
+    """Yield paragraphs from a DOCX file, streaming ``word/document.xml``."""
+    with zipfile.ZipFile(path) as archive:
+        with archive.open('word/document.xml') as xml_file:
+            parts = []
+            # Open elements, so finished ones can be detached from their parent
+            stack = []
+            for event, elem in ElementTree.iterparse(xml_file, events=('start', 'end')):
+                if event == 'start':
+                    stack.append(elem)
+                    continue
+                stack.pop()
+                if elem.tag == _WORD_NS + 't':
+                    parts.append(elem.text or '')
+                elif elem.tag == _WORD_NS + 'tab':
+                    parts.append('\t')
+                elif elem.tag in (_WORD_NS + 'br', _WORD_NS + 'cr'):
+                    parts.append('\n')
+                elif elem.tag == _WORD_NS + 'p':
+                    paragraph = ''.join(parts).strip()
+                    parts = []
+                    if paragraph:
+                        yield paragraph + '\n\n'
+                # Drop finished paragraphs and top-level blocks (tables, section
+                # properties) so the tree never grows with the document
+                parent = stack[-1] if stack else None
+                if parent is not None and (elem.tag == _WORD_NS + 'p' or parent.tag == _WORD_NS + 'body'):
+                    elem.clear()
+                    parent.remove(elem)
+
+
+def iter_pdf_file(path: str) -> Iterator[str]:
+    """Yield text page by page from a PDF file (requires ``pypdf``)."""
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise ValueError("PDF extraction requires the 'pypdf' package")
+
+    reader = PdfReader(path)
+    for page in reader.pages:
+        text = page.extract_text() or ''
+        if text.strip():
+            yield text.strip() + '\n\n'
+
+
+def iter_document_text(path: str, kind: str) -> Iterator[str]:
+    """Yield the text of a spooled document incrementally according to its kind."""
+    if kind == 'text':
+        return iter_text_file(path)
+    if kind == 'html':
+        return iter_html_file(path)
+    if kind == 'docx':
+        return iter_docx_file(path)
+    if kind == 'pdf':
+        return iter_pdf_file(path)
+    raise ValueError(f"Unsupported document type: {kind}")
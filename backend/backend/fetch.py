@@ -0,0 +1,169 @@
+import codecs
+import re
+import socket
+import time
+import logging
+from typing import Optional, Tuple
+
+import requests
+from urllib3.exceptions import ReadTimeoutError
+
+try:
+    from .profiling import traced
+except ImportError:
+    # Imported by parser.py running as a standalone script
+    from profiling import traced
+
+try:
+    from .config import FETCH_MAX_BYTES, FETCH_TIMEOUT, FETCH_BLOCK_SIZE
+except ImportError:
+    FETCH_MAX_BYTES = 5 * 1024 * 1024
+    FETCH_TIMEOUT = 15
+    FETCH_BLOCK_SIZE = 16 * 1024
+
+logger = logging.getLogger('context-backend')
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+
+# How much of the body is inspected for a BOM / <meta charset>
+_SNIFF_BYTES = 4096
+
+_BOMS = (
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_\-]+)', re.IGNORECASE)
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([a-zA-Z0-9_\-]+)', re.IGNORECASE)
+
+
+class FetchError(Exception):
+    """The URL could not be fetched as an HTML page within the configured limits."""
+
+
+def _valid_codec(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.decode('ascii') if isinstance(name, bytes) else name).name
+    except (LookupError, UnicodeDecodeError):
+        return None
+
+
+def detect_encoding(head: bytes, content_type: str = '') -> str:
+    """
+    Pick the body encoding from the first bytes: BOM first, then the HTTP
+    charset, then a <meta charset>, then UTF-8 if the head decodes, else cp1252.
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    match = _HEADER_CHARSET.search(content_type or '')
+    encoding = _valid_codec(match.group(1)) if match else None
+    if encoding:
+        return encoding
+
+    match = _META_CHARSET.search(head[:_SNIFF_BYTES])
+    encoding = _valid_codec(match.group(1)) if match else None
+    if encoding:
+        return encoding
+
+    try:
+        # A multi-byte sequence may be cut at the end of the sample
+        head[:_SNIFF_BYTES].decode('utf-8')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        if e.start >= min(len(head), _SNIFF_BYTES) - 3:
+            return 'utf-8'
+        return 'cp1252'
+
+
+def _looks_like_html(head: bytes) -> bool:
+    sample = head[:512].lstrip().lower()
+    return sample.startswith((b'<!doctype html', b'<html', b'<?xml', b'<head', b'<body', b'<!--'))
+
+
+def _response_socket(response) -> Optional[socket.socket]:
+    """The socket a streamed response is read from, if urllib3 exposes it."""
+    raw = response.raw
+    connection = getattr(raw, 'connection', None) or getattr(raw, '_connection', None)
+    return getattr(connection, 'sock', None)
+
+
+def _iter_body(response, deadline: float, timeout: float):
+    """
+    Yield body blocks until the end of the response or the deadline.
+
+    Before every read the socket timeout is lowered to the time left, and
+    ``read1`` returns after a single receive, so a server trickling bytes
+    cannot keep a read going past the deadline.
+    """
+    raw = response.raw
+    sock = _response_socket(response)
+    # urllib3 < 2 has no read1; its read waits for a full block
+    read = getattr(raw, 'read1', None) or raw.read
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise FetchError(f"Timed out after {timeout}s while reading the page")
+        if sock is not None:
+            sock.settimeout(remaining)
+        try:
+            block = read(FETCH_BLOCK_SIZE, decode_content=True)
+        except (socket.timeout, ReadTimeoutError):
+            raise FetchError(f"Timed out after {timeout}s while reading the page")
+        if not block:
+            return
+        yield block
+
+
+@traced('fetch_html')
+def fetch_html(url: str, max_bytes: int = FETCH_MAX_BYTES, timeout: float = FETCH_TIMEOUT,
+               session: requests.Session = None) -> Tuple[str, str]:
+    """
+    Stream an HTML page with a size cap and an overall deadline.
+
+    The Content-Type is checked before any of the body is read, and bodies
+    longer than ``max_bytes`` are truncated instead of being buffered whole.
+    Returns ``(html_text, final_url)``.
+    """
+    http = session or requests
+    deadline = time.monotonic() + timeout
+    response = http.get(url, headers={'User-Agent': USER_AGENT}, timeout=timeout, stream=True)
+    try:
+        response.raise_for_status()
+
+        content_type = response.headers.get('Content-Type', '')
+        mime = content_type.split(';')[0].strip().lower()
+        if mime and mime not in HTML_CONTENT_TYPES:
+            raise FetchError(f"Unsupported content type: {mime}")
+
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > max_bytes:
+            logger.warning(f"{url}: Content-Length {length} exceeds {max_bytes}, reading only the first {max_bytes} bytes")
+
+        body = bytearray()
+        sniffed = bool(mime)
+        for block in _iter_body(response, deadline, timeout):
+            body += block
+            if not sniffed and len(body) >= 512:
+                # No Content-Type: give up early unless the start looks like markup
+                if not _looks_like_html(bytes(body[:512])):
+                    raise FetchError("Response does not look like HTML")
+                sniffed = True
+            if len(body) >= max_bytes:
+                del body[max_bytes:]
+                logger.warning(f"{url}: body truncated at {max_bytes} bytes")
+                break
+
+        if not sniffed and not _looks_like_html(bytes(body[:512])):
+            raise FetchError("Response does not look like HTML")
+
+        encoding = detect_encoding(bytes(body[:_SNIFF_BYTES]), content_type)
+        return body.decode(encoding, errors='replace'), response.url
+    finally:
+        response.close()
@@ -0,0 +1,247 @@
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from .profiling import propagate
+
+try:
+    from .config import INCREMENTAL_DIR, INCREMENTAL_SEGMENT_CHARS, INCREMENTAL_CONTEXT_CHARS
+except ImportError:
+    import tempfile
+    INCREMENTAL_DIR = os.path.join(tempfile.gettempdir(), "context-documents")
+    INCREMENTAL_SEGMENT_CHARS = 800
+    INCREMENTAL_CONTEXT_CHARS = 300
+
+try:
+    from .config import INCREMENTAL_DOC_TTL
+except ImportError:
+    INCREMENTAL_DOC_TTL = 7 * 24 * 3600
+
+try:
+    from .config import OLLAMA_MAX_CONCURRENCY
+except ImportError:
+    OLLAMA_MAX_CONCURRENCY = 8
+
+logger = logging.getLogger('context-backend')
+
+_PARAGRAPH_BREAK = re.compile(r'(\n\s*\n)')
+_SENTENCE_END = re.compile(r'(?<=[.!?。！？])\s+')
+
+
+def split_segments(text: str, max_chars: int = INCREMENTAL_SEGMENT_CHARS) -> List[Tuple[str, str]]:
+    """
+    Split text into ``(segment, separator)`` pairs: paragraphs, with long
+    paragraphs cut at sentence ends. Joining every segment with its
+    separator gives back the original text.
+    """
+    parts = _PARAGRAPH_BREAK.split(text)
+    segments: List[Tuple[str, str]] = []
+    for i in range(0, len(parts), 2):
+        paragraph = parts[i]
+        separator = parts[i + 1] if i + 1 < len(parts) else ''
+        if len(paragraph) <= max_chars:
+            segments.append((paragraph, separator))
+            continue
+
+        # Sentences with the whitespace that follows them, grouped greedily;
+        # the whitespace after a group's last sentence becomes its separator
+        units: List[Tuple[str, str]] = []
+        pos = 0
+        for match in _SENTENCE_END.finditer(paragraph):
+            units.append((paragraph[pos:match.start()], match.group()))
+            pos = match.end()
+        units.append((paragraph[pos:], separator))
+
+        current, current_sep = None, ''
+        for sentence, sentence_sep in units:
+            if current is not None and len(current) + len(current_sep) + len(sentence) > max_chars:
+                segments.append((current, current_sep))
+                current = None
+            current = sentence if current is None else current + current_sep + sentence
+            current_sep = sentence_sep
+        segments.append((current, current_sep))
+    return segments
+
+
+class DocumentStore:
+    """
+    The last source and translation of each document, one JSON file per
+    document. Documents not updated for ``ttl`` seconds are deleted.
+    """
+
+    # Seconds between scans of the directory for expired documents
+    CLEANUP_INTERVAL = 3600
+
+    def __init__(self, directory: str = INCREMENTAL_DIR, ttl: float = INCREMENTAL_DOC_TTL):
+        self.directory = directory
+        self.ttl = ttl
+        # doc_id -> [lock, number of threads holding or waiting for it]
+        self._locks: Dict[str, list] = {}
+        self._locks_lock = threading.Lock()
+        self._last_cleanup = 0.0
+
+    @contextmanager
+    def lock(self, doc_id: str):
+        """Hold the document's lock; the entry is dropped once nobody uses it."""
+        with self._locks_lock:
+            entry = self._locks.setdefault(doc_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[doc_id]
+
+    def path(self, doc_id: str) -> str:
+        # Document ids come from clients, so they are hashed into file names
+        return os.path.join(self.directory, hashlib.sha256(doc_id.encode('utf-8')).hexdigest() + '.json')
+
+    def load(self, doc_id: str) -> Optional[Dict]:
+        try:
+            with open(self.path(doc_id), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable document state for {doc_id}: {str(e)}")
+            return None
+
+    def save(self, record: Dict):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(record['doc_id'])
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        if time.time() - self._last_cleanup > self.CLEANUP_INTERVAL:
+            self.cleanup()
+
+    def cleanup(self, now: float = None) -> int:
+        """Delete documents last updated more than ``ttl`` seconds ago; returns how many."""
+        now = time.time() if now is None else now
+        self._last_cleanup = now
+        removed = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < now - self.ttl:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                pass
+        if removed:
+            logger.info(f"Removed {removed} expired documents from {self.directory}")
+        return removed
+
+    def delete(self, doc_id: str) -> bool:
+        try:
+            os.remove(self.path(doc_id))
+            return True
+        except FileNotFoundError:
+            return False
+
+
+class IncrementalTranslator:
+    """
+    Re-translates only the segments of a document that changed since its
+    last version, and splices them into the previous translation.
+    """
+
+    def __init__(self, ollama_wrapper, store: DocumentStore = None,
+                 context_chars: int = INCREMENTAL_CONTEXT_CHARS):
+        self.ollama_wrapper = ollama_wrapper
+        self.store = store or DocumentStore()
+        self.context_chars = context_chars
+
+    def pending_segments(self, doc_id: str, text: str, source_lang: str, target_lang: str,
+                         model: str = None) -> int:
+        """
+        Roughly how many segments ``update`` would send to the model: the
+        non-blank segments whose text is not in the stored version. A
+        ``source_lang`` of 'auto' matches any stored source language.
+        """
+        stored = self.store.load(doc_id)
+        known = set()
+        if stored and stored['target_lang'] == target_lang and stored['model'] == model \
+                and source_lang in ('auto', stored['source_lang']):
+            known = {segment for segment, _, _ in stored['segments']}
+        return sum(1 for segment, _ in split_segments(text) if segment.strip() and segment not in known)
+
+    def update(self, doc_id: str, text: str, source_lang: str, target_lang: str,
+               model: str = None) -> Dict:
+        with self.store.lock(doc_id):
+            stored = self.store.load(doc_id)
+            previous = stored
+            if stored and (stored['source_lang'], stored['target_lang'], stored['model']) \
+                    != (source_lang, target_lang, model):
+                # Stored translation is for another language pair or model
+                previous = None
+
+            old = previous['segments'] if previous else []
+            new = split_segments(text)
+            translations: List[Optional[str]] = [None] * len(new)
+
+            matcher = difflib.SequenceMatcher(None, [s[0] for s in old], [s[0] for s in new], autojunk=False)
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+                if tag == 'equal':
+                    for offset in range(i2 - i1):
+                        translations[j1 + offset] = old[i1 + offset][2]
+
+            changed = [j for j, (segment, _) in enumerate(new) if translations[j] is None]
+            for j in changed:
+                if not new[j][0].strip():
+                    translations[j] = new[j][0]
+            changed = [j for j in changed if translations[j] is None]
+
+            if changed:
+                workers = min(len(changed), OLLAMA_MAX_CONCURRENCY)
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="incremental") as pool:
+                    futures = {
+                        j: pool.submit(propagate(self.ollama_wrapper.translate_segment), new[j][0],
+                                       source_lang, target_lang, *self._context(new, j), model=model)
+                        for j in changed
+                    }
+                    for j, future in futures.items():
+                        translations[j] = future.result()
+
+            record = {
+                'doc_id': doc_id,
+                'source_lang': source_lang,
+                'target_lang': target_lang,
+                'model': model,
+                'version': (stored['version'] + 1) if stored else 1,
+                'updated_at': time.time(),
+                'segments': [[segment, separator, translation]
+                             for (segment, separator), translation in zip(new, translations)],
+            }
+            self.store.save(record)
+
+        logger.info(f"Document {doc_id} v{record['version']}: re-translated {len(changed)} of {len(new)} segments")
+        return {
+            'doc_id': doc_id,
+            'version': record['version'],
+            'translated_text': ''.join(translation + separator for _, separator, translation in record['segments']),
+            'segments_total': len(new),
+            'segments_translated': len(changed),
+        }
+
+    def _context(self, segments: List[Tuple[str, str]], index: int) -> Tuple[str, str]:
+        """Source text of the nearest non-blank neighbours, trimmed to ``context_chars``."""
+        before = next((s for s, _ in reversed(segments[:index]) if s.strip()), '')
+        after = next((s for s, _ in segments[index + 1:] if s.strip()), '')
+        return before[-self.context_chars:], after[:self.context_chars]
@@ -0,0 +1,241 @@
+import os
+import uuid
+import time
+import threading
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from .extract import detect_kind, iter_document_text, SUPPORTED_KINDS
+
+try:
+    from .config import INGEST_DIR, INGEST_BLOCK_SIZE, INGEST_MAX_BYTES
+except ImportError:
+    import tempfile
+    INGEST_DIR = os.path.join(tempfile.gettempdir(), "context-ingest")
+    INGEST_BLOCK_SIZE = 64 * 1024
+    INGEST_MAX_BYTES = 200 * 1024 * 1024
+
+try:
+    from .config import INGEST_JOB_TTL
+except ImportError:
+    INGEST_JOB_TTL = 24 * 3600
+
+try:
+    from .config import OLLAMA_MAX_CONCURRENCY as INGEST_WINDOW, DETECTION_SAMPLE_CHARS
+except ImportError:
+    INGEST_WINDOW = 8
+    DETECTION_SAMPLE_CHARS = 1000
+
+logger = logging.getLogger('context-backend')
+
+
+class UploadTooLarge(ValueError):
+    """Raised when an upload exceeds ``INGEST_MAX_BYTES``."""
+
+
+def spool_stream(stream, dest_path: str, max_bytes: int = INGEST_MAX_BYTES) -> int:
+    """
+    Copy a file-like stream to ``dest_path`` block by block.
+    Returns the number of bytes written.
+    """
+    written = 0
+    with open(dest_path, 'wb') as out:
+        while True:
+            block = stream.read(INGEST_BLOCK_SIZE)
+            if not block:
+                break
+            written += len(block)
+            if written > max_bytes:
+                raise UploadTooLarge(f"Upload exceeds the {max_bytes} byte limit")
+            out.write(block)
+    return written
+
+
+class IngestJob:
+    """A spooled document being translated chunk by chunk into a result file."""
+
+    def __init__(self, job_id: str, spool_path: str, result_path: str, kind: str,
+                 source_lang: str, target_lang: str, model: str = None):
+        self.id = job_id
+        self.spool_path = spool_path
+        self.result_path = result_path
+        self.kind = kind
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.model = model
+        self.status = 'queued'
+        self.error = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.chunks_done = 0
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def to_dict(self) -> Dict:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'kind': self.kind,
+            'source_lang': self.source_lang,
+            'target_lang': self.target_lang,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'chunks_done': self.chunks_done,
+            'error': self.error,
+        }
+
+    def _write(self, out, raw_chunk: str, future):
+        translated = future.result()
+        # Keep paragraph breaks where the source chunk ended a line
+        separator = '\n\n' if raw_chunk.rstrip(' \t').endswith('\n') else ' '
+        data = translated + separator
+        out.write(data)
+        out.flush()
+        self.bytes_out += len(data.encode('utf-8'))
+        self.chunks_done += 1
+
+    def run(self, ollama_wrapper, detect_language: Callable[[str], str] = None):
+        """Extract, chunk, translate and append to the result file with a bounded window of chunks in flight."""
+        self.status = 'running'
+        try:
+            for lang in (self.source_lang, self.target_lang):
+                if lang != 'auto' and lang not in ollama_wrapper.supported_languages:
+                    raise ValueError(f"Invalid language code: {lang}")
+
+            pieces = iter_document_text(self.spool_path, self.kind)
+            chunks = ollama_wrapper._iter_chunks(pieces)
+
+            if self.source_lang == 'auto':
+                first = next(chunks, None)
+                if first is None:
+                    chunks = iter(())
+                else:
+                    self.source_lang = detect_language(first[:DETECTION_SAMPLE_CHARS])
+                    logger.info(f"Ingest job {self.id}: detected source language {self.source_lang}")
+                    chunks = _prepend(first, chunks)
+
+            with open(self.result_path, 'w', encoding='utf-8') as out, \
+                    ThreadPoolExecutor(max_workers=INGEST_WINDOW, thread_name_prefix="ingest") as pool:
+                # Keep at most INGEST_WINDOW chunks in flight; the model's
+                # adaptive limiter decides how many actually run concurrently
+                window = deque()
+                for raw_chunk in chunks:
+                    chunk = raw_chunk.strip()
+                    if not chunk:
+                        continue
+                    window.append((raw_chunk, pool.submit(
+                        ollama_wrapper._cached_translate_chunk,
+                        chunk, self.source_lang, self.target_lang, self.model)))
+                    if len(window) >= INGEST_WINDOW:
+                        self._write(out, *window.popleft())
+                while window:
+                    self._write(out, *window.popleft())
+
+            self.status = 'done'
+        except Exception as e:
+            logger.error(f"Ingest job {self.id} failed: {str(e)}")
+            self.status = 'failed'
+            self.error = str(e)
+        finally:
+            self.finished_at = time.time()
+            try:
+                os.remove(self.spool_path)
+            except OSError:
+                pass
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+class IngestManager:
+    """Keeps track of ingest jobs and runs each one on a background thread."""
+
+    def __init__(self, work_dir: str = INGEST_DIR, job_ttl: float = INGEST_JOB_TTL):
+        self.work_dir = work_dir
+        self.job_ttl = job_ttl
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def create_job(self, stream, filename: str = None, content_type: str = None,
+                   source_lang: str = 'auto', target_lang: str = 'en', model: str = None,
+                   kind: str = None) -> IngestJob:
+        """Spool ``stream`` to disk and register a job for it (not started yet)."""
+        kind = kind or detect_kind(filename, content_type)
+        if kind not in SUPPORTED_KINDS:
+            raise ValueError(f"Unsupported document type: {kind}")
+        self.cleanup()
+
+        os.makedirs(self.work_dir, exist_ok=True)
+        job_id = uuid.uuid4().hex
+        spool_path = os.path.join(self.work_dir, f"{job_id}.upload")
+        result_path = os.path.join(self.work_dir, f"{job_id}.txt")
+
+        job = IngestJob(job_id, spool_path, result_path, kind, source_lang, target_lang, model)
+        try:
+            job.bytes_in = spool_stream(stream, spool_path)
+        except Exception:
+            try:
+                os.remove(spool_path)
+            except OSError:
+                pass
+            raise
+
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def start(self, job: IngestJob, ollama_wrapper, detect_language: Callable[[str], str] = None):
+        thread = threading.Thread(
+            target=job.run, args=(ollama_wrapper, detect_language),
+            name=f"ingest-{job.id[:8]}", daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cleanup(self, now: float = None) -> int:
+        """
+        Forget jobs that finished more than ``job_ttl`` seconds ago and delete
+        their files, plus files left in ``work_dir`` by earlier processes.
+        Returns the number of jobs removed.
+        """
+        now = time.time() if now is None else now
+        cutoff = now - self.job_ttl
+        with self._lock:
+            expired = [job for job in self._jobs.values()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job in expired:
+                del self._jobs[job.id]
+            active = {job.id for job in self._jobs.values()}
+
+        for job in expired:
+            for path in (job.spool_path, job.result_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        try:
+            entries = list(os.scandir(self.work_dir))
+        except FileNotFoundError:
+            entries = []
+        for entry in entries:
+            job_id = entry.name.split('.', 1)[0]
+            if job_id in active or not entry.is_file():
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+        if expired:
+            logger.info(f"Removed {len(expired)} expired ingest jobs")
+        return len(expired)
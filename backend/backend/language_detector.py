@@ -1,14 +1,43 @@
+import re
 import requests
 from langdetect import detect, DetectorFactory
 from typing import Optional, Dict
 
+from .cache import make_key
+from .structured import StructuredOutputError, language_schema, parse_object
+from .profiling import traced
+
+try:
+    from .config import STRUCTURED_OUTPUT, DETECTION_SAMPLE_CHARS, OLLAMA_KEEP_ALIVE, OLLAMA_URL
+except ImportError:
+    STRUCTURED_OUTPUT = True
+    DETECTION_SAMPLE_CHARS = 1000
+    OLLAMA_KEEP_ALIVE = "30m"
+    OLLAMA_URL = "http://localhost:11434"
+
+try:
+    from .config import OLLAMA_REQUEST_TIMEOUT
+except ImportError:
+    OLLAMA_REQUEST_TIMEOUT = 300
+
+try:
+    from .config import CACHE_TTL
+except ImportError:
+    CACHE_TTL = 7 * 24 * 3600
+
 # Set seed for consistent results
 DetectorFactory.seed = 0
 
 class LanguageDetector:
-    def __init__(self, model="gemma:latest", base_url="http://localhost:11434"):
+    def __init__(self, model="gemma:latest", base_url=OLLAMA_URL, structured=STRUCTURED_OUTPUT,
+                 cache=None, ollama=None):
         self.model = model
         self.base_url = base_url
+        self.structured = structured
+        # Optional shared cache (see cache.py) of detections by text sample
+        self.cache = cache
+        # Optional OllamaWrapper: detections then share its per-model concurrency limit
+        self.ollama = ollama
         self.supported_languages = {
             'en': 'English',
             'ru': 'Russian',
@@ -27,35 +56,78 @@ class LanguageDetector:
             'tr': 'Turkish',
         }
 
+    @traced('detect_language')
     def detect_language(self, text: str) -> str:
         """
         Detect the language of the given text using Ollama API.
         Returns the ISO 639-1 language code.
         """
-        prompt = "Detect the language of the following text and respond with only the ISO 639-1 language code: " + text
-        
-        response = requests.post(
-            f"{self.base_url}/api/generate",
-            json={
-                "model": self.model,
-                "prompt": prompt,
-                "stream": False
-            }
+        # The first paragraph or so is plenty to identify the language
+        sample = text[:DETECTION_SAMPLE_CHARS]
+        if self.cache is None:
+            return self._detect_sample(sample)
+        return self.cache.get_or_compute(
+            make_key('language', self.model, self.structured, sample),
+            lambda: self._detect_sample(sample),
+            CACHE_TTL,
         )
-        response.raise_for_status()
-        
-        # Extract the language code from the response
-        # The response might be in different formats, so we'll try to handle them
-        response_text = response.json()["response"].strip().lower()
-        
-        # Try to find a language code in the response
-        for lang_code in self.supported_languages:
-            if lang_code in response_text:
-                return lang_code
-        
+
+    def prime(self) -> str:
+        """
+        Run one detection past the cache, so the model is loaded into Ollama
+        even when the warm-up sample is already cached from a previous run.
+        """
+        return self._detect_sample("Hello, world.")
+
+    def _detect_sample(self, sample: str) -> str:
+        prompt = "Detect the language of the following text and respond with only the ISO 639-1 language code: " + sample
+
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": OLLAMA_KEEP_ALIVE,
+            "options": {"num_predict": 16, "temperature": 0}
+        }
+        if self.structured:
+            payload["format"] = language_schema(self.supported_languages)
+
+        if self.ollama is not None:
+            data = self.ollama.generate_request(payload)
+        else:
+            response = requests.post(f"{self.base_url}/api/generate", json=payload,
+                                     timeout=OLLAMA_REQUEST_TIMEOUT)
+            response.raise_for_status()
+            data = response.json()
+        response_text = data["response"].strip()
+
+        lang_code = self._parse_language(response_text)
+        if lang_code in self.supported_languages:
+            return lang_code
+
         # If no valid language code was found, raise an error
         raise ValueError(f"Invalid language code: {response_text}")
 
+    def _parse_language(self, response_text: str) -> Optional[str]:
+        """Extract a language code from the reply: the JSON field, or an exact code token."""
+        if self.structured:
+            try:
+                value = parse_object(response_text, "language")
+                return value.strip().lower() if isinstance(value, str) else None
+            except StructuredOutputError:
+                pass
+
+        reply = response_text.strip(' .\'"`').lower()
+        if reply in self.supported_languages:
+            return reply
+
+        # Free-text reply: match whole two-letter tokens only, so "en" is not
+        # found inside words such as "the language is Spanish"
+        for token in re.findall(r"\b[a-z]{2}\b", reply):
+            if token in self.supported_languages:
+                return token
+        return None
+
     def is_supported_language(self, lang_code: str) -> bool:
         """
         Check if the language code is supported.
@@ -1,8 +1,21 @@
 import requests
+import json
 import time
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
 import logging
 
+from .cache import make_key
+from .concurrency import AdaptiveLimiter
+from .profiling import span, traced, propagate
+from .segments import SegmentedTranslation
+from .tiering import TierPolicy, check_draft
+from .structured import (
+    TRANSLATION_SYSTEM_PROMPT, TRANSLATION_SCHEMA, StructuredOutputError,
+    batch_schema, output_budget, parse_object,
+)
+
 # Import chunk configuration constants
 try:
     from .config import CHUNK_SIZE, CHUNK_OVERLAP
@@ -11,12 +24,51 @@ except ImportError:
     CHUNK_SIZE = 1500
     CHUNK_OVERLAP = 100
 
+try:
+    from .config import OLLAMA_INITIAL_CONCURRENCY, OLLAMA_MAX_CONCURRENCY, OLLAMA_REQUEST_TIMEOUT
+except ImportError:
+    OLLAMA_INITIAL_CONCURRENCY = 2
+    OLLAMA_MAX_CONCURRENCY = 8
+    OLLAMA_REQUEST_TIMEOUT = 300
+
+try:
+    from .config import STRUCTURED_OUTPUT
+except ImportError:
+    STRUCTURED_OUTPUT = True
+
+try:
+    from .config import OLLAMA_KEEP_ALIVE, OLLAMA_URL
+except ImportError:
+    OLLAMA_KEEP_ALIVE = "30m"
+    OLLAMA_URL = "http://localhost:11434"
+
+try:
+    from .config import CACHE_TTL
+except ImportError:
+    CACHE_TTL = 7 * 24 * 3600
+
 logger = logging.getLogger('context-backend')
 
+class ChunkTranslation(NamedTuple):
+    """One finished (chunk, target language) job of a multi-target translation."""
+    target_lang: str
+    index: int
+    total: int
+    text: Optional[str] = None
+    error: Optional[str] = None
+
 class OllamaWrapper:
-    def __init__(self, model="gemma:latest", base_url="http://localhost:11434"):
+    def __init__(self, model="gemma:latest", base_url=OLLAMA_URL, structured=STRUCTURED_OUTPUT,
+                 cache=None, tiering: TierPolicy = None, usage=None):
         self.model = model
         self.base_url = base_url
+        self.structured = structured
+        # Optional shared cache (see cache.py) of translated chunks
+        self.cache = cache
+        # Which language pairs get a small-model draft first (see tiering.py)
+        self.tiering = tiering or TierPolicy()
+        # Optional prewarm.UsageLog counting requested chunks for replay
+        self.usage = usage
         self.supported_languages = {
             'en': 'English',
             'ru': 'Russian',
@@ -34,6 +86,8 @@ class OllamaWrapper:
             'hi': 'Hindi',
             'tr': 'Turkish',
         }
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._limiters_lock = threading.Lock()
 
     def translate(self, text: str, source_lang: str, target_lang: str, model: str = None) -> str:
         """
@@ -47,22 +101,243 @@ class OllamaWrapper:
         # Always perform chunked translation to preserve full text fidelity
         return self._translate_text(text, source_lang, target_lang, model)
 
+    def translate_many(self, text: str, source_lang: str, target_langs: Sequence[str],
+                       model: str = None) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Translate text into several languages, splitting it only once.
+        Returns ``(translations, errors)``, both keyed by target language.
+        """
+        parts: Dict[str, List[Optional[str]]] = {}
+        errors: Dict[str, str] = {}
+        for result in self.iter_translate_many(text, source_lang, target_langs, model):
+            if result.error is not None:
+                errors[result.target_lang] = result.error
+                continue
+            parts.setdefault(result.target_lang, [None] * result.total)[result.index] = result.text
+        translations = {
+            target: self._join_chunks(parts[target])
+            for target in target_langs if target in parts and target not in errors
+        }
+        return translations, errors
+
+    def iter_translate_many(self, text: str, source_lang: str, target_langs: Sequence[str],
+                            model: str = None) -> Iterator[ChunkTranslation]:
+        """
+        Yield chunk translations for every target language as they finish.
+
+        Jobs are queued chunk by chunk, each chunk for all targets in turn,
+        so every language progresses at the same rate. A target whose chunk
+        fails yields one result with ``error`` set, and its remaining jobs
+        are dropped.
+        """
+        if source_lang not in self.supported_languages:
+            raise ValueError(f"Invalid language code: {source_lang}")
+        for target_lang in target_langs:
+            if target_lang not in self.supported_languages:
+                raise ValueError(f"Invalid language code: {target_lang}")
+
+        chunks = self._split_text(text)
+        jobs = [(index, target_lang) for index in range(len(chunks)) for target_lang in target_langs]
+        failed = set()
+
+        workers = min(len(jobs), OLLAMA_MAX_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate") as pool:
+            futures = {
+                pool.submit(propagate(self._cached_translate_chunk), chunks[index], source_lang, target_lang, model):
+                    (index, target_lang)
+                for index, target_lang in jobs
+            }
+            try:
+                for future in as_completed(futures):
+                    index, target_lang = futures[future]
+                    if target_lang in failed or future.cancelled():
+                        continue
+                    try:
+                        yield ChunkTranslation(target_lang, index, len(chunks), future.result())
+                    except Exception as e:
+                        failed.add(target_lang)
+                        for other, (_, other_target) in futures.items():
+                            if other_target == target_lang:
+                                other.cancel()
+                        logger.error(f"Translation to {target_lang} failed on chunk {index}: {str(e)}")
+                        yield ChunkTranslation(target_lang, index, len(chunks), error=str(e))
+            finally:
+                # The consumer may stop early (e.g. a closed stream): drop queued jobs
+                for future in futures:
+                    future.cancel()
+
+    def translate_segment(self, segment: str, source_lang: str, target_lang: str,
+                          before: str = "", after: str = "", model: str = None) -> str:
+        """
+        Translate one segment of a longer document. The neighbouring source
+        text is shown to the model as context only, so an edited paragraph
+        reads consistently with the text around it.
+        """
+        if not before and not after:
+            return self._cached_translate_chunk(segment, source_lang, target_lang, model)
+
+        def translate():
+            context = ""
+            if before:
+                context += f"Preceding text (context only, do not translate):\n{before}\n\n"
+            if after:
+                context += f"Following text (context only, do not translate):\n{after}\n\n"
+            if not self.structured:
+                prompt = (
+                    f"Translate the text below from {source_lang} to {target_lang}. "
+                    f"Return only its translation, no explanations or additional text.\n\n"
+                    f"{context}Text to translate:\n{segment}"
+                )
+                data = self.generate_request({
+                    "model": model or self.model,
+                    "prompt": prompt,
+                    "stream": False,
+                    "options": {"num_predict": output_budget(segment)}
+                })
+                return data["response"].strip()
+
+            prompt = self._translation_prompt(source_lang, target_lang, f"{context}Text to translate:\n{segment}")
+            translation = self._structured_request(model, prompt, TRANSLATION_SCHEMA, segment, "translation")
+            if not isinstance(translation, str):
+                raise StructuredOutputError("Model reply 'translation' is not a string")
+            return translation.strip()
+
+        if self.cache is None:
+            return translate()
+        key = make_key('translation_in_context', model or self.model, self.structured,
+                       source_lang, target_lang, before, segment, after)
+        return self.cache.get_or_compute(key, translate, CACHE_TTL)
+
+    def translate_segments(self, text: str, source_lang: str, target_lang: str,
+                           model: str = None) -> SegmentedTranslation:
+        """
+        Translate text like ``translate``, but keep each chunk's source
+        offsets, translation and timing instead of joining them.
+        """
+        if source_lang not in self.supported_languages:
+            raise ValueError(f"Invalid language code: {source_lang}")
+        if target_lang not in self.supported_languages:
+            raise ValueError(f"Invalid language code: {target_lang}")
+
+        def translate(start: int, end: int) -> Tuple[str, float]:
+            started = time.perf_counter()
+            translation = self._cached_translate_chunk(text[start:end], source_lang, target_lang, model)
+            return translation, time.perf_counter() - started
+
+        spans = self._split_spans(text)
+        result = SegmentedTranslation(text, source_lang, target_lang, model or self.model)
+        workers = min(len(spans), OLLAMA_MAX_CONCURRENCY)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate") as pool:
+            futures = [pool.submit(propagate(translate), start, end) for start, end in spans]
+            for (start, end), future in zip(spans, futures):
+                translation, seconds = future.result()
+                result.append(start, end, translation, seconds)
+        return result
+
     def generate(self, prompt: str, model: str = None) -> str:
         """
         Generate a response to a prompt using the Ollama API.
         """
+        data = self.generate_request({
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {"num_predict": -1}
+        })
+        return data["response"].strip()
+
+    def generate_request(self, payload: Dict) -> Dict:
+        """
+        POST to /api/generate through the model's adaptive limiter and feed
+        the observed latency back into it. Returns the decoded response body.
+        Other components calling Ollama (language detection) use it too, so
+        every generation counts against the same per-model limit.
+        """
+        payload.setdefault("keep_alive", OLLAMA_KEEP_ALIVE)
+        limiter = self._limiter(payload["model"])
+        with span('ollama.queue', model=payload["model"]):
+            limiter.acquire()
+        try:
+            started = time.monotonic()
+            try:
+                with span('ollama.generate', model=payload["model"], prompt_chars=len(payload.get("prompt", ""))):
+                    response = requests.post(
+                        f"{self.base_url}/api/generate",
+                        json=payload,
+                        timeout=OLLAMA_REQUEST_TIMEOUT
+                    )
+                    response.raise_for_status()
+                with span('ollama.decode_json'):
+                    data = response.json()
+            except Exception:
+                limiter.on_error()
+                raise
+            latency = time.monotonic() - started
+
+            # Ollama reports durations in nanoseconds
+            limiter.on_success(
+                latency,
+                eval_duration=_seconds(data.get("eval_duration")),
+                eval_count=data.get("eval_count"),
+            )
+            return data
+        finally:
+            limiter.release()
+
+    def translate_batch(self, texts: List[str], source_lang: str, target_lang: str,
+                        model: str = None) -> List[str]:
+        """
+        Translate several short texts, packing as many as fit in one chunk into
+        a single structured request. Output order and count match ``texts``.
+        """
+        if source_lang not in self.supported_languages:
+            raise ValueError(f"Invalid language code: {source_lang}")
+        if target_lang not in self.supported_languages:
+            raise ValueError(f"Invalid language code: {target_lang}")
+
+        results: List[Optional[str]] = [None] * len(texts)
+        keys = None
+        if self.cache is not None:
+            keys = [self._translation_key(text, source_lang, target_lang, model) for text in texts]
+            results = [self.cache.get(key) for key in keys]
+
+        # Only texts missing from the cache are packed and sent to the model
+        pending = [i for i, result in enumerate(results) if result is None]
+        done = 0
+        for batch in self._pack([texts[i] for i in pending]):
+            translations = self._translate_packed(batch, source_lang, target_lang, model)
+            for i, translation in zip(pending[done:done + len(batch)], translations):
+                results[i] = translation
+                if keys is not None:
+                    self.cache.set(keys[i], translation, CACHE_TTL)
+            done += len(batch)
+        return results
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Current adaptive concurrency state per model."""
+        with self._limiters_lock:
+            limiters = dict(self._limiters)
+        return {model: limiter.snapshot() for model, limiter in limiters.items()}
+
+    def preload_model(self, model: str = None):
+        """
+        Load a model into Ollama's memory without generating anything, and
+        keep it resident for OLLAMA_KEEP_ALIVE.
+        """
         response = requests.post(
             f"{self.base_url}/api/generate",
-            json={
-                "model": model or self.model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {"num_predict": -1}
-            }
+            json={"model": model or self.model, "keep_alive": OLLAMA_KEEP_ALIVE},
+            timeout=OLLAMA_REQUEST_TIMEOUT
         )
         response.raise_for_status()
-        
-        return response.json()["response"].strip()
+
+    def prime(self, model: str = None) -> str:
+        """
+        Send one small translation so the shared system-prompt prefix is
+        evaluated and cached before real traffic arrives. It goes to ``model``
+        itself, bypassing tiering and the translation cache.
+        """
+        return self._translate_direct("Hello.", "en", "es", model)
 
     def check_model_availability(self) -> bool:
         """
@@ -78,74 +353,247 @@ class OllamaWrapper:
 
     # ---------------------- Internal helpers ---------------------- #
 
+    def _limiter(self, model: str) -> AdaptiveLimiter:
+        with self._limiters_lock:
+            limiter = self._limiters.get(model)
+            if limiter is None:
+                limiter = AdaptiveLimiter(
+                    model,
+                    initial_limit=OLLAMA_INITIAL_CONCURRENCY,
+                    max_limit=OLLAMA_MAX_CONCURRENCY,
+                )
+                self._limiters[model] = limiter
+            return limiter
+
+    def _find_chunk_end(self, text: str, pos: int) -> int:
+        """Return the end offset of the chunk starting at ``pos``, preferring a sentence boundary."""
+        text_len = len(text)
+        end_pos = min(pos + CHUNK_SIZE, text_len)
+
+        # Try to find sentence boundary going backwards up to CHUNK_OVERLAP
+        if end_pos < text_len:
+            for i in range(end_pos, max(pos, end_pos - CHUNK_OVERLAP), -1):
+                if text[i - 1] in '.!?\n':
+                    return i
+            # As fallback look forward until next boundary within overlap
+            for i in range(end_pos, min(text_len, end_pos + CHUNK_OVERLAP)):
+                if text[i - 1] in '.!?\n':
+                    return i
+
+        return end_pos
+
+    @traced('split_text')
     def _split_text(self, text: str) -> List[str]:
         """Split a long text into manageable chunks preserving sentence boundaries."""
+        return [text[start:end] for start, end in self._split_spans(text)]
+
+    def _split_spans(self, text: str) -> List[Tuple[int, int]]:
+        """``(start, end)`` source offsets of the chunks ``_split_text`` returns."""
         if len(text) <= CHUNK_SIZE:
-            return [text]
+            return [(0, len(text))]
 
-        chunks = []
+        spans = []
         pos = 0
         text_len = len(text)
 
         while pos < text_len:
-            end_pos = min(pos + CHUNK_SIZE, text_len)
-
-            # Try to find sentence boundary going backwards up to CHUNK_OVERLAP
-            if end_pos < text_len:
-                boundary_found = False
-                for i in range(end_pos, max(pos, end_pos - CHUNK_OVERLAP), -1):
-                    if text[i - 1] in '.!?\n':
-                        end_pos = i
-                        boundary_found = True
-                        break
-                if not boundary_found:
-                    # As fallback look forward until next boundary within overlap
-                    for i in range(end_pos, min(text_len, end_pos + CHUNK_OVERLAP)):
-                        if text[i - 1] in '.!?\n':
-                            end_pos = i
-                            break
-
-            chunk = text[pos:end_pos].strip()
-            chunks.append(chunk)
+            end_pos = self._find_chunk_end(text, pos)
+            # Offsets of the chunk without its surrounding whitespace
+            start, end = pos, end_pos
+            while start < end and text[start].isspace():
+                start += 1
+            while end > start and text[end - 1].isspace():
+                end -= 1
+            spans.append((start, end))
             pos = end_pos
 
         # Debug: log chunk sizes
         try:
-            logger.debug(f"Chunking complete: {len(chunks)} chunks, sizes: {[len(c) for c in chunks]}")
+            logger.debug(f"Chunking complete: {len(spans)} chunks, sizes: {[e - s for s, e in spans]}")
         except Exception:
             pass
 
-        return chunks
+        return spans
 
-    def _translate_text(self, text: str, source_lang: str, target_lang: str, model: str = None) -> str:
-        """Translate text that may be split into chunks and reassemble the result."""
-        # Split into chunks if necessary
-        chunks = self._split_text(text)
+    def _iter_chunks(self, pieces: Iterable[str]) -> Iterator[str]:
+        """
+        Chunk a stream of text pieces without materialising the whole text.
+
+        Uses the same boundary rules as ``_split_text`` but only ever buffers
+        about one chunk plus the look-ahead window. Chunks are yielded raw
+        (not stripped) so callers can tell whether a chunk ended a line.
+        """
+        window = CHUNK_SIZE + CHUNK_OVERLAP
+        buffer = ""
+
+        for piece in pieces:
+            if not piece:
+                continue
+            buffer += piece
+            # Only cut once the look-ahead window is fully buffered so the
+            # boundary search sees exactly what it would in the full text.
+            while len(buffer) > window:
+                end_pos = self._find_chunk_end(buffer, 0)
+                yield buffer[:end_pos]
+                buffer = buffer[end_pos:]
+
+        pos = 0
+        while pos < len(buffer):
+            end_pos = self._find_chunk_end(buffer, pos)
+            yield buffer[pos:end_pos]
+            pos = end_pos
+
+    def _translate_chunk(self, chunk: str, source_lang: str, target_lang: str, model: str = None) -> str:
+        """
+        Translate a single chunk. For language pairs with tiering enabled the
+        draft model goes first, and the chunk is only sent to ``model`` when
+        the draft fails the local quality checks.
+        """
+        model = model or self.model
+        plan = self.tiering.plan(source_lang, target_lang, model)
+        if plan is None:
+            return self._translate_direct(chunk, source_lang, target_lang, model)
+
+        try:
+            draft = self._translate_direct(chunk, source_lang, target_lang, plan['draft_model'])
+            reason = check_draft(chunk, draft, source_lang, target_lang, plan['length_ratio'])
+        except Exception as e:
+            logger.warning(f"Draft model {plan['draft_model']} failed: {str(e)}")
+            reason = 'error'
+        self.tiering.record(source_lang, target_lang, reason)
+        if reason is None:
+            return draft
 
-        translated_chunks: List[str] = []
+        logger.info(f"Escalating {source_lang}-{target_lang} chunk to {model} ({reason})")
+        with span('translate.escalate', reason=reason):
+            return self._translate_direct(chunk, source_lang, target_lang, model)
 
-        for idx, chunk in enumerate(chunks):
+    def _translate_direct(self, chunk: str, source_lang: str, target_lang: str, model: str = None) -> str:
+        """Translate a single chunk with one Ollama call."""
+        if not self.structured:
             prompt = (
                 f"Translate this text from {source_lang} to {target_lang}. "
                 f"Return only the translation, no explanations or additional text: {chunk}"
             )
+            data = self.generate_request({
+                "model": model or self.model,
+                "prompt": prompt,
+                "stream": False,
+                "options": {"num_predict": output_budget(chunk)}
+            })
+            return data["response"].strip()
 
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": model or self.model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {"num_predict": -1}
-                }
-            )
-            response.raise_for_status()
-            translated_chunk = response.json()["response"].strip()
-            translated_chunks.append(translated_chunk)
+        prompt = self._translation_prompt(source_lang, target_lang, chunk)
+        translation = self._structured_request(model, prompt, TRANSLATION_SCHEMA, chunk, "translation")
+        if not isinstance(translation, str):
+            raise StructuredOutputError("Model reply 'translation' is not a string")
+        return translation.strip()
+
+    def _translation_key(self, chunk: str, source_lang: str, target_lang: str, model: str = None) -> str:
+        return make_key('translation', model or self.model, self.structured, source_lang, target_lang, chunk)
 
-            # Small sleep to avoid overwhelming the API
-            if len(chunks) > 1:
-                time.sleep(0.2)
+    def _cached_translate_chunk(self, chunk: str, source_lang: str, target_lang: str, model: str = None) -> str:
+        """``_translate_chunk`` through the shared cache, when one is configured."""
+        if self.cache is None:
+            return self._translate_chunk(chunk, source_lang, target_lang, model)
+        key = self._translation_key(chunk, source_lang, target_lang, model)
+        if self.usage is not None:
+            self.usage.record('translation', key, {
+                'text': chunk, 'source_lang': source_lang, 'target_lang': target_lang, 'model': model,
+            })
+        return self.cache.get_or_compute(
+            key, lambda: self._translate_chunk(chunk, source_lang, target_lang, model), CACHE_TTL)
 
+    def _translation_prompt(self, source_lang: str, target_lang: str, body: str) -> str:
+        source = self.supported_languages.get(source_lang, source_lang)
+        target = self.supported_languages.get(target_lang, target_lang)
+        return f"Translate from {source} to {target}.\n\n{body}"
+
+    def _structured_request(self, model: str, prompt: str, schema: Dict, source_text: str, key: str):
+        """
+        Run a schema-constrained generation and return ``key`` from the parsed
+        reply. A reply cut off by the output budget is retried once with twice
+        the budget; anything else that fails to parse raises.
+        """
+        budget = output_budget(source_text)
+        for attempt in range(2):
+            data = self.generate_request({
+                "model": model or self.model,
+                "system": TRANSLATION_SYSTEM_PROMPT,
+                "prompt": prompt,
+                "format": schema,
+                "stream": False,
+                "options": {"num_predict": budget, "temperature": 0}
+            })
+            try:
+                return parse_object(data["response"], key)
+            except StructuredOutputError:
+                if attempt == 0 and data.get("done_reason") == "length":
+                    logger.warning(f"Structured reply hit num_predict={budget}, retrying with a larger budget")
+                    budget *= 2
+                    continue
+                raise
+
+    def _pack(self, texts: List[str]) -> Iterator[List[str]]:
+        """Group consecutive texts into batches of at most CHUNK_SIZE characters."""
+        batch: List[str] = []
+        size = 0
+        for text in texts:
+            if batch and size + len(text) > CHUNK_SIZE:
+                yield batch
+                batch, size = [], 0
+            batch.append(text)
+            size += len(text)
+        if batch:
+            yield batch
+
+    def _translate_packed(self, batch: List[str], source_lang: str, target_lang: str,
+                          model: str = None) -> List[str]:
+        """Translate one packed batch, falling back to per-item calls if alignment breaks."""
+        if len(batch) == 1 or not self.structured:
+            return [self._translate_chunk(text, source_lang, target_lang, model) if text.strip() else text
+                    for text in batch]
+
+        body = json.dumps({"texts": batch}, ensure_ascii=False)
+        prompt = self._translation_prompt(
+            source_lang, target_lang,
+            f"Translate each string of \"texts\" separately and return them in the same order.\n{body}"
+        )
+        try:
+            translations = self._structured_request(
+                model, prompt, batch_schema(len(batch)), "".join(batch), "translations")
+        except StructuredOutputError as e:
+            logger.warning(f"Packed batch failed ({str(e)}), translating items one by one")
+            translations = None
+        if (not isinstance(translations, list) or len(translations) != len(batch)
+                or not all(isinstance(t, str) for t in translations)):
+            return [self._translate_chunk(text, source_lang, target_lang, model) if text.strip() else text
+                    for text in batch]
+        return [t.strip() for t in translations]
+
+    def _translate_text(self, text: str, source_lang: str, target_lang: str, model: str = None) -> str:
+        """Translate text that may be split into chunks and reassemble the result."""
+        # Split into chunks if necessary
+        chunks = self._split_text(text)
+
+        if len(chunks) == 1:
+            translated_chunks = [self._cached_translate_chunk(chunks[0], source_lang, target_lang, model)]
+        else:
+            # The per-model limiter decides how many of these actually run at once
+            workers = min(len(chunks), OLLAMA_MAX_CONCURRENCY)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="translate") as pool:
+                futures = [
+                    pool.submit(propagate(self._cached_translate_chunk), chunk, source_lang, target_lang, model)
+                    for chunk in chunks
+                ]
+                translated_chunks: List[str] = [future.result() for future in futures]
+
+        return self._join_chunks(translated_chunks)
+
+    def _join_chunks(self, translated_chunks: List[str]) -> str:
         # Reassemble, ensure proper spacing
-        return " ".join(translated_chunks).replace("  ", " ").strip() 
\ No newline at end of file
+        return " ".join(translated_chunks).replace("  ", " ").strip()
+
+
+def _seconds(nanoseconds) -> float:
+    return nanoseconds / 1e9 if nanoseconds else None
@@ -1,13 +1,26 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import requests
-from bs4 import BeautifulSoup
-from newspaper import Article
 from urllib.parse import urlparse
 import re
 import sys
-from readability import Document
+
+# BeautifulSoup, Newspaper3k and Readability are imported inside the
+# functions that use them: they are slow to import and the backend only
+# needs Readability on the request path.
+
+try:
+    from .fetch import fetch_html
+    from .extract import HTMLTextExtractor
+    from .profiling import traced
+except ImportError:
+    # Running as a standalone script
+    from fetch import fetch_html
+    from extract import HTMLTextExtractor
+    from profiling import traced
+
+class ExtractionError(Exception):
+    """A parsing method could not extract content from the page."""
 
 def get_url_from_user():
     """Get URL from user input or stdin."""
@@ -45,11 +58,11 @@ def is_valid_url(url):
 
 def method1_bs4(url):
     """Parse main content from URL using BeautifulSoup."""
+    from bs4 import BeautifulSoup
+
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+        html, _ = fetch_html(url)
+        soup = BeautifulSoup(html, 'html.parser')
         
         # Удаляем ненужные элементы
         for tag in soup.find_all(['script', 'style', 'nav', 'header', 'footer', 'aside']):
@@ -82,10 +95,12 @@ def method1_bs4(url):
         
         return article_content.strip()
     except Exception as e:
-        return f"Error in method 1: {str(e)}"
+        raise ExtractionError(f"Method 1 failed: {str(e)}") from e
 
 def method2_newspaper(url):
     """Parse main content from URL using Newspaper3k."""
+    from newspaper import Article
+
     try:
         article = Article(url)
         article.download()
@@ -96,38 +111,43 @@ def method2_newspaper(url):
         else:
             return ""
     except Exception as e:
-        return f"Error in method 2: {str(e)}"
+        raise ExtractionError(f"Method 2 failed: {str(e)}") from e
+
+@traced('readability')
+def readability_text(html):
+    """Extract the main article text from an HTML string using Readability."""
+    from readability import Document
+
+    content = Document(html).summary(html_partial=True)
+
+    # Strip tags with a streaming parser rather than building a second DOM
+    extractor = HTMLTextExtractor()
+    extractor.feed(content)
+    extractor.close()
+    clean_text = extractor.pop_text()
+
+    # Normalize whitespace
+    clean_text = re.sub(r'[ \t]*\n\s*', '\n\n', clean_text)
+    clean_text = re.sub(r' +', ' ', clean_text)
+
+    return clean_text.strip()
 
 def method3_readability(url):
     """Parse main content from URL using Readability."""
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        doc = Document(response.text)
-        content = doc.summary()
-        
-        # Очистка от HTML тегов
-        soup = BeautifulSoup(content, 'html.parser')
-        clean_text = soup.get_text()
-        
-        # Normalize whitespace
-        clean_text = re.sub(r'\n+', '\n\n', clean_text)
-        clean_text = re.sub(r' +', ' ', clean_text)
-        
-        return clean_text.strip()
+        html, _ = fetch_html(url)
+        return readability_text(html)
     except Exception as e:
-        return f"Error in method 3: {str(e)}"
+        raise ExtractionError(f"Method 3 failed: {str(e)}") from e
 
 def method4_direct_extraction(url):
     """Direct extraction of text from all elements."""
+    from bs4 import BeautifulSoup
+
     try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
+        html, _ = fetch_html(url)
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(html, 'html.parser')
         
         # Удаляем ненужные элементы
         for tag in soup.find_all(['script', 'style', 'nav', 'footer', 'aside']):
@@ -142,34 +162,35 @@ def method4_direct_extraction(url):
         
         return clean_text.strip()
     except Exception as e:
-        return f"Error in method 4: {str(e)}"
+        raise ExtractionError(f"Method 4 failed: {str(e)}") from e
 
 def compare_methods(url):
     """Compare different parsing methods and select the best result."""
-    method1_result = method1_bs4(url)
-    method2_result = method2_newspaper(url)
-    method3_result = method3_readability(url)
-    method4_result = method4_direct_extraction(url)
-    
-    results = [method1_result, method2_result, method3_result, method4_result]
+    results = []
+    for method in (method1_bs4, method2_newspaper, method3_readability, method4_direct_extraction):
+        try:
+            results.append(method(url))
+        except ExtractionError as e:
+            log_error(str(e))
     best_result = ""
     best_length = 0
     
     for result in results:
-        # Skip results with errors or too short
-        if result.startswith("Error") or len(result) < 100:
+        # Skip results that are too short
+        if len(result) < 100:
             continue
             
         if len(result) > best_length:
             best_length = len(result)
             best_result = result
     
-    # If all methods failed, return the longest result
-    if not best_result:
+    # If no result is long enough, return the longest one
+    if not best_result and results:
         best_result = max(results, key=len)
     
     return best_result
 
+@traced('clean_text')
 def clean_text(text):
     """Additional text cleaning from unwanted elements."""
     # Normalize whitespace
@@ -220,16 +241,8 @@ def main():
         
         # Try Readability method first for best results
         try:
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-            response = requests.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            doc = Document(response.text)
-            content = doc.summary()
-            
-            # Extract text from HTML
-            soup = BeautifulSoup(content, 'html.parser')
-            article_text = soup.get_text()
+            html, _ = fetch_html(url)
+            article_text = readability_text(html)
             
             # Clean the extracted text
             clean_article = clean_text(article_text)
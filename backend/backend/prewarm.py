@@ -0,0 +1,317 @@
+import contextvars
+import json
+import os
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: the packaged app runs a single process
+    fcntl = None
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    from .config import (
+        PREWARM_FILE, PREWARM_MAX_ENTRIES, PREWARM_TOP_N, PREWARM_MIN_HITS, PREWARM_MAX_AGE,
+        PREWARM_IDLE_SECONDS, PREWARM_INTERVAL, PREWARM_MAX_SECONDS, PREWARM_CPU_SHARE,
+        PREWARM_OLLAMA_CALLS,
+    )
+except ImportError:
+    import tempfile
+    PREWARM_FILE = os.path.join(tempfile.gettempdir(), "context-prewarm", "usage.json")
+    PREWARM_MAX_ENTRIES = 5000
+    PREWARM_TOP_N = 200
+    PREWARM_MIN_HITS = 2
+    PREWARM_MAX_AGE = 7 * 24 * 3600
+    PREWARM_IDLE_SECONDS = 300
+    PREWARM_INTERVAL = 1800
+    PREWARM_MAX_SECONDS = 600
+    PREWARM_CPU_SHARE = 0.5
+    PREWARM_OLLAMA_CALLS = 100
+
+logger = logging.getLogger('context-backend')
+
+# Set while the prewarmer replays, so its own work is not counted as traffic
+_replaying = contextvars.ContextVar('prewarm_replaying', default=False)
+
+
+def anonymize_url(url: str) -> Optional[str]:
+    """The URL without credentials or fragment, or None if it should not be kept."""
+    parts = urlsplit(url)
+    if parts.username or parts.password:
+        return None
+    host = parts.hostname or ''
+    if parts.port is not None:
+        host = f'{host}:{parts.port}'
+    return urlunsplit((parts.scheme, host, parts.path, parts.query, ''))
+
+
+class UsageLog:
+    """
+    Hit counts per cache key, and the input needed to rebuild each entry.
+    Keys are the cache's own hashes; nothing about the client is recorded.
+
+    The inputs include the requested texts, so the log is written with mode
+    0600 into a directory only the server's user can open, and entries not
+    requested for ``max_age`` seconds are dropped when it is saved.
+
+    Several worker processes can share one file: ``save`` merges the hits
+    recorded since the last save into the file under a lock, and takes over
+    what the other workers have written.
+    """
+
+    # Seconds between saves when there are no new hits, to drop expired entries
+    REWRITE_INTERVAL = 3600
+
+    def __init__(self, path: str = PREWARM_FILE, max_entries: int = PREWARM_MAX_ENTRIES,
+                 max_age: float = PREWARM_MAX_AGE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries: Dict[str, Dict] = {}
+        # Hits per key recorded since the last save, not yet in the file
+        self._new_hits: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    def record(self, kind: str, key: str, payload: Dict):
+        if _replaying.get():
+            return
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {'kind': kind, 'hits': 0, 'payload': payload}
+            entry['hits'] += 1
+            entry['last_seen'] = now
+            self._new_hits[key] = self._new_hits.get(key, 0) + 1
+            if len(self._entries) > self.max_entries:
+                _prune(self._entries)
+
+    def top(self, n: int = PREWARM_TOP_N, min_hits: int = PREWARM_MIN_HITS,
+            max_age: float = PREWARM_MAX_AGE) -> List[Dict]:
+        """The ``n`` most requested entries seen within ``max_age`` seconds."""
+        cutoff = time.time() - max_age
+        with self._lock:
+            entries = [dict(entry, key=key) for key, entry in self._entries.items()
+                       if entry['hits'] >= min_hits and entry['last_seen'] >= cutoff]
+        entries.sort(key=lambda entry: (-entry['hits'], -entry['last_seen']))
+        return entries[:n]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            kinds: Dict[str, int] = {}
+            for entry in self._entries.values():
+                kinds[entry['kind']] = kinds.get(entry['kind'], 0) + 1
+            return {'entries': len(self._entries), 'kinds': kinds}
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable prewarm log {self.path}: {str(e)}")
+            return {}
+
+    def load(self):
+        entries = self._read()
+        with self._lock:
+            self._entries.update(entries)
+
+    def save(self):
+        now = time.time()
+        with self._lock:
+            if not self._new_hits and now - self._last_save < self.REWRITE_INTERVAL:
+                return
+            new_hits, self._new_hits = self._new_hits, {}
+            new_entries = {key: dict(self._entries[key]) for key in new_hits if key in self._entries}
+        directory = os.path.dirname(self.path)
+        if directory:
+            _make_private_dir(directory)
+
+        with _file_lock(f"{self.path}.lock"):
+            entries = self._read()
+            for key, entry in new_entries.items():
+                _merge(entries, key, entry, new_hits[key])
+            cutoff = now - self.max_age
+            entries = {key: entry for key, entry in entries.items() if entry['last_seen'] >= cutoff}
+            while len(entries) > self.max_entries:
+                _prune(entries)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with open(fd, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+        with self._lock:
+            # Hits recorded while the file was written stay pending for the next save
+            for key, hits in self._new_hits.items():
+                if key in self._entries:
+                    _merge(entries, key, dict(self._entries[key]), hits)
+            self._entries = entries
+            self._last_save = now
+
+
+def _merge(entries: Dict[str, Dict], key: str, entry: Dict, hits: int):
+    """Add ``hits`` new hits of ``entry`` to ``entries``, keeping the latest ``last_seen``."""
+    current = entries.get(key)
+    if current is None:
+        entries[key] = dict(entry, hits=hits)
+        return
+    current['hits'] += hits
+    current['last_seen'] = max(current['last_seen'], entry['last_seen'])
+
+
+def _prune(entries: Dict[str, Dict]):
+    # Drop the least used quarter, oldest first among equal counts
+    ranked = sorted(entries.items(), key=lambda item: (item[1]['hits'], item[1]['last_seen']))
+    for key, _ in ranked[:max(1, len(ranked) // 4)]:
+        del entries[key]
+
+
+@contextmanager
+def _file_lock(path: str):
+    """Hold an exclusive lock on ``path`` across processes, where the OS supports it."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _make_private_dir(directory: str):
+    """Create ``directory`` with mode 0700, or check an existing one belongs to this user."""
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not hasattr(os, 'getuid'):
+        return
+    info = os.stat(directory)
+    if info.st_uid != os.getuid():
+        raise PermissionError(f"{directory} belongs to another user")
+    if info.st_mode & 0o077:
+        os.chmod(directory, 0o700)
+
+
+class Prewarmer:
+    """
+    Replays the most requested entries of a ``UsageLog`` while the server is
+    idle, so caches are filled before the next peak instead of during it.
+
+    ``handlers`` map an entry kind to ``fn(key, payload) -> bool``, which
+    rebuilds the entry and returns whether it did any work (False when it was
+    still cached). A cycle stops when the server gets busy, after
+    ``max_seconds``, or once ``ollama_calls`` model calls are spent, and it
+    sleeps between entries so it uses at most ``cpu_share`` of the time.
+    """
+
+    # Kinds whose handlers call Ollama
+    OLLAMA_KINDS = ('translation',)
+
+    def __init__(self, usage: UsageLog, handlers: Dict[str, Callable[[str, Dict], bool]],
+                 is_idle: Callable[[], bool], top_n: int = PREWARM_TOP_N,
+                 idle_seconds: float = PREWARM_IDLE_SECONDS, interval: float = PREWARM_INTERVAL,
+                 max_seconds: float = PREWARM_MAX_SECONDS, cpu_share: float = PREWARM_CPU_SHARE,
+                 ollama_calls: int = PREWARM_OLLAMA_CALLS):
+        self.usage = usage
+        self.handlers = handlers
+        self.is_idle = is_idle
+        self.top_n = top_n
+        self.idle_seconds = idle_seconds
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.cpu_share = cpu_share
+        self.ollama_calls = ollama_calls
+        self.last_activity = time.monotonic()
+        self.last_run: Dict = {}
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def touch(self):
+        """Note a client request; cycles only start after ``idle_seconds`` without one."""
+        self.last_activity = time.monotonic()
+
+    def _busy(self) -> bool:
+        return time.monotonic() - self.last_activity < self.idle_seconds or not self.is_idle()
+
+    def run_once(self, force: bool = False) -> Dict:
+        """
+        Replay the top entries once. Without ``force`` the cycle is skipped
+        while the server is busy and ends as soon as it gets busy.
+        """
+        if not self._run_lock.acquire(blocking=False):
+            return {'status': 'running'}
+        token = _replaying.set(True)
+        started = time.monotonic()
+        report = {'started_at': time.time(), 'refreshed': 0, 'fresh': 0, 'failed': 0,
+                  'ollama_calls': 0, 'stopped': None}
+        try:
+            for entry in self.usage.top(self.top_n):
+                if not force and self._busy():
+                    report['stopped'] = 'busy'
+                    break
+                if time.monotonic() - started >= self.max_seconds:
+                    report['stopped'] = 'time_budget'
+                    break
+                handler = self.handlers.get(entry['kind'])
+                if handler is None:
+                    continue
+                uses_ollama = entry['kind'] in self.OLLAMA_KINDS
+                if uses_ollama and report['ollama_calls'] >= self.ollama_calls:
+                    continue
+
+                job_started = time.monotonic()
+                try:
+                    worked = handler(entry['key'], entry['payload'])
+                except Exception as e:
+                    report['failed'] += 1
+                    logger.warning(f"Prewarm of a {entry['kind']} entry failed: {str(e)}")
+                    continue
+                if not worked:
+                    report['fresh'] += 1
+                    continue
+                report['refreshed'] += 1
+                if uses_ollama:
+                    report['ollama_calls'] += 1
+                # Stay within the CPU share: idle for as long as the work took, scaled
+                elapsed = time.monotonic() - job_started
+                if 0 < self.cpu_share < 1:
+                    self._stop.wait(elapsed * (1 - self.cpu_share) / self.cpu_share)
+            report['seconds'] = round(time.monotonic() - started, 3)
+            self.last_run = report
+            logger.info(f"Prewarm refreshed {report['refreshed']} entries "
+                        f"({report['fresh']} still cached, {report['failed']} failed) in {report['seconds']}s")
+            return report
+        finally:
+            _replaying.reset(token)
+            self._run_lock.release()
+
+    def _loop(self):
+        next_run = time.monotonic() + self.interval
+        while not self._stop.wait(min(60, self.interval)):
+            try:
+                self.usage.save()
+            except OSError as e:
+                logger.error(f"Error saving prewarm log: {str(e)}")
+            if time.monotonic() >= next_run and not self._busy():
+                self.run_once()
+                next_run = time.monotonic() + self.interval
+
+    def start(self) -> threading.Thread:
+        """Replay every ``interval`` seconds, whenever the server is idle, on a daemon thread."""
+        thread = threading.Thread(target=self._loop, name='prewarm', daemon=True)
+        thread.start()
+        return thread
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self) -> Dict:
+        return {'usage': self.usage.stats(), 'last_run': self.last_run}
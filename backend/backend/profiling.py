@@ -0,0 +1,177 @@
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import uuid
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+try:
+    from .config import PROFILE_DIR, PROFILE_MAX_FILES, PROFILE_MAX_AGE
+except ImportError:
+    import tempfile
+    PROFILE_DIR = os.path.join(tempfile.gettempdir(), "context-profiles")
+    PROFILE_MAX_FILES = 200
+    PROFILE_MAX_AGE = 7 * 24 * 3600
+
+logger = logging.getLogger('context-backend')
+
+_current: contextvars.ContextVar = contextvars.ContextVar('context_profile', default=None)
+
+
+class Profile:
+    """Spans recorded for one request, exportable as a Chrome trace."""
+
+    def __init__(self, name: str, mode: str = 'spans'):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.wall_started = time.time()
+        self.events: List[Dict] = []
+        self.summary: Optional[str] = None
+        self._lock = threading.Lock()
+        self._profiler: Optional[cProfile.Profile] = None
+
+    def add_span(self, name: str, start: float, end: float, args: Dict = None):
+        event = {
+            'name': name,
+            'ph': 'X',
+            'ts': round((start - self.started) * 1e6, 1),
+            'dur': round((end - start) * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args or {},
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def start_cprofile(self):
+        """Deterministic profiling of the request thread (worker threads only show up as spans)."""
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def stop_cprofile(self, top: int = 40):
+        if self._profiler is None:
+            return
+        self._profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(top)
+        self.summary = out.getvalue()
+        self._profiler = None
+
+    def to_chrome_trace(self) -> Dict:
+        with self._lock:
+            events = list(self.events)
+        thread_names = {
+            t.ident: t.name for t in threading.enumerate() if t.ident in {e['tid'] for e in events}
+        }
+        metadata = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+            for tid, name in thread_names.items()
+        ]
+        trace = {
+            'traceEvents': metadata + sorted(events, key=lambda e: e['ts']),
+            'displayTimeUnit': 'ms',
+            'otherData': {'name': self.name, 'mode': self.mode, 'started_at': self.wall_started},
+        }
+        if self.summary:
+            trace['otherData']['cprofile'] = self.summary
+        return trace
+
+
+def current_profile() -> Optional[Profile]:
+    return _current.get()
+
+
+def activate(profile: Profile):
+    """Make ``profile`` current for this context; returns a token for ``deactivate``."""
+    return _current.set(profile)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **args):
+    """Record a span on the active profile; a no-op when profiling is off."""
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_span(name, start, time.perf_counter(), args)
+
+
+def traced(name: str):
+    """Decorator form of ``span``."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return fn(*args, **kwargs)
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def propagate(fn):
+    """
+    Bind ``fn`` to a copy of the caller's context so spans recorded on
+    executor threads land in the caller's profile.
+    """
+    return functools.partial(contextvars.copy_context().run, fn)
+
+
+class ProfileStore:
+    """
+    Writes finished profiles as Chrome trace JSON files (loadable in Perfetto
+    or speedscope), keeping at most ``max_files`` traces no older than ``max_age``.
+    """
+
+    def __init__(self, directory: str = PROFILE_DIR, max_files: int = PROFILE_MAX_FILES,
+                 max_age: float = PROFILE_MAX_AGE):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_age = max_age
+
+    def path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f'{profile_id}.trace.json')
+
+    def save(self, profile: Profile) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(profile.id)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(profile.to_chrome_trace(), f)
+        logger.info(f"Saved profile {profile.id} for {profile.name}")
+        self._prune(keep=path)
+        return path
+
+    def _prune(self, keep: str = None):
+        cutoff = time.time() - self.max_age
+        traces = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and entry.name.endswith('.trace.json') and entry.path != keep:
+                try:
+                    traces.append((entry.stat().st_mtime, entry.path))
+                except OSError:
+                    pass
+        traces.sort(reverse=True)
+        # The trace just written counts towards max_files
+        for index, (mtime, path) in enumerate(traces):
+            if index + 1 >= self.max_files or mtime < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
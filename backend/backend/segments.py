@@ -0,0 +1,88 @@
+from array import array
+from typing import Dict, Iterator, List, Optional
+
+
+class Segment:
+    """One translated chunk: where it sits in the source and what it became."""
+    __slots__ = ('chunk_id', 'start', 'end', 'target', 'model', 'seconds')
+
+    def __init__(self, chunk_id: int, start: int, end: int, target: str, model: str = None,
+                 seconds: float = 0.0):
+        self.chunk_id = chunk_id
+        self.start = start
+        self.end = end
+        self.target = target
+        self.model = model
+        self.seconds = seconds
+
+    def __repr__(self):
+        return f"Segment({self.chunk_id}, {self.start}:{self.end}, {self.target!r})"
+
+
+class SegmentedTranslation:
+    """
+    A translated text as parallel arrays of source offsets, target strings and
+    per-chunk timing, instead of one joined string. The source text is held
+    by reference and sliced only on request, so later stages (highlighting,
+    caching, TTS of the translation) can walk the chunks without re-splitting.
+    """
+    __slots__ = ('source', 'source_lang', 'target_lang', 'model', 'starts', 'ends', 'targets', 'seconds')
+
+    def __init__(self, source: str, source_lang: str, target_lang: str, model: str = None):
+        self.source = source
+        self.source_lang = source_lang
+        self.target_lang = target_lang
+        self.model = model
+        self.starts = array('q')
+        self.ends = array('q')
+        self.targets: List[Optional[str]] = []
+        self.seconds = array('d')
+
+    def append(self, start: int, end: int, target: Optional[str] = None, seconds: float = 0.0) -> int:
+        """Add a chunk and return its id."""
+        self.starts.append(start)
+        self.ends.append(end)
+        self.targets.append(target)
+        self.seconds.append(seconds)
+        return len(self.targets) - 1
+
+    def __len__(self) -> int:
+        return len(self.targets)
+
+    def __getitem__(self, chunk_id: int) -> Segment:
+        if chunk_id < 0:
+            chunk_id += len(self)
+        return Segment(chunk_id, self.starts[chunk_id], self.ends[chunk_id], self.targets[chunk_id],
+                       self.model, self.seconds[chunk_id])
+
+    def __iter__(self) -> Iterator[Segment]:
+        return (self[i] for i in range(len(self)))
+
+    def source_text(self, chunk_id: int) -> str:
+        return self.source[self.starts[chunk_id]:self.ends[chunk_id]]
+
+    def text(self) -> str:
+        """
+        The translation as one string. Chunks separated by a blank line in the
+        source are joined by one, by a line break or a space otherwise.
+        """
+        parts = []
+        for i, target in enumerate(self.targets):
+            if i:
+                gap = self.source[self.ends[i - 1]:self.starts[i]]
+                breaks = gap.count('\n')
+                parts.append('\n\n' if breaks > 1 else '\n' if breaks else ' ')
+            parts.append(target or '')
+        return ''.join(parts).strip()
+
+    def to_dict(self) -> Dict:
+        """Column-oriented form for JSON responses: one list per field."""
+        return {
+            'source_lang': self.source_lang,
+            'target_lang': self.target_lang,
+            'model': self.model,
+            'starts': self.starts.tolist(),
+            'ends': self.ends.tolist(),
+            'targets': list(self.targets),
+            'durations_ms': [round(s * 1000, 1) for s in self.seconds],
+        }
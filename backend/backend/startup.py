@@ -0,0 +1,138 @@
+"""
+Startup helpers: lazily constructed components and startup-time reporting.
+
+Run ``python -m backend.startup`` to print a ``-X importtime`` summary for
+``backend.app``; pass ``--budget SECONDS`` to exit non-zero when importing
+the app takes longer, so regressions are caught in CI.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import logging
+from typing import Callable, Dict, List
+
+logger = logging.getLogger('context-backend')
+
+# Modules that must never be imported just by importing backend.app
+HEAVY_MODULES = ('torch', 'TTS', 'newspaper', 'bs4', 'readability', 'youtube_transcript_api')
+
+
+class StartupTimer:
+    """Records named startup milestones, in seconds since ``origin`` (a perf_counter value)."""
+
+    def __init__(self, origin: float = None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.marks: Dict[str, float] = {}
+
+    def mark(self, name: str):
+        self.marks[name] = round(time.perf_counter() - self.origin, 4)
+
+    def to_dict(self) -> Dict:
+        return dict(self.marks)
+
+
+class LazyComponent:
+    """
+    Proxy that builds a component on first use instead of at import time.
+
+    Methods of the wrapped class resolve to thin forwarders without building
+    the component, so only an actual call pays the construction cost.
+    """
+
+    def __init__(self, factory: Callable, name: str = None):
+        self._factory = factory
+        self._name = name or getattr(factory, '__name__', 'component')
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    started = time.perf_counter()
+                    self._instance = self._factory()
+                    logger.info(f"Loaded {self._name} in {time.perf_counter() - started:.2f}s")
+        return self._instance
+
+    def load_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.get, name=f"load-{self._name}", daemon=True)
+        thread.start()
+        return thread
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if self._instance is None and callable(getattr(self._factory, name, None)):
+            return lambda *args, **kwargs: getattr(self.get(), name)(*args, **kwargs)
+        return getattr(self.get(), name)
+
+
+def importtime_report(module: str = 'backend.app', top: int = 15) -> Dict:
+    """
+    Import ``module`` in a fresh interpreter with ``-X importtime`` and
+    summarise the slowest imports by cumulative time.
+    """
+    backend_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [backend_root, os.environ.get('PYTHONPATH')])))
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True, env=env, cwd=backend_root, timeout=120,
+    )
+    wall = time.perf_counter() - started
+
+    entries: List[Dict] = []
+    for line in result.stderr.splitlines():
+        match = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)', line)
+        if match:
+            entries.append({
+                'module': match.group(4),
+                'self_ms': int(match.group(1)) / 1000,
+                'cumulative_ms': int(match.group(2)) / 1000,
+                'depth': len(match.group(3)) // 2,
+            })
+
+    total = next((e['cumulative_ms'] for e in entries if e['module'] == module), None)
+    loaded = {e['module'].split('.')[0] for e in entries}
+    return {
+        'module': module,
+        'ok': result.returncode == 0,
+        'wall_seconds': round(wall, 3),
+        'import_ms': total,
+        'heavy_modules_loaded': sorted(m for m in HEAVY_MODULES if m in loaded),
+        'slowest': sorted(entries, key=lambda e: e['cumulative_ms'], reverse=True)[:top],
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Report import time of the ConText backend.')
+    parser.add_argument('--module', default='backend.app')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget', type=float, help='Fail if importing the module takes longer (seconds)')
+    args = parser.parse_args(argv)
+
+    report = importtime_report(args.module, args.top)
+    print(f"{report['module']}: {report['import_ms']} ms to import ({report['wall_seconds']} s wall)")
+    for entry in report['slowest']:
+        print(f"  {entry['cumulative_ms']:9.1f} ms  {entry['module']}")
+    if report['heavy_modules_loaded']:
+        print(f"Heavy modules imported eagerly: {', '.join(report['heavy_modules_loaded'])}")
+
+    if not report['ok']:
+        return 1
+    if args.budget is not None and (report['import_ms'] or 0) / 1000 > args.budget:
+        print(f"Import time exceeds budget of {args.budget}s")
+        return 1
+    return 1 if report['heavy_modules_loaded'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,69 @@
+import json
+from typing import Dict, List
+
+try:
+    from .config import NUM_PREDICT_PER_CHAR, NUM_PREDICT_MIN, NUM_PREDICT_MAX
+except ImportError:
+    NUM_PREDICT_PER_CHAR = 0.75
+    NUM_PREDICT_MIN = 64
+    NUM_PREDICT_MAX = 4096
+
+
+class StructuredOutputError(ValueError):
+    """The model's reply did not match the requested JSON schema."""
+
+
+# Fixed instruction prefix shared by every translation request. Keeping it
+# byte-identical lets Ollama reuse the cached prompt prefix across calls.
+TRANSLATION_SYSTEM_PROMPT = (
+    "You are a professional translator. Translate the user's text faithfully, "
+    "preserving meaning, tone, formatting and line breaks. Do not add explanations, "
+    "notes or quotation marks. Reply with JSON only, matching the given schema."
+)
+
+TRANSLATION_SCHEMA = {
+    "type": "object",
+    "properties": {"translation": {"type": "string"}},
+    "required": ["translation"],
+}
+
+
+def batch_schema(count: int) -> Dict:
+    """Schema for a packed batch: exactly ``count`` translations, in order."""
+    return {
+        "type": "object",
+        "properties": {
+            "translations": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": count,
+                "maxItems": count,
+            }
+        },
+        "required": ["translations"],
+    }
+
+
+def language_schema(codes: List[str]) -> Dict:
+    return {
+        "type": "object",
+        "properties": {"language": {"type": "string", "enum": list(codes)}},
+        "required": ["language"],
+    }
+
+
+def output_budget(text: str) -> int:
+    """``num_predict`` sized from the input so a runaway generation is cut off."""
+    budget = int(len(text) * NUM_PREDICT_PER_CHAR) + NUM_PREDICT_MIN
+    return min(NUM_PREDICT_MAX, budget)
+
+
+def parse_object(raw: str, key: str):
+    """Parse a JSON object reply and return ``key``, raising ``StructuredOutputError``."""
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        raise StructuredOutputError(f"Model reply is not valid JSON: {raw[:80]!r}")
+    if not isinstance(data, dict) or key not in data:
+        raise StructuredOutputError(f"Model reply is missing '{key}': {raw[:80]!r}")
+    return data[key]
@@ -0,0 +1,165 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence
+
+from .profiling import propagate
+
+try:
+    from .config import SUBTITLE_BATCH_TOKENS
+except ImportError:
+    SUBTITLE_BATCH_TOKENS = 300
+
+try:
+    from .config import OLLAMA_MAX_CONCURRENCY
+except ImportError:
+    OLLAMA_MAX_CONCURRENCY = 8
+
+logger = logging.getLogger('context-backend')
+
+# format -> (file extension, mimetype)
+SUBTITLE_FORMATS = {
+    'srt': ('srt', 'application/x-subrip'),
+    'vtt': ('vtt', 'text/vtt'),
+}
+
+
+class Cue(NamedTuple):
+    """One timed subtitle line, times in seconds."""
+    start: float
+    end: float
+    text: str
+
+
+class SubtitleStats:
+    """Counts of subtitle batches that failed to translate and kept their source text."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._batches = 0
+        self._cues = 0
+        self._by_lang: Dict[str, int] = {}
+
+    def record_fallback(self, target_lang: str, cues: int):
+        with self._lock:
+            self._batches += 1
+            self._cues += cues
+            self._by_lang[target_lang] = self._by_lang.get(target_lang, 0) + cues
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'failed_batches': self._batches, 'untranslated_cues': self._cues,
+                    'untranslated_cues_by_lang': dict(self._by_lang)}
+
+
+def make_cues(entries: Iterable[Sequence]) -> List[Cue]:
+    """
+    Cues from ``(start, duration, text)`` transcript entries. Blank entries
+    are dropped and each cue ends no later than the next one starts, since
+    auto-generated captions overlap.
+    """
+    entries = [(start, duration, ' '.join(text.split())) for start, duration, text in entries]
+    entries = [entry for entry in entries if entry[2]]
+    cues = []
+    for i, (start, duration, text) in enumerate(entries):
+        end = start + duration
+        if i + 1 < len(entries):
+            end = min(end, entries[i + 1][0])
+        cues.append(Cue(start, max(start, end), text))
+    return cues
+
+
+def estimate_tokens(text: str) -> int:
+    # About four characters per token for most BPE vocabularies
+    return len(text) // 4 + 1
+
+
+def batch_cues(cues: Sequence[Cue], max_tokens: int = SUBTITLE_BATCH_TOKENS) -> List[List[Cue]]:
+    """Group consecutive cues into batches of at most ``max_tokens`` estimated tokens."""
+    batches: List[List[Cue]] = []
+    batch: List[Cue] = []
+    tokens = 0
+    for cue in cues:
+        cost = estimate_tokens(cue.text)
+        if batch and tokens + cost > max_tokens:
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(cue)
+        tokens += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def format_timestamp(seconds: float, fmt: str) -> str:
+    """``HH:MM:SS,mmm`` for SRT, ``HH:MM:SS.mmm`` for WebVTT."""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600 * 1000)
+    minutes, millis = divmod(millis, 60 * 1000)
+    secs, millis = divmod(millis, 1000)
+    separator = ',' if fmt == 'srt' else '.'
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+
+def format_cue(number: int, cue: Cue, fmt: str) -> str:
+    timing = f"{format_timestamp(cue.start, fmt)} --> {format_timestamp(cue.end, fmt)}"
+    if fmt == 'srt':
+        return f"{number}\n{timing}\n{cue.text}\n\n"
+    return f"{timing}\n{cue.text}\n\n"
+
+
+def iter_translated_subtitles(ollama_wrapper, cues: Sequence[Cue], source_lang: str, target_lang: str,
+                              fmt: str = 'srt', model: str = None,
+                              max_tokens: int = SUBTITLE_BATCH_TOKENS,
+                              stats: SubtitleStats = None) -> Iterator[str]:
+    """
+    Translate cues batch by batch and yield the subtitle file piece by piece.
+
+    Batches are translated concurrently with ``translate_batch``, which
+    returns one translation per cue, so every cue keeps its own timing.
+    Pieces are yielded in order as soon as the batches before them are
+    done. A batch that fails keeps its source text rather than breaking
+    the file; it is logged with its cue numbers, counted in ``stats``, and
+    in WebVTT preceded by a NOTE naming the untranslated cues.
+    """
+    if fmt not in SUBTITLE_FORMATS:
+        raise ValueError(f"Unsupported subtitle format: {fmt}")
+    if fmt == 'vtt':
+        yield "WEBVTT\n\n"
+
+    batches = batch_cues(cues, max_tokens)
+    if not batches:
+        return
+
+    number = 0
+    workers = min(len(batches), OLLAMA_MAX_CONCURRENCY)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="subtitles") as pool:
+        futures = [
+            pool.submit(propagate(ollama_wrapper.translate_batch), [cue.text for cue in batch],
+                        source_lang, target_lang, model)
+            for batch in batches
+        ]
+        try:
+            for index, (batch, future) in enumerate(zip(batches, futures)):
+                pieces = []
+                try:
+                    translations = future.result()
+                except Exception as e:
+                    first, last = number + 1, number + len(batch)
+                    logger.error(f"Subtitle batch {index} ({target_lang}) failed, keeping source text "
+                                 f"of cues {first}-{last}: {str(e)}")
+                    if stats is not None:
+                        stats.record_fallback(target_lang, len(batch))
+                    if fmt == 'vtt':
+                        pieces.append(f"NOTE Cues {first}-{last} could not be translated and keep the source text\n\n")
+                    translations = [cue.text for cue in batch]
+                for cue, translation in zip(batch, translations):
+                    number += 1
+                    # A blank line inside a cue's text would end the cue early
+                    text = ' '.join(translation.split()) or cue.text
+                    pieces.append(format_cue(number, cue._replace(text=text), fmt))
+                yield ''.join(pieces)
+        finally:
+            # The consumer may stop early (e.g. a closed stream): drop queued batches
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,117 @@
+import re
+import threading
+import logging
+from typing import Dict, Optional
+
+from langdetect import DetectorFactory, detect_langs
+from langdetect.lang_detect_exception import LangDetectException
+
+try:
+    from .config import (
+        TIERED_TRANSLATION, DRAFT_MODEL, TIER_PAIRS, TIER_LENGTH_RATIO,
+        TIER_MIN_DETECT_CHARS, TIER_MAX_COPIED_RATIO,
+    )
+except ImportError:
+    TIERED_TRANSLATION = False
+    DRAFT_MODEL = "gemma3:1b"
+    TIER_PAIRS = {}
+    TIER_LENGTH_RATIO = (0.4, 2.5)
+    TIER_MIN_DETECT_CHARS = 24
+    TIER_MAX_COPIED_RATIO = 0.5
+
+logger = logging.getLogger('context-backend')
+
+# Set seed for consistent results
+DetectorFactory.seed = 0
+
+# Sources shorter than this are not length-checked ("Hi" -> "Привет")
+_MIN_RATIO_CHARS = 20
+
+_WORD = re.compile(r"[^\W\d_]{4,}")
+
+
+def check_draft(source: str, draft: str, source_lang: str, target_lang: str,
+                length_ratio=TIER_LENGTH_RATIO, min_detect_chars: int = TIER_MIN_DETECT_CHARS,
+                max_copied_ratio: float = TIER_MAX_COPIED_RATIO) -> Optional[str]:
+    """
+    Cheap local checks of a draft translation. Returns the name of the first
+    failed check, or None when the draft can be used as is.
+    """
+    source = source.strip()
+    draft = (draft or '').strip()
+    if not draft:
+        return 'empty'
+    if source_lang != target_lang and draft == source:
+        return 'untranslated'
+
+    if len(source) >= _MIN_RATIO_CHARS:
+        low, high = length_ratio
+        if not low <= len(draft) / len(source) <= high:
+            return 'length_ratio'
+
+    if len(draft) >= min_detect_chars:
+        try:
+            # langdetect reports e.g. zh-cn; a close second guess still passes
+            candidates = {c.lang[:2]: c.prob for c in detect_langs(draft)}
+            if candidates.get(target_lang, 0) < 0.2:
+                return 'wrong_language'
+        except LangDetectException:
+            pass
+
+    if source_lang != target_lang:
+        source_words = [w.lower() for w in _WORD.findall(source)]
+        if len(source_words) >= 3:
+            draft_words = {w.lower() for w in _WORD.findall(draft)}
+            copied = sum(1 for w in source_words if w in draft_words)
+            if copied / len(source_words) > max_copied_ratio:
+                return 'copied_source'
+    return None
+
+
+class TierPolicy:
+    """
+    Decides which language pairs are drafted by a small model first, and
+    counts how often drafts are accepted or escalated.
+
+    ``pairs`` maps ``"src-tgt"`` keys (``*`` matches any language) to
+    overrides of ``enabled``, ``draft_model`` and ``length_ratio``.
+    """
+
+    def __init__(self, enabled: bool = TIERED_TRANSLATION, draft_model: str = DRAFT_MODEL,
+                 pairs: Dict[str, Dict] = None, length_ratio=TIER_LENGTH_RATIO):
+        self.defaults = {'enabled': enabled, 'draft_model': draft_model, 'length_ratio': tuple(length_ratio)}
+        self.pairs = TIER_PAIRS if pairs is None else pairs
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def settings(self, source_lang: str, target_lang: str) -> Dict:
+        settings = dict(self.defaults)
+        # Least to most specific, so an exact pair wins over wildcards
+        for key in ('*-*', f'*-{target_lang}', f'{source_lang}-*', f'{source_lang}-{target_lang}'):
+            settings.update(self.pairs.get(key, {}))
+        return settings
+
+    def plan(self, source_lang: str, target_lang: str, model: str) -> Optional[Dict]:
+        """Settings for drafting this pair, or None when ``model`` should translate directly."""
+        settings = self.settings(source_lang, target_lang)
+        if not settings['enabled'] or not settings['draft_model'] or settings['draft_model'] == model:
+            return None
+        return settings
+
+    def record(self, source_lang: str, target_lang: str, reason: Optional[str]):
+        """Count one drafted chunk; ``reason`` is the failed check, None if accepted."""
+        pair = f'{source_lang}-{target_lang}'
+        with self._lock:
+            stats = self._stats.setdefault(pair, {'drafted': 0, 'escalated': 0, 'reasons': {}})
+            stats['drafted'] += 1
+            if reason is not None:
+                stats['escalated'] += 1
+                stats['reasons'][reason] = stats['reasons'].get(reason, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                pair: dict(stats, reasons=dict(stats['reasons']),
+                           escalation_rate=round(stats['escalated'] / stats['drafted'], 3))
+                for pair, stats in self._stats.items()
+            }
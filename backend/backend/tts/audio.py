@@ -0,0 +1,108 @@
+import shutil
+import subprocess
+import threading
+import wave
+import logging
+from typing import BinaryIO, Iterable
+
+try:
+    from ..config import FFMPEG_BINARY, MP3_BITRATE, OPUS_BITRATE
+except ImportError:
+    FFMPEG_BINARY = "ffmpeg"
+    MP3_BITRATE = "64k"
+    OPUS_BITRATE = "32k"
+
+logger = logging.getLogger('context-backend')
+
+# format -> (file extension, mimetype)
+AUDIO_FORMATS = {
+    'wav': ('wav', 'audio/wav'),
+    'pcm16k': ('wav', 'audio/wav'),  # 16 kHz mono 16-bit PCM, e.g. for speech pipelines
+    'mp3': ('mp3', 'audio/mpeg'),
+    'opus': ('ogg', 'audio/ogg'),
+}
+
+
+def _to_pcm16(samples, source_rate: int, target_rate: int) -> bytes:
+    """Float samples in [-1, 1] to little-endian 16-bit PCM, resampled if needed."""
+    import numpy as np
+
+    samples = np.asarray(samples, dtype=np.float32)
+    if target_rate != source_rate and len(samples):
+        # Linear interpolation is plenty for speech
+        duration = len(samples) / source_rate
+        positions = np.arange(int(duration * target_rate)) * (source_rate / target_rate)
+        samples = np.interp(positions, np.arange(len(samples)), samples)
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+
+
+def _encode_wav(blocks: Iterable, sample_rate: int, out: BinaryIO, target_rate: int):
+    # wave patches the header sizes on close, so frames can be written as they come
+    writer = wave.open(out, 'wb')
+    try:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(target_rate)
+        for block in blocks:
+            writer.writeframes(_to_pcm16(block, sample_rate, target_rate))
+    finally:
+        writer.close()
+
+
+def _encode_ffmpeg(blocks: Iterable, sample_rate: int, out: BinaryIO, codec_args):
+    """Pipe PCM blocks through ffmpeg, which writes the encoded stream straight into ``out``."""
+    binary = shutil.which(FFMPEG_BINARY)
+    if binary is None:
+        raise RuntimeError(f"{FFMPEG_BINARY} is required for compressed audio formats")
+
+    process = subprocess.Popen(
+        [binary, '-hide_banner', '-loglevel', 'error',
+         '-f', 's16le', '-ar', str(sample_rate), '-ac', '1', '-i', 'pipe:0',
+         *codec_args, 'pipe:1'],
+        stdin=subprocess.PIPE, stdout=out, stderr=subprocess.PIPE,
+    )
+    # Drain stderr concurrently so a chatty ffmpeg cannot block on a full pipe
+    errors = []
+    reader = threading.Thread(target=lambda: errors.append(process.stderr.read()), daemon=True)
+    reader.start()
+    broken_pipe = False
+    try:
+        try:
+            for block in blocks:
+                process.stdin.write(_to_pcm16(block, sample_rate, sample_rate))
+            process.stdin.close()
+        except BrokenPipeError:
+            # ffmpeg exited early (bad arguments, disk full): report its stderr below
+            broken_pipe = True
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+    except BaseException:
+        process.kill()
+        raise
+    finally:
+        returncode = process.wait()
+        reader.join()
+    if returncode != 0 or broken_pipe:
+        message = errors[0].decode('utf-8', 'replace').strip() if errors and errors[0] else ''
+        raise RuntimeError(f"ffmpeg exited with {returncode}: {message or 'input closed early'}")
+
+
+def encode_audio(blocks: Iterable, sample_rate: int, fmt: str, out: BinaryIO):
+    """
+    Encode float sample blocks (e.g. one per synthesized sentence) into
+    ``out`` in the given format, one block at a time. Compressed formats need
+    ffmpeg and a real file for ``out``.
+    """
+    if fmt == 'wav':
+        _encode_wav(blocks, sample_rate, out, sample_rate)
+    elif fmt == 'pcm16k':
+        _encode_wav(blocks, sample_rate, out, 16000)
+    elif fmt == 'mp3':
+        _encode_ffmpeg(blocks, sample_rate, out, ['-c:a', 'libmp3lame', '-b:a', MP3_BITRATE, '-f', 'mp3'])
+    elif fmt == 'opus':
+        _encode_ffmpeg(blocks, sample_rate, out,
+                       ['-c:a', 'libopus', '-b:a', OPUS_BITRATE, '-ar', '24000', '-f', 'ogg'])
+    else:
+        raise ValueError(f"Unsupported audio format: {fmt}")
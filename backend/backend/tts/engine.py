@@ -1,16 +1,30 @@
 import io
-import torch
-import numpy as np
-from TTS.api import TTS
+import re
+from typing import BinaryIO, Iterator
+
+from ..profiling import traced
+from .audio import encode_audio
+
+DEFAULT_MODEL = "tts_models/en/ljspeech/tacotron2-DDC"
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
 
 class TTSEngine:
-    def __init__(self, model="tts_models/en/ljspeech/tacotron2-DDC", device="cuda" if torch.cuda.is_available() else "cpu"):
+    def __init__(self, model=DEFAULT_MODEL, device=None):
+        # torch and Coqui TTS take seconds to import, so load them only
+        # when an engine is actually built
+        import torch
+        from TTS.api import TTS
+
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
         self.device = device
         self.tts = TTS(model).to(device)
         self.supported_languages = {
             'en': 'English',  # Only English is supported by Tacotron2-DDC
         }
 
+    @traced('tts.synthesize')
     def text_to_speech(self, text: str, language: str) -> bytes:
         """
         Convert text to speech using Tacotron2-DDC.
@@ -25,4 +39,21 @@ class TTSEngine:
         # Convert numpy array to WAV bytes
         wav_bytes = io.BytesIO()
         self.tts.synthesizer.save_wav(wav, wav_bytes)
-        return wav_bytes.getvalue() 
\ No newline at end of file
+        return wav_bytes.getvalue()
+
+    @traced('tts.synthesize')
+    def synthesize(self, text: str, language: str, fmt: str, out: BinaryIO):
+        """
+        Synthesize ``text`` sentence by sentence and encode each sentence into
+        ``out`` as soon as it is generated, so only one sentence of raw audio
+        is held in memory.
+        """
+        if language not in self.supported_languages:
+            raise ValueError(f"Unsupported language: {language}")
+
+        encode_audio(self._iter_sentences(text), self.tts.synthesizer.output_sample_rate, fmt, out)
+
+    def _iter_sentences(self, text: str) -> Iterator:
+        for sentence in _SENTENCE_END.split(text):
+            if sentence.strip():
+                yield self.tts.tts(text=sentence)
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+import logging
+from typing import BinaryIO, Callable, Dict, Optional
+
+try:
+    from ..config import AUDIO_DIR, AUDIO_STORE_MAX_BYTES
+except ImportError:
+    import tempfile
+    AUDIO_DIR = os.path.join(tempfile.gettempdir(), "context-audio")
+    AUDIO_STORE_MAX_BYTES = 1024 * 1024 * 1024
+
+logger = logging.getLogger('context-backend')
+
+
+class AudioStore:
+    """
+    Content-addressed files of synthesized audio. A file's name is the hash
+    of everything that determines its content, so a repeat request is served
+    from disk, and least recently used files go once ``max_bytes`` is exceeded.
+    """
+
+    def __init__(self, directory: str = AUDIO_DIR, max_bytes: int = AUDIO_STORE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    def path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, f'{key}.{ext}')
+
+    def get(self, key: str, ext: str) -> Optional[str]:
+        path = self.path(key, ext)
+        try:
+            # mtime doubles as the last-used time for eviction
+            os.utime(path)
+            return path
+        except FileNotFoundError:
+            return None
+
+    def create(self, key: str, ext: str, write: Callable[[BinaryIO], None]) -> str:
+        """
+        Return the stored file for ``key``, calling ``write`` with a file
+        object to produce it if it does not exist yet. Concurrent requests
+        for the same key produce it once.
+        """
+        with self._locks_lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            path = self.get(key, ext)
+            if path is not None:
+                return path
+
+            os.makedirs(self.directory, exist_ok=True)
+            path = self.path(key, ext)
+            tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    write(f)
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            finally:
+                with self._locks_lock:
+                    self._locks.pop(key, None)
+
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str = None):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name.endswith('.tmp'):
+                continue
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+        if total <= self.max_bytes:
+            return
+
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes * 0.9:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        logger.info(f"Evicted {removed} audio files from {self.directory}")
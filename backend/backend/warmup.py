@@ -0,0 +1,83 @@
+import threading
+import time
+import logging
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger('context-backend')
+
+
+class WarmupState:
+    """Progress of the startup warm-up, reported by /health."""
+
+    def __init__(self):
+        self.status = 'pending'
+        self.steps: Dict[str, Dict] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.status == 'done'
+
+    def record(self, name: str, seconds: float, error: str = None):
+        with self._lock:
+            self.steps[name] = {
+                'ok': error is None,
+                'seconds': round(seconds, 3),
+                'error': error,
+            }
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                'status': self.status,
+                'steps': dict(self.steps),
+                'seconds': round(self.finished_at - self.started_at, 3)
+                if self.started_at and self.finished_at else None,
+            }
+
+
+def _step(state: WarmupState, name: str, fn: Callable):
+    started = time.monotonic()
+    try:
+        fn()
+        state.record(name, time.monotonic() - started)
+        logger.info(f"Warm-up step {name} finished in {time.monotonic() - started:.2f}s")
+    except Exception as e:
+        # A failed step is reported but never blocks readiness: the same
+        # work simply happens lazily on the first real request instead
+        state.record(name, time.monotonic() - started, str(e))
+        logger.warning(f"Warm-up step {name} failed: {str(e)}")
+
+
+def run_warmup(state: WarmupState, ollama_wrapper, language_detector,
+               models: List[str] = None, tts_loader: Callable = None):
+    """
+    Preload the Ollama models with keep_alive, prime the translation prompt
+    prefix, warm the language detector and optionally load TTS.
+    """
+    state.status = 'running'
+    state.started_at = time.time()
+
+    models = [ollama_wrapper.model] + [m for m in (models or []) if m != ollama_wrapper.model]
+    for model in models:
+        _step(state, f'preload:{model}', lambda m=model: ollama_wrapper.preload_model(m))
+        _step(state, f'prime:{model}', lambda m=model: ollama_wrapper.prime(m))
+
+    _step(state, 'language_detector', language_detector.prime)
+
+    if tts_loader is not None:
+        _step(state, 'tts', tts_loader)
+
+    state.finished_at = time.time()
+    state.status = 'done'
+    logger.info(f"Warm-up complete in {state.finished_at - state.started_at:.2f}s")
+
+
+def start_warmup(state: WarmupState, *args, **kwargs) -> threading.Thread:
+    """Run ``run_warmup`` on a daemon thread so the server can start answering at once."""
+    thread = threading.Thread(target=run_warmup, args=(state,) + args, kwargs=kwargs,
+                              name='warmup', daemon=True)
+    thread.start()
+    return thread
@@ -1,5 +1,4 @@
 import re
-from youtube_transcript_api import YouTubeTranscriptApi
 import logging
 
 logger = logging.getLogger('context-backend')
@@ -14,44 +13,52 @@ def get_video_id(youtube_url):
     else:
         raise ValueError("Invalid YouTube URL")
 
+def _fetch_transcript(youtube_url):
+    """Fetch the preferred transcript; returns ``(language_code, entries)``."""
+    from youtube_transcript_api import YouTubeTranscriptApi
+
+    video_id = get_video_id(youtube_url)
+    
+    # List available transcripts for the video
+    transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+    
+    # Prefer auto-generated transcripts if available
+    auto_transcript = None
+    any_transcript = None
+    
+    # Find the first auto-generated transcript
+    for transcript in transcript_list:
+        if transcript.is_generated:
+            auto_transcript = transcript
+            break
+        if not any_transcript:
+            any_transcript = transcript
+    
+    # Use auto-generated transcript if found, else use any available transcript
+    chosen_transcript = auto_transcript or any_transcript
+    
+    if not chosen_transcript:
+        raise ValueError("No transcript available for this video")
+    
+    # Fetch transcript data
+    return chosen_transcript.language_code, chosen_transcript.fetch()
+
+def _entry_field(entry, name, default=None):
+    # Handle transcript entries as dicts or objects (for compatibility with different library versions)
+    if isinstance(entry, dict):
+        return entry.get(name, default)
+    return getattr(entry, name, default)
+
 def get_transcript(youtube_url):
     """Get transcript from a YouTube video URL."""
     try:
-        video_id = get_video_id(youtube_url)
-        
-        # List available transcripts for the video
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        
-        # Prefer auto-generated transcripts if available
-        auto_transcript = None
-        any_transcript = None
-        
-        # Find the first auto-generated transcript
-        for transcript in transcript_list:
-            if transcript.is_generated:
-                auto_transcript = transcript
-                break
-            if not any_transcript:
-                any_transcript = transcript
-        
-        # Use auto-generated transcript if found, else use any available transcript
-        chosen_transcript = auto_transcript or any_transcript
-        
-        if not chosen_transcript:
-            raise ValueError("No transcript available for this video")
-        
-        # Fetch transcript data
-        transcript_data = chosen_transcript.fetch()
-        
-        # Handle transcript entries as dicts or objects (for compatibility with different library versions)
+        _, transcript_data = _fetch_transcript(youtube_url)
 
         processed_fragments = []
         for entry in transcript_data:
             try:
-                if isinstance(entry, dict):
-                    processed_fragments.append(entry.get('text', ''))
-                elif hasattr(entry, 'text'):
-                    processed_fragments.append(getattr(entry, 'text', ''))
+                if isinstance(entry, dict) or hasattr(entry, 'text'):
+                    processed_fragments.append(_entry_field(entry, 'text', ''))
                 else:
                     processed_fragments.append(str(entry))
             except Exception as ex:
@@ -62,4 +69,26 @@ def get_transcript(youtube_url):
         
     except Exception as e:
         logger.error(f"Error getting YouTube transcript: {str(e)}")
-        raise 
\ No newline at end of file
+        raise
+
+def get_timed_transcript(youtube_url):
+    """
+    Get the transcript with its timing: ``(language_code, cues)`` where each
+    cue is a ``(start, duration, text)`` tuple in seconds.
+    """
+    try:
+        language_code, transcript_data = _fetch_transcript(youtube_url)
+
+        cues = []
+        for entry in transcript_data:
+            try:
+                cues.append((float(_entry_field(entry, 'start', 0.0)),
+                             float(_entry_field(entry, 'duration', 0.0)),
+                             _entry_field(entry, 'text', '') or ''))
+            except Exception as ex:
+                logger.error(f"Failed to parse transcript entry {entry}: {ex}")
+        return language_code, cues
+
+    except Exception as e:
+        logger.error(f"Error getting YouTube transcript: {str(e)}")
+        raise
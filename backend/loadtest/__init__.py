@@ -0,0 +1 @@
+"""Load testing tools: a mock Ollama server and a concurrent request harness."""
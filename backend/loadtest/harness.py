@@ -0,0 +1,480 @@
+"""
+Load-test harness: drives a running backend with many concurrent clients
+and reports throughput, latency percentiles, queueing and errors per
+endpoint.
+
+Synthetic mix from a scenario file, against a backend started here and
+backed by the mock Ollama server:
+
+    python -m loadtest.harness --scenario loadtest/scenarios/mixed.json --spawn-backend
+
+Replay of a recorded request log (JSON lines of ``offset``, ``method``,
+``path`` and ``json``) against an already running backend:
+
+    python -m loadtest.harness --url http://127.0.0.1:5002 --replay requests.jsonl
+
+The exit status is 1 when a threshold from the scenario is exceeded, or when
+``--baseline`` is given and p95 latency or throughput regressed beyond
+``--tolerance``.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional
+
+import requests
+
+from .mock_ollama import MockOllama, serve
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = {
+    'translate': ('POST', '/translate'),
+    'detect_language': ('POST', '/detect-language'),
+    'summarize': ('POST', '/summarize'),
+    'scrape': ('POST', '/scrape-url'),
+}
+
+_WORDS = ("time person year way day thing man world life hand part child eye woman place work week "
+          "case point government company number group problem fact river garden window market "
+          "language music story water city system question school night country money").split()
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def make_text(rng: random.Random, size: int) -> str:
+    sentences, length = [], 0
+    while length < size:
+        words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 16))]
+        sentence = ' '.join(words).capitalize() + '.'
+        sentences.append(sentence)
+        length += len(sentence) + 1
+    return ' '.join(sentences)
+
+
+def synthetic_requests(scenario: Dict, site_url: str = None, seed: int = 0) -> Iterator[Dict]:
+    """Endless requests drawn from the scenario's weighted endpoint mix."""
+    rng = random.Random(seed)
+    mix = {name: weight for name, weight in scenario.get('mix', {}).items() if weight > 0}
+    if site_url is None:
+        mix.pop('scrape', None)
+    names, weights = list(mix), list(mix.values())
+    sizes = scenario.get('text_sizes', [300, 1500, 5000])
+    targets = scenario.get('target_langs', ['ru', 'de', 'fr', 'es'])
+    pages = scenario.get('scrape_pages', 20)
+
+    while True:
+        name = rng.choices(names, weights)[0]
+        if name == 'translate':
+            body = {'text': make_text(rng, rng.choice(sizes)), 'source_lang': 'en',
+                    'target_lang': rng.choice(targets)}
+        elif name == 'detect_language':
+            body = {'text': make_text(rng, 300)}
+        elif name == 'summarize':
+            body = {'text': make_text(rng, rng.choice(sizes)), 'lang': 'en'}
+        else:
+            body = {'url': f"{site_url}/article/{rng.randrange(pages)}"}
+        method, path = ENDPOINTS[name]
+        yield {'name': name, 'method': method, 'path': path, 'json': body}
+
+
+def load_recording(path: str) -> List[Dict]:
+    """Recorded requests, sorted by their ``offset`` in seconds from the start."""
+    recorded = []
+    paths = {path: name for name, (_, path) in ENDPOINTS.items()}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                item.setdefault('method', 'POST')
+                item.setdefault('name', paths.get(item['path'], item['path']))
+                recorded.append(item)
+    return sorted(recorded, key=lambda item: item.get('offset', 0))
+
+
+class EndpointStats:
+    """Outcomes of the requests sent to one endpoint."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.client_waits: List[float] = []
+        self.statuses: Dict[str, int] = {}
+        self.count = 0
+        self.errors = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, status, client_wait: float = 0.0):
+        with self._lock:
+            self.count += 1
+            self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            self.client_waits.append(client_wait)
+            if status == 429:
+                self.rejected += 1
+            elif not isinstance(status, int) or status >= 400:
+                self.errors += 1
+            else:
+                self.latencies.append(latency)
+
+    def summary(self, duration: float) -> Dict:
+        with self._lock:
+            ms = [latency * 1000 for latency in self.latencies]
+            ok = len(ms)
+            return {
+                'requests': self.count,
+                'ok': ok,
+                'errors': self.errors,
+                'rejected': self.rejected,
+                'error_rate': round(self.errors / self.count, 4) if self.count else 0.0,
+                'rejected_rate': round(self.rejected / self.count, 4) if self.count else 0.0,
+                'rps': round(ok / duration, 3) if duration else 0.0,
+                'p50_ms': percentile(ms, 50),
+                'p90_ms': percentile(ms, 90),
+                'p95_ms': percentile(ms, 95),
+                'p99_ms': percentile(ms, 99),
+                'max_ms': max(ms) if ms else None,
+                'client_wait_p95_ms': percentile([w * 1000 for w in self.client_waits], 95),
+                'statuses': dict(self.statuses),
+            }
+
+
+class MetricsSampler:
+    """Polls the backend's /metrics to record admission queues and Ollama concurrency."""
+
+    def __init__(self, base_url: str, interval: float = 0.5):
+        self.base_url = base_url
+        self.interval = interval
+        self.samples: List[Dict] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='metrics-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Dict:
+        self._stop.set()
+        self._thread.join()
+        return self.summary()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.samples.append(requests.get(f"{self.base_url}/metrics", timeout=2).json())
+            except (requests.RequestException, ValueError):
+                pass
+
+    def summary(self) -> Dict:
+        queues: Dict[str, List[int]] = {}
+        inflight: Dict[str, List[int]] = {}
+        for sample in self.samples:
+            for name, gate in sample.get('admission', {}).get('endpoints', {}).items():
+                queues.setdefault(name, []).append(gate.get('waiting', 0))
+            for model, limiter in sample.get('ollama', {}).items():
+                inflight.setdefault(model, []).append(limiter.get('inflight', 0))
+        return {
+            'samples': len(self.samples),
+            'admission_waiting': {
+                name: {'max': max(v), 'mean': round(sum(v) / len(v), 2)} for name, v in queues.items()
+            },
+            'ollama_inflight': {
+                model: {'max': max(v), 'mean': round(sum(v) / len(v), 2)} for model, v in inflight.items()
+            },
+            'last': self.samples[-1] if self.samples else None,
+        }
+
+
+def _send(session: requests.Session, base_url: str, item: Dict, timeout: float):
+    started = time.perf_counter()
+    try:
+        response = session.request(item['method'], base_url + item['path'], json=item.get('json'), timeout=timeout)
+        # Read the whole body (streamed responses included) before stopping the clock
+        response.content
+        status = response.status_code
+    except requests.RequestException as e:
+        status = type(e).__name__
+    return time.perf_counter() - started, status
+
+
+def run_load(base_url: str, source, clients: int = 10, duration: float = 30.0,
+             think_time: float = 0.0, timeout: float = 120.0, replay: bool = False,
+             speed: float = 1.0, record_to: str = None, sample_metrics: bool = True) -> Dict:
+    """
+    Send requests from ``source`` with ``clients`` concurrent clients.
+
+    Synthetic sources are consumed closed-loop for ``duration`` seconds: each
+    client sends its next request once the previous one returns. Recordings
+    (``replay``) are sent open-loop at their offsets divided by ``speed``;
+    if all clients are busy, the extra wait is reported as client wait.
+    """
+    stats: Dict[str, EndpointStats] = {}
+    stats_lock = threading.Lock()
+    record_file = open(record_to, 'w', encoding='utf-8') if record_to else None
+    local = threading.local()
+    started = time.perf_counter()
+
+    def endpoint(name: str) -> EndpointStats:
+        with stats_lock:
+            return stats.setdefault(name, EndpointStats())
+
+    def session() -> requests.Session:
+        if not hasattr(local, 'session'):
+            local.session = requests.Session()
+        return local.session
+
+    def perform(item: Dict, scheduled: float = None):
+        wait = max(0.0, time.perf_counter() - scheduled) if scheduled is not None else 0.0
+        latency, status = _send(session(), base_url, item, timeout)
+        endpoint(item['name']).record(latency, status, wait)
+
+    sampler = MetricsSampler(base_url) if sample_metrics else None
+    if sampler:
+        sampler.start()
+
+    try:
+        if replay:
+            with ThreadPoolExecutor(max_workers=clients, thread_name_prefix='client') as pool:
+                for item in source:
+                    scheduled = started + item.get('offset', 0) / speed
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pool.submit(perform, item, scheduled)
+        else:
+            source_lock = threading.Lock()
+            deadline = started + duration
+
+            def client():
+                while time.perf_counter() < deadline:
+                    with source_lock:
+                        item = next(source)
+                        if record_file:
+                            record_file.write(json.dumps(dict(item, offset=round(time.perf_counter() - started, 3)),
+                                                         ensure_ascii=False) + '\n')
+                    perform(item)
+                    if think_time:
+                        time.sleep(think_time)
+
+            threads = [threading.Thread(target=client, name=f'client-{i}') for i in range(clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+    finally:
+        if record_file:
+            record_file.close()
+        backend_metrics = sampler.stop() if sampler else None
+
+    elapsed = time.perf_counter() - started
+    endpoints = {name: s.summary(elapsed) for name, s in sorted(stats.items())}
+    totals = EndpointStats()
+    for s in stats.values():
+        totals.latencies += s.latencies
+        totals.client_waits += s.client_waits
+        totals.count += s.count
+        totals.errors += s.errors
+        totals.rejected += s.rejected
+    return {
+        'base_url': base_url,
+        'clients': clients,
+        'mode': 'replay' if replay else 'synthetic',
+        'duration_seconds': round(elapsed, 3),
+        'endpoints': endpoints,
+        'total': totals.summary(elapsed),
+        'backend': backend_metrics,
+    }
+
+
+def check_thresholds(report: Dict, thresholds: Dict[str, Dict]) -> List[str]:
+    """
+    Compare the report with limits per endpoint (``"*"`` applies to all and
+    ``"total"`` to the aggregate). ``*_ms`` and ``*_rate`` keys are upper
+    bounds, ``min_rps`` is a lower bound.
+    """
+    failures = []
+    targets = dict(report['endpoints'], total=report['total'])
+    for name, summary in targets.items():
+        limits = dict(thresholds.get('*', {})) if name != 'total' else {}
+        limits.update(thresholds.get(name, {}))
+        for key, limit in limits.items():
+            if key == 'min_rps':
+                if summary['rps'] < limit:
+                    failures.append(f"{name}: rps {summary['rps']} < {limit}")
+                continue
+            value = summary.get(key)
+            if value is not None and value > limit:
+                failures.append(f"{name}: {key} {value} > {limit}")
+    return failures
+
+
+def compare_baseline(report: Dict, baseline: Dict, tolerance: float = 0.25) -> List[str]:
+    """Regressions against an earlier report: p95 latency up or throughput down by more than ``tolerance``."""
+    failures = []
+    for name, old in baseline.get('endpoints', {}).items():
+        new = report['endpoints'].get(name)
+        if new is None:
+            continue
+        if old.get('p95_ms') and new.get('p95_ms') and new['p95_ms'] > old['p95_ms'] * (1 + tolerance):
+            failures.append(f"{name}: p95 {new['p95_ms']:.0f} ms vs baseline {old['p95_ms']:.0f} ms")
+        if old.get('rps') and new['rps'] < old['rps'] * (1 - tolerance):
+            failures.append(f"{name}: {new['rps']} rps vs baseline {old['rps']} rps")
+    return failures
+
+
+class _ArticleHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        rng = random.Random(self.path)
+        paragraphs = ''.join(f"<p>{make_text(rng, 400)}</p>" for _ in range(6))
+        body = (f"<!doctype html><html><head><title>Article {self.path}</title></head><body>"
+                f"<nav>Home | News</nav><article><h1>Article</h1>{paragraphs}</article>"
+                f"<footer>Footer</footer></body></html>").encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve_articles() -> ThreadingHTTPServer:
+    """Local site with deterministic article pages for /scrape-url."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ArticleHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    return server
+
+
+def spawn_backend(ollama_url: str, port: int = 5055, timeout: float = 60.0) -> subprocess.Popen:
+    """Start the backend in a subprocess wired to ``ollama_url`` and wait until /health answers."""
+    env = dict(
+        os.environ,
+        OLLAMA_URL=ollama_url,
+        # Simulated clients share one address, so per-client limits would throttle the whole test
+        CONTEXT_CLIENT_RATE='1000000',
+        CONTEXT_CLIENT_BURST='1000000',
+        CONTEXT_CACHE_URL='memory://',
+        PYTHONPATH=os.pathsep.join(filter(None, [BACKEND_DIR, os.environ.get('PYTHONPATH')])),
+    )
+    process = subprocess.Popen(
+        [sys.executable, '-c',
+         f"from backend.app import app; app.run(host='127.0.0.1', port={port}, threaded=True)"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Backend exited with {process.returncode} during startup")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/health", timeout=1).ok:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"Backend did not answer /health within {timeout}s")
+
+
+def format_report(report: Dict) -> str:
+    lines = [f"{report['mode']} load, {report['clients']} clients, {report['duration_seconds']}s against "
+             f"{report['base_url']}",
+             f"{'endpoint':<16}{'req':>7}{'ok':>7}{'err%':>7}{'429%':>7}{'rps':>8}"
+             f"{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+
+    def fmt(value):
+        return f"{value:9.0f}" if value is not None else f"{'-':>9}"
+
+    for name, s in list(report['endpoints'].items()) + [('total', report['total'])]:
+        lines.append(f"{name:<16}{s['requests']:>7}{s['ok']:>7}{s['error_rate'] * 100:>7.1f}"
+                     f"{s['rejected_rate'] * 100:>7.1f}{s['rps']:>8.2f}"
+                     f"{fmt(s['p50_ms'])}{fmt(s['p95_ms'])}{fmt(s['p99_ms'])}{fmt(s['max_ms'])}")
+    backend = report.get('backend') or {}
+    for name, queue in (backend.get('admission_waiting') or {}).items():
+        lines.append(f"queue {name}: max {queue['max']} waiting, mean {queue['mean']}")
+    for model, inflight in (backend.get('ollama_inflight') or {}).items():
+        lines.append(f"ollama {model}: max {inflight['max']} in flight, mean {inflight['mean']}")
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Load-test the ConText backend.')
+    parser.add_argument('--scenario', help='Scenario JSON (mix, clients, duration, thresholds, mock_ollama)')
+    parser.add_argument('--url', default='http://127.0.0.1:5002', help='Backend to test')
+    parser.add_argument('--spawn-backend', action='store_true',
+                        help='Start a mock Ollama server and a backend wired to it')
+    parser.add_argument('--replay', help='Recorded requests (JSON lines) to replay instead of the synthetic mix')
+    parser.add_argument('--speed', type=float, default=1.0, help='Replay speed-up factor')
+    parser.add_argument('--clients', type=int)
+    parser.add_argument('--duration', type=float)
+    parser.add_argument('--record-to', help='Write the synthetic requests sent to this file for later replay')
+    parser.add_argument('--report', help='Write the JSON report to this file')
+    parser.add_argument('--baseline', help='Earlier JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    scenario = {}
+    if args.scenario:
+        with open(args.scenario, encoding='utf-8') as f:
+            scenario = json.load(f)
+    clients = args.clients or scenario.get('clients', 10)
+    duration = args.duration or scenario.get('duration', 30)
+
+    servers, backend = [], None
+    try:
+        base_url = args.url
+        if args.spawn_backend:
+            mock = serve(MockOllama(**scenario.get('mock_ollama', {})))
+            servers.append(mock)
+            port = scenario.get('backend_port', 5055)
+            backend = spawn_backend(f"http://127.0.0.1:{mock.server_address[1]}", port)
+            base_url = f"http://127.0.0.1:{port}"
+
+        if args.replay:
+            source, replay = load_recording(args.replay), True
+        else:
+            site = serve_articles()
+            servers.append(site)
+            source = synthetic_requests(scenario, f"http://127.0.0.1:{site.server_address[1]}",
+                                        seed=scenario.get('seed', 0))
+            replay = False
+
+        report = run_load(base_url, source, clients, duration, scenario.get('think_time', 0.0),
+                          replay=replay, speed=args.speed, record_to=args.record_to)
+    finally:
+        if backend is not None:
+            backend.terminate()
+            backend.wait(timeout=10)
+        for server in servers:
+            server.shutdown()
+
+    print(format_report(report))
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    failures = check_thresholds(report, scenario.get('thresholds', {}))
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            failures += compare_baseline(report, json.load(f), args.tolerance)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
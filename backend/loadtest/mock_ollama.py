@@ -0,0 +1,205 @@
+"""
+Mock Ollama server for load tests.
+
+Answers /api/generate and /api/tags like Ollama does, with latency derived
+from token counts: a prompt-evaluation rate, a generation rate and a fixed
+number of parallel slots, so requests queue the way they do on one GPU.
+Structured requests get replies that match their JSON schema.
+
+    python -m loadtest.mock_ollama --port 11435 --token-rate 40 --parallel 2
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+_FILLER = ("The quick brown fox jumps over the lazy dog while the model keeps "
+           "producing plausible text at a steady rate. ").split()
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly four characters per token, as for most BPE vocabularies."""
+    return max(1, len(text) // 4)
+
+
+class MockOllama:
+    """Latency model and reply generator shared by all request handlers."""
+
+    def __init__(self, token_rate: float = 40.0, prompt_rate: float = 400.0, parallel: int = 2,
+                 load_seconds: float = 0.0, jitter: float = 0.1, error_rate: float = 0.0,
+                 models=('gemma:latest',)):
+        self.token_rate = token_rate
+        self.prompt_rate = prompt_rate
+        self.parallel = parallel
+        self.load_seconds = load_seconds
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.models = list(models)
+        self._slots = threading.Semaphore(parallel)
+        self._lock = threading.Lock()
+        self._loaded = set()
+        self.stats = {'requests': 0, 'errors': 0, 'max_waiting': 0}
+        self._waiting = 0
+
+    def reply(self, payload: Dict) -> Tuple[int, Dict]:
+        with self._lock:
+            self.stats['requests'] += 1
+        if random.random() < self.error_rate:
+            with self._lock:
+                self.stats['errors'] += 1
+            return 500, {'error': 'injected failure'}
+
+        model = payload.get('model', self.models[0])
+        prompt = (payload.get('system') or '') + (payload.get('prompt') or '')
+        started = time.monotonic()
+
+        with self._lock:
+            load = 0.0 if model in self._loaded else self.load_seconds
+            self._loaded.add(model)
+            self._waiting += 1
+            self.stats['max_waiting'] = max(self.stats['max_waiting'], self._waiting)
+        try:
+            # Requests beyond the parallel slots wait, like OLLAMA_NUM_PARALLEL
+            self._slots.acquire()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        try:
+            if not payload.get('prompt'):
+                # keep_alive preload: no generation
+                time.sleep(load)
+                return 200, {'model': model, 'response': '', 'done': True, 'done_reason': 'load'}
+
+            text, done_reason = self._generate(payload)
+            prompt_tokens = estimate_tokens(prompt)
+            eval_tokens = estimate_tokens(text)
+            prompt_seconds = prompt_tokens / self.prompt_rate
+            eval_seconds = eval_tokens / self.token_rate
+            factor = 1 + random.uniform(-self.jitter, self.jitter)
+            time.sleep(load + (prompt_seconds + eval_seconds) * factor)
+        finally:
+            self._slots.release()
+
+        # Like Ollama's, the total includes the time spent waiting for a slot
+        total = time.monotonic() - started
+        return 200, {
+            'model': model,
+            'response': text,
+            'done': True,
+            'done_reason': done_reason,
+            'total_duration': int(total * 1e9),
+            'load_duration': int(load * 1e9),
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': int(prompt_seconds * factor * 1e9),
+            'eval_count': eval_tokens,
+            'eval_duration': int(eval_seconds * factor * 1e9),
+        }
+
+    def _generate(self, payload: Dict) -> Tuple[str, str]:
+        prompt = payload.get('prompt') or ''
+        schema = payload.get('format')
+        if isinstance(schema, dict):
+            properties = schema.get('properties', {})
+            if 'language' in properties:
+                codes = properties['language'].get('enum') or ['en']
+                return json.dumps({'language': 'en' if 'en' in codes else codes[0]}), 'stop'
+            if 'translations' in properties:
+                texts = self._packed_texts(prompt) or []
+                return json.dumps({'translations': texts}, ensure_ascii=False), 'stop'
+            # Translation: echo the body after the instruction line
+            body = prompt.split('\n\n', 1)[-1]
+            return json.dumps({'translation': body}, ensure_ascii=False), 'stop'
+
+        limit = (payload.get('options') or {}).get('num_predict', -1)
+        if 'Translate' in prompt:
+            text = prompt.rsplit(':', 1)[-1].strip()
+        else:
+            # Free-form generation (e.g. summaries)
+            text = ' '.join(random.choice(_FILLER) for _ in range(120))
+        if limit and limit > 0 and estimate_tokens(text) > limit:
+            return text[:limit * 4], 'length'
+        return text, 'stop'
+
+    @staticmethod
+    def _packed_texts(prompt: str) -> Optional[list]:
+        match = re.search(r'\{"texts":.*\}', prompt, re.DOTALL)
+        if not match:
+            return None
+        try:
+            return json.loads(match.group())['texts']
+        except (ValueError, KeyError):
+            return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: Dict):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith('/api/tags'):
+            self._send(200, {'models': [{'name': m, 'size': 0, 'digest': ''} for m in self.server.mock.models]})
+        else:
+            self._send(404, {'error': 'not found'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send(400, {'error': 'invalid JSON'})
+            return
+        if self.path.startswith('/api/generate'):
+            self._send(*self.server.mock.reply(payload))
+        else:
+            self._send(404, {'error': 'not found'})
+
+
+def serve(mock: MockOllama, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+    """Start the mock on a daemon thread; ``server.server_address`` has the bound port."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.mock = mock
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05},
+                     name='mock-ollama', daemon=True).start()
+    return server
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Mock Ollama server with token-rate latency.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11435)
+    parser.add_argument('--token-rate', type=float, default=40.0, help='Generated tokens per second per request')
+    parser.add_argument('--prompt-rate', type=float, default=400.0, help='Prompt tokens evaluated per second')
+    parser.add_argument('--parallel', type=int, default=2, help='Requests generated at the same time')
+    parser.add_argument('--load-seconds', type=float, default=0.0, help='Delay of the first request per model')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Share of requests answered with 500')
+    args = parser.parse_args(argv)
+
+    mock = MockOllama(args.token_rate, args.prompt_rate, args.parallel, args.load_seconds,
+                      error_rate=args.error_rate)
+    server = serve(mock, args.host, args.port)
+    print(f"Mock Ollama listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,67 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+# Keep the app's result cache per test process instead of in the shared temp dir
+os.environ.setdefault('CONTEXT_CACHE_URL', 'memory://')
+# No background warm-up calls to Ollama while tests patch the wrapper
+os.environ.setdefault('CONTEXT_WARMUP', '0')
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        route = self.server.routes.get(self.path.split('?')[0])
+        self.server.hits.append(self.path)
+        if route is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        status, headers, body = route
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if 'Content-Length' not in headers:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class LocalSite:
+    """Serves ``routes`` ({path: (status, headers, body_bytes)}) on localhost."""
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _SiteHandler)
+        self.server.routes = {}
+        self.server.hits = []
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server.server_port}'
+
+    @property
+    def hits(self):
+        return self.server.hits
+
+    def url(self, path):
+        return self.base_url + path
+
+    def add(self, path, body, content_type='text/html; charset=utf-8', status=200, headers=None):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        all_headers = {'Content-Type': content_type} if content_type else {}
+        all_headers.update(headers or {})
+        self.server.routes[path] = (status, all_headers, body)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def local_site():
+    site = LocalSite()
+    yield site
+    site.close()
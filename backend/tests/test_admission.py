@@ -0,0 +1,53 @@
+import threading
+import pytest
+from backend.admission import AdmissionController, AdmissionRejected, EndpointGate, TokenBucket
+
+def test_token_bucket_reports_wait():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    assert bucket.take(2) == 0
+    wait = bucket.take(1)
+    assert 0 < wait <= 1.0
+    bucket.refund(1)
+    assert bucket.take(1) == 0
+
+def test_gate_admits_oversized_request_when_idle():
+    gate = EndpointGate('translate', max_cost=4, max_queue=1, max_wait=0.05)
+    gate.admit(10)
+    assert gate.snapshot()['inflight_cost'] == 10
+    gate.release(10, 1.0)
+    assert gate.snapshot()['inflight_cost'] == 0
+
+def test_gate_rejects_when_queue_full():
+    gate = EndpointGate('translate', max_cost=1, max_queue=0, max_wait=1)
+    gate.admit(1)
+    with pytest.raises(AdmissionRejected) as exc_info:
+        gate.admit(1)
+    assert exc_info.value.retry_after >= 1
+    assert gate.snapshot()['rejected'] == 1
+
+def test_gate_times_out_queued_request():
+    gate = EndpointGate('translate', max_cost=1, max_queue=5, max_wait=0.05)
+    gate.admit(1)
+    with pytest.raises(AdmissionRejected):
+        gate.admit(1)
+    assert gate.snapshot()['waiting'] == 0
+
+def test_gate_wakes_queued_request_on_release():
+    gate = EndpointGate('translate', max_cost=1, max_queue=5, max_wait=2)
+    gate.admit(1)
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(gate.admit(1) is None))
+    waiter.start()
+    gate.release(1, 0.1)
+    waiter.join()
+    assert admitted == [True]
+
+def test_controller_rate_limits_per_client():
+    limits = {'translate': {'max_cost': 100, 'max_queue': 10, 'max_wait': 1}}
+    controller = AdmissionController(limits, client_rate=0.5, client_burst=3)
+    controller.admit('translate', 'a', 3)
+    with pytest.raises(AdmissionRejected) as exc_info:
+        controller.admit('translate', 'a', 1)
+    assert exc_info.value.retry_after == 2
+    # Other clients have their own bucket
+    controller.admit('translate', 'b', 3)
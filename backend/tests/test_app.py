@@ -1,10 +1,12 @@
+import json
 import pytest
 from unittest.mock import patch, MagicMock
-from backend.app import app
+from backend.app import app, cache
 
 @pytest.fixture
 def client():
     app.config['TESTING'] = True
+    cache.clear()
     with app.test_client() as client:
         yield client
 
@@ -41,9 +43,115 @@ def test_translate_endpoint_error(client):
         assert response.status_code == 500
         assert 'error' in response.json
 
-def test_tts_endpoint_success(client):
-    with patch('backend.app.tts_engine.text_to_speech') as mock_tts:
-        mock_tts.return_value = b'audio_data'
+def test_translate_endpoint_multiple_targets(client):
+    with patch('backend.app.ollama_wrapper._translate_chunk') as mock_chunk, \
+         patch('backend.app.language_detector.detect_language') as mock_detect:
+        mock_detect.return_value = 'en'
+        mock_chunk.side_effect = lambda chunk, source, target, model=None: f'[{target}] {chunk}'
+
+        response = client.post('/translate', json={'text': 'Hello', 'target_lang': ['de', 'fr', 'de']})
+
+        assert response.status_code == 200
+        assert response.json == {
+            'source_lang': 'en',
+            'translations': {'de': '[de] Hello', 'fr': '[fr] Hello'},
+        }
+        mock_detect.assert_called_once()
+
+def test_translate_endpoint_streams_targets(client):
+    with patch('backend.app.ollama_wrapper._translate_chunk') as mock_chunk:
+        mock_chunk.side_effect = lambda chunk, source, target, model=None: f'[{target}] {chunk}'
+
+        response = client.post('/translate', json={
+            'text': 'Hello', 'source_lang': 'en', 'target_lang': ['de', 'fr'], 'stream': True
+        })
+
+        assert response.mimetype == 'application/x-ndjson'
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        done = {e['target_lang']: e['translated_text'] for e in events if e.get('done')}
+        assert done == {'de': '[de] Hello', 'fr': '[fr] Hello'}
+        assert {e['index'] for e in events if not e.get('done')} == {0}
+
+def test_translate_endpoint_rejects_invalid_target_list(client):
+    response = client.post('/translate', json={'text': 'Hello', 'source_lang': 'en', 'target_lang': ['de', 'xx']})
+    assert response.status_code == 400
+
+def test_translate_endpoint_segments_mode(client):
+    with patch('backend.app.ollama_wrapper._translate_chunk') as mock_chunk:
+        mock_chunk.side_effect = lambda chunk, source, target, model=None: f'[{target}] {chunk}'
+
+        response = client.post('/translate', json={
+            'text': 'Hello', 'source_lang': 'en', 'target_lang': 'de', 'response_mode': 'segments'
+        })
+
+        assert response.status_code == 200
+        assert response.json['translated_text'] == '[de] Hello'
+        segments = response.json['segments']
+        assert (segments['starts'], segments['ends'], segments['targets']) == ([0], [5], ['[de] Hello'])
+
+    response = client.post('/translate', json={
+        'text': 'Hello', 'source_lang': 'en', 'target_lang': ['de', 'fr'], 'response_mode': 'segments'
+    })
+    assert response.status_code == 400
+
+def test_youtube_subtitles_stream(client):
+    entries = [(0.0, 1.0, 'Hi.'), (1.0, 1.0, 'Bye.')]
+    with patch('backend.app.get_timed_transcript', return_value=('en-GB', entries)), \
+         patch('backend.app.ollama_wrapper.translate_batch') as mock_batch:
+        mock_batch.side_effect = lambda texts, source, target, model=None: [t.upper() for t in texts]
+
+        response = client.post('/youtube-subtitles', json={
+            'url': 'https://youtu.be/dQw4w9WgXcQ', 'target_lang': 'de', 'format': 'vtt'
+        })
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/vtt'
+        assert response.headers['X-Source-Lang'] == 'en'
+        assert response.get_data(as_text=True) == (
+            'WEBVTT\n\n00:00:00.000 --> 00:00:01.000\nHI.\n\n00:00:01.000 --> 00:00:02.000\nBYE.\n\n')
+
+    response = client.post('/youtube-subtitles', json={'url': 'https://youtu.be/dQw4w9WgXcQ', 'format': 'ass'})
+    assert response.status_code == 400
+
+    with patch('backend.app.get_timed_transcript', return_value=('en', [(0.0, 1.0, '  ')])), \
+         patch('backend.app.language_detector.detect_language') as mock_detect:
+        response = client.post('/youtube-subtitles', json={'url': 'https://youtu.be/dQw4w9WgXcQ'})
+        assert response.status_code == 404
+        mock_detect.assert_not_called()
+
+def test_translate_incremental(client, tmp_path):
+    from backend.app import incremental_translator
+    with patch.object(incremental_translator.store, 'directory', str(tmp_path)), \
+         patch('backend.app.ollama_wrapper._translate_chunk') as mock_chunk, \
+         patch('backend.app.ollama_wrapper.translate_segment') as mock_segment:
+        mock_segment.side_effect = lambda segment, *args, **kwargs: f'<{segment}>'
+        body = {'doc_id': 'note-1', 'text': 'One.\n\nTwo.', 'source_lang': 'en', 'target_lang': 'ru'}
+
+        response = client.post('/translate/incremental', json=body)
+        assert response.status_code == 200
+        assert response.json['translated_text'] == '<One.>\n\n<Two.>'
+
+        body['text'] = 'One.\n\nTwo!'
+        response = client.post('/translate/incremental', json=body)
+        assert response.json['translated_text'] == '<One.>\n\n<Two!>'
+        assert response.json['segments_translated'] == 1
+        mock_chunk.assert_not_called()
+
+        assert client.delete('/translate/incremental/note-1').status_code == 200
+        assert client.delete('/translate/incremental/note-1').status_code == 404
+
+@pytest.fixture
+def audio_store(tmp_path):
+    from backend.app import audio_store
+    with patch.object(audio_store, 'directory', str(tmp_path)):
+        yield audio_store
+
+def _fake_synthesize(text, lang, fmt, out):
+    out.write(b'audio_data')
+
+def test_tts_endpoint_success(client, audio_store):
+    with patch('backend.app.tts_engine.synthesize') as mock_tts:
+        mock_tts.side_effect = _fake_synthesize
         
         response = client.post('/tts', json={
             'text': 'Hello',
@@ -54,7 +162,26 @@ def test_tts_endpoint_success(client):
         assert response.data == b'audio_data'
         assert response.mimetype == 'audio/wav'
         assert response.headers['Content-Disposition'] == 'attachment; filename=speech.wav'
-        mock_tts.assert_called_once_with('Hello', 'en')
+        mock_tts.assert_called_once()
+        assert mock_tts.call_args[0][:3] == ('Hello', 'en', 'wav')
+
+def test_tts_repeat_request_served_from_store(client, audio_store):
+    with patch('backend.app.tts_engine.synthesize') as mock_tts:
+        mock_tts.side_effect = _fake_synthesize
+        first = client.post('/tts', json={'text': 'Hello', 'lang': 'en', 'format': 'mp3'})
+        second = client.post('/tts', json={'text': 'Hello', 'lang': 'en', 'format': 'mp3'})
+
+        assert mock_tts.call_count == 1
+        assert first.headers['X-Cache'] == 'miss' and second.headers['X-Cache'] == 'hit'
+        assert second.mimetype == 'audio/mpeg'
+
+        partial = client.get(first.headers['X-Audio-Url'], headers={'Range': 'bytes=2-5'})
+        assert partial.status_code == 206
+        assert partial.data == b'dio_'
+
+def test_tts_rejects_unknown_format(client):
+    response = client.post('/tts', json={'text': 'Hello', 'lang': 'en', 'format': 'flac'})
+    assert response.status_code == 400
 
 def test_tts_endpoint_missing_fields(client):
     response = client.post('/tts', json={})
@@ -62,8 +189,8 @@ def test_tts_endpoint_missing_fields(client):
     assert response.status_code == 400
     assert 'error' in response.json
 
-def test_tts_endpoint_error(client):
-    with patch('backend.app.tts_engine.text_to_speech') as mock_tts:
+def test_tts_endpoint_error(client, audio_store):
+    with patch('backend.app.tts_engine.synthesize') as mock_tts:
         mock_tts.side_effect = Exception('TTS failed')
         
         response = client.post('/tts', json={
@@ -72,4 +199,104 @@ def test_tts_endpoint_error(client):
         })
         
         assert response.status_code == 500
-        assert 'error' in response.json 
\ No newline at end of file
+        assert 'error' in response.json 
+
+def test_ingest_upload_and_download(client, tmp_path):
+    from backend.app import ingest_manager
+    ingest_manager.work_dir = str(tmp_path)
+    with patch('backend.app.ollama_wrapper._translate_chunk') as mock_chunk, \
+         patch('backend.app.ingest_manager.start') as mock_start:
+        mock_chunk.return_value = 'Привет'
+        response = client.post('/ingest?filename=doc.txt&source_lang=en&target_lang=ru',
+                               data=b'Hello', content_type='text/plain')
+
+        assert response.status_code == 202
+        job_id = response.json['job_id']
+        job = ingest_manager.get(job_id)
+        job.run(*mock_start.call_args[0][1:])
+
+    status = client.get(f'/ingest/{job_id}')
+    assert status.json['status'] == 'done'
+
+    result = client.get(f'/ingest/{job_id}/result', headers={'Range': 'bytes=0-3'})
+    assert result.status_code == 206
+    assert result.data == 'Привет'.encode('utf-8')[:4]
+
+def test_ingest_unknown_job(client):
+    response = client.get('/ingest/missing')
+    assert response.status_code == 404
+
+def test_translate_rejected_with_retry_after(client):
+    with patch('backend.app.admission.admit') as mock_admit, \
+         patch('backend.app.ollama_wrapper.translate') as mock_translate:
+        from backend.admission import AdmissionRejected
+        mock_admit.side_effect = AdmissionRejected('translate queue is full', 2.5)
+
+        response = client.post('/translate', json={'text': 'Hello', 'target_lang': 'ru'})
+
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '3'
+        mock_translate.assert_not_called()
+
+def test_health_reports_warmup(client):
+    from backend.app import warmup_state
+    with patch.object(warmup_state, 'status', 'running'):
+        response = client.get('/health')
+        assert response.status_code == 200
+        assert response.json['ready'] is False
+        assert response.json['status'] == 'warming_up'
+
+    with patch.object(warmup_state, 'status', 'done'):
+        response = client.get('/health')
+        assert response.json['ready'] is True
+        assert response.json['status'] == 'healthy'
+
+def test_first_request_starts_warmup_once(client):
+    with patch('backend.app._background_started', False), \
+         patch('backend.app.WARMUP_ENABLED', True), \
+         patch('backend.app.start_warmup') as mock_start, \
+         patch('backend.app.prewarmer') as mock_prewarmer:
+        client.get('/health')
+        client.get('/health')
+
+        mock_start.assert_called_once()
+        mock_prewarmer.start.assert_called_once()
+
+def test_startup_importtime_requires_admin_token(client):
+    with patch('backend.app.importtime_report') as mock_report, \
+         patch('backend.app.ADMIN_TOKEN', 'secret'):
+        mock_report.return_value = []
+        assert client.get('/debug/startup').status_code == 200
+        assert client.get('/debug/startup?importtime=1').status_code == 403
+
+        headers = {'X-Admin-Token': 'secret'}
+        assert client.get('/debug/startup?importtime=1&top=x', headers=headers).status_code == 400
+        response = client.get('/debug/startup?importtime=1&top=5', headers=headers)
+        assert response.status_code == 200
+        mock_report.assert_called_once_with(top=5)
+
+def test_profile_requires_admin_token(client):
+    response = client.get('/health', headers={'X-Profile': '1'})
+    assert response.status_code == 200
+    assert 'X-Profile-Id' not in response.headers
+
+    with patch('backend.app.ADMIN_TOKEN', 'secret'):
+        response = client.get('/health?profile=1', headers={'X-Admin-Token': 'wrong'})
+        assert 'X-Profile-Id' not in response.headers
+
+def test_profiled_request_saves_trace(client, tmp_path):
+    with patch('backend.app.ADMIN_TOKEN', 'secret'), \
+         patch('backend.app.profile_store.directory', str(tmp_path)), \
+         patch('backend.app.ollama_wrapper._translate_chunk') as mock_chunk:
+        mock_chunk.return_value = 'Привет'
+        response = client.post('/translate', json={'text': 'Hello', 'source_lang': 'en', 'target_lang': 'ru'},
+                               headers={'X-Profile': '1', 'X-Admin-Token': 'secret'})
+        assert response.status_code == 200
+        profile_id = response.headers['X-Profile-Id']
+
+        trace = client.get(f'/profiles/{profile_id}', headers={'X-Admin-Token': 'secret'})
+        assert trace.status_code == 200
+        names = {e['name'] for e in trace.json['traceEvents']}
+        assert {'request.json', 'split_text', 'request POST /translate'} <= names
+
+        assert client.get(f'/profiles/{profile_id}').status_code == 403
@@ -0,0 +1,94 @@
+import io
+import os
+import shutil
+import wave
+import threading
+import pytest
+from backend.tts.audio import encode_audio
+from backend.tts.store import AudioStore
+
+def _blocks(count=3, length=22050):
+    import numpy as np
+    for i in range(count):
+        yield np.sin(np.linspace(0, 440 * 2 * np.pi, length)) * 0.5
+
+def test_wav_encoded_block_by_block():
+    out = io.BytesIO()
+    encode_audio(_blocks(), 22050, 'wav', out)
+    out.seek(0)
+    with wave.open(out) as wav:
+        assert wav.getframerate() == 22050
+        assert wav.getsampwidth() == 2
+        assert wav.getnframes() == 3 * 22050
+
+def test_pcm16k_is_resampled():
+    out = io.BytesIO()
+    encode_audio(_blocks(count=1), 22050, 'pcm16k', out)
+    out.seek(0)
+    with wave.open(out) as wav:
+        assert wav.getframerate() == 16000
+        assert abs(wav.getnframes() - 16000) <= 1
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        encode_audio(_blocks(), 22050, 'flac', io.BytesIO())
+
+@pytest.mark.skipif(shutil.which('ffmpeg') is None, reason='ffmpeg not installed')
+@pytest.mark.parametrize('fmt', ['mp3', 'opus'])
+def test_compressed_formats_are_smaller(tmp_path, fmt):
+    wav_path, path = tmp_path / 'a.wav', tmp_path / f'a.{fmt}'
+    with open(wav_path, 'wb') as f:
+        encode_audio(_blocks(), 22050, 'wav', f)
+    with open(path, 'wb') as f:
+        encode_audio(_blocks(), 22050, fmt, f)
+    assert 0 < os.path.getsize(path) < os.path.getsize(wav_path) / 4
+
+@pytest.mark.skipif(os.name != 'posix', reason='needs a shell script as a fake ffmpeg')
+def test_ffmpeg_error_is_reported_when_it_exits_early(tmp_path, monkeypatch):
+    fake = tmp_path / 'ffmpeg'
+    fake.write_text('#!/bin/sh\necho "Unknown encoder" >&2\nexit 1\n')
+    fake.chmod(0o755)
+    monkeypatch.setattr('backend.tts.audio.FFMPEG_BINARY', str(fake))
+
+    with open(tmp_path / 'a.mp3', 'wb') as f:
+        with pytest.raises(RuntimeError, match='ffmpeg exited with 1: Unknown encoder'):
+            encode_audio(_blocks(count=20), 22050, 'mp3', f)
+
+def test_store_creates_once(tmp_path):
+    store = AudioStore(str(tmp_path))
+    key = store.key('model', 'en', 'wav', 'Hello')
+    calls = []
+
+    def write(out):
+        calls.append(1)
+        out.write(b'audio')
+
+    threads = [threading.Thread(target=store.create, args=(key, 'wav', write)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    with open(store.get(key, 'wav'), 'rb') as f:
+        assert f.read() == b'audio'
+    assert store.get(store.key('other'), 'wav') is None
+
+def test_store_failed_write_leaves_nothing(tmp_path):
+    store = AudioStore(str(tmp_path))
+
+    def fail(out):
+        out.write(b'partial')
+        raise RuntimeError('synthesis failed')
+
+    with pytest.raises(RuntimeError):
+        store.create('abc', 'wav', fail)
+    assert os.listdir(tmp_path) == []
+
+def test_store_evicts_least_recently_used(tmp_path):
+    store = AudioStore(str(tmp_path), max_bytes=250)
+    for i, name in enumerate(['a', 'b', 'c']):
+        path = store.create(name, 'wav', lambda out: out.write(b'x' * 100))
+        os.utime(path, (i, i))
+    assert store.get('a', 'wav') is None
+    assert store.get('c', 'wav') is not None
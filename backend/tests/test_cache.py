@@ -0,0 +1,140 @@
+import threading
+import time
+import pytest
+from backend.cache import MemoryCache, SQLiteCache, RedisCache, make_cache, make_key, encode_value, decode_value
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryCache()
+    return SQLiteCache(str(tmp_path / 'cache.sqlite3'))
+
+def test_set_get_and_ttl(cache):
+    cache.set('a', {'text': 'Привет'})
+    assert cache.get('a') == {'text': 'Привет'}
+    assert cache.get('missing') is None
+
+    cache.set('short', 'x', ttl=0.05)
+    time.sleep(0.1)
+    assert cache.get('short') is None
+
+    cache.delete('a')
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 3
+
+def test_large_values_are_compressed():
+    text = 'hello world ' * 1000
+    blob = encode_value(text)
+    assert blob[:1] == b'z' and len(blob) < len(text) / 10
+    assert decode_value(blob) == text
+    assert encode_value('hi')[:1] == b'j'
+
+def test_keys_do_not_contain_source():
+    key = make_key('scrape', 'https://example.com/private')
+    assert key.startswith('scrape:') and 'example' not in key
+    assert key == make_key('scrape', 'https://example.com/private')
+
+def test_memory_lru_eviction():
+    cache = MemoryCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+def test_sqlite_size_eviction(tmp_path):
+    cache = SQLiteCache(str(tmp_path / 'cache.sqlite3'), max_bytes=1000)
+    for i in range(20):
+        cache.set(f'k{i}', f'{i:03d}' * 40)
+    stats = cache.stats()
+    assert stats['bytes'] <= 1000
+    assert stats['evictions'] > 0
+    assert cache.get('k19') is not None
+
+def test_sqlite_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    SQLiteCache(path).set('key', 'value')
+    assert make_cache(f'sqlite:///{path}').get('key') == 'value'
+
+def test_concurrent_callers_compute_once(cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'result'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute('k', compute)))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ['result'] * 8
+    assert len(calls) == 1
+
+def test_errors_are_shared_and_not_cached(cache):
+    def fail():
+        raise RuntimeError('ollama down')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_compute('k', fail)
+    assert cache.get_or_compute('k', lambda: 'ok') == 'ok'
+
+def test_other_worker_waits_for_lock_holder(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    holder, waiter = SQLiteCache(path), SQLiteCache(path)
+    assert holder._try_lock('k')
+
+    def finish():
+        time.sleep(0.2)
+        holder.set('k', 'from holder')
+        holder._unlock('k')
+
+    threading.Thread(target=finish).start()
+    assert waiter.get_or_compute('k', lambda: 'computed again') == 'from holder'
+
+class _FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return False
+        self.data[key] = value if isinstance(value, bytes) else value.encode()
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def scan_iter(self, match):
+        return [k for k in self.data if k.startswith(match.rstrip('*'))]
+
+def test_redis_backend_with_client():
+    cache = RedisCache(client=_FakeRedis())
+    assert cache.get_or_compute('k', lambda: ['a', 'b']) == ['a', 'b']
+    assert cache.get('k') == ['a', 'b']
+    assert not any(key.startswith('context:lock:') for key in cache.client.data)
+    cache.clear()
+    assert cache.get('k') is None
+
+def test_make_cache_rejects_unknown_url():
+    with pytest.raises(ValueError):
+        make_cache('ftp://nowhere')
+
+def test_sqlite_url_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert make_cache('sqlite:///relative.sqlite3').path == 'relative.sqlite3'
+    absolute = str(tmp_path / 'absolute.sqlite3')
+    assert make_cache(f'sqlite:///{absolute}').path == absolute
+    with pytest.raises(ValueError):
+        make_cache('sqlite://host/cache.sqlite3')
@@ -0,0 +1,57 @@
+import threading
+from backend.concurrency import AdaptiveLimiter
+
+def test_acquire_respects_limit():
+    limiter = AdaptiveLimiter('m', initial_limit=1)
+    assert limiter.acquire(timeout=0.01) is True
+    assert limiter.acquire(timeout=0.01) is False
+    limiter.release()
+    assert limiter.acquire(timeout=0.01) is True
+
+def test_limit_grows_when_saturated_and_fast():
+    limiter = AdaptiveLimiter('m', initial_limit=2, max_limit=4)
+    for _ in range(50):
+        slots = limiter.snapshot()['limit']
+        for _ in range(slots):
+            limiter.acquire()
+        limiter.on_success(1.0, eval_duration=1.0, eval_count=100)
+        for _ in range(slots):
+            limiter.release()
+    assert limiter.snapshot()['limit'] == 4
+
+def test_limit_does_not_grow_when_idle():
+    limiter = AdaptiveLimiter('m', initial_limit=2)
+    for _ in range(20):
+        limiter.on_success(1.0)
+    assert limiter.snapshot()['limit'] == 2
+
+def test_limit_backs_off_on_errors():
+    limiter = AdaptiveLimiter('m', initial_limit=8, max_limit=8)
+    limiter.on_error()
+    snapshot = limiter.snapshot()
+    assert snapshot['limit'] == 4
+    assert snapshot['decreases'] == 1
+    assert snapshot['errors'] == 1
+
+def test_wall_time_alone_does_not_back_off():
+    # Waiting in the server queue shows up in latency, but not in the eval rate
+    limiter = AdaptiveLimiter('m', initial_limit=4)
+    limiter.on_success(1.0, eval_duration=1.0, eval_count=100)
+    limiter.on_success(10.0, eval_duration=1.0, eval_count=100)
+    assert limiter.snapshot()['limit_exact'] == 4
+
+def test_limit_backs_off_when_token_rate_drops():
+    limiter = AdaptiveLimiter('m', initial_limit=4)
+    limiter.on_success(1.0, eval_duration=1.0, eval_count=100)
+    limiter.on_success(5.0, eval_duration=5.0, eval_count=100)
+    assert limiter.snapshot()['limit_exact'] < 4
+
+def test_release_wakes_waiters():
+    limiter = AdaptiveLimiter('m', initial_limit=1)
+    limiter.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(limiter.acquire(timeout=2)))
+    waiter.start()
+    limiter.release()
+    waiter.join()
+    assert acquired == [True]
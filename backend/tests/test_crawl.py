@@ -0,0 +1,133 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+from backend.crawl import CrawlJob, CrawlManager, _interleave_by_host
+
+def page(title, body):
+    paragraph = f'{body} ' * 15
+    return f'<html><head><title>{title}</title></head><body><article><p>{paragraph}</p></article></body></html>'
+
+@pytest.fixture
+def site(local_site, monkeypatch):
+    monkeypatch.setattr('backend.crawl.CRAWL_MIN_DELAY', 0)
+    local_site.add('/robots.txt', 'User-agent: *\nDisallow: /private\n', content_type='text/plain')
+    local_site.add('/a', page('A', 'Alpha page talks about the first topic in detail.'))
+    local_site.add('/b', page('B', 'Beta page covers a completely different subject.'))
+    local_site.add('/b-copy', page('B', 'Beta page covers a completely different subject.'))
+    local_site.add('/private', page('P', 'Nobody should read this private page at all.'))
+    return local_site
+
+@pytest.fixture
+def wrapper():
+    wrapper = MagicMock()
+    wrapper.translate.side_effect = lambda text, src, tgt, model=None: f'[{tgt}] {text}'
+    return wrapper
+
+def test_crawl_url_list_dedupes_and_respects_robots(site, tmp_path, wrapper):
+    manager = CrawlManager(work_dir=str(tmp_path))
+    urls = [site.url(p) for p in ('/a', '/b', '/b-copy', '/private', '/missing')]
+    job = manager.create_job(urls=urls, source_lang='en', target_lang='ru')
+
+    job.run(wrapper)
+
+    pages = job.to_dict(include_pages=True)
+    assert pages['status'] == 'done'
+    assert pages['counts'] == {'done': 2, 'duplicate': 1, 'skipped': 1, 'failed': 1}
+    assert '/private' not in site.hits
+    by_url = {p['url']: p for p in pages['pages']}
+    b, b_copy = by_url[site.url('/b')], by_url[site.url('/b-copy')]
+    assert b['hash'] == b_copy['hash']
+    assert {b['status'], b_copy['status']} == {'done', 'duplicate'}
+    # The duplicate is never translated
+    assert wrapper.translate.call_count == 2
+
+    done = by_url[site.url('/a')]
+    with open(job.content_path(done['hash'], 'ru'), encoding='utf-8') as f:
+        assert f.read().startswith('[ru] Alpha page')
+
+def test_crawl_skips_host_when_robots_denied(site, tmp_path):
+    site.add('/robots.txt', 'Forbidden', content_type='text/plain', status=403)
+    manager = CrawlManager(work_dir=str(tmp_path))
+    job = manager.create_job(urls=[site.url('/a')])
+
+    job.run()
+
+    assert job.to_dict()['counts'] == {'skipped': 1}
+    assert '/a' not in site.hits
+
+def test_crawl_retries_host_when_robots_fails(site, tmp_path):
+    site.add('/robots.txt', 'Unavailable', content_type='text/plain', status=503)
+    manager = CrawlManager(work_dir=str(tmp_path))
+    job = manager.create_job(urls=[site.url('/a')])
+
+    job.run()
+
+    assert job.to_dict()['counts'] == {'failed': 1}
+    assert job.pending_urls() == [site.url('/a')]
+
+    site.add('/robots.txt', 'User-agent: *\nAllow: /\n', content_type='text/plain')
+    resumed = CrawlJob.load(str(tmp_path), job.id)
+    resumed.run()
+    assert resumed.to_dict()['counts'] == {'done': 1}
+
+def test_start_runs_a_job_only_once(site, tmp_path):
+    manager = CrawlManager(work_dir=str(tmp_path))
+    job = manager.create_job(urls=[site.url('/a')])
+    started = threading.Event()
+    release = threading.Event()
+
+    def run(*args):
+        started.set()
+        release.wait(5)
+
+    job.run = run
+    first = manager.start(job)
+    second = manager.start(job)
+    release.set()
+    first.join(5)
+
+    assert started.is_set()
+    assert second is None
+
+def test_crawl_sitemap(site, tmp_path):
+    site.add('/sitemap.xml', (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f'<url><loc>{site.url("/a")}</loc></url><url><loc>{site.url("/b")}</loc></url>'
+        '</urlset>'
+    ), content_type='application/xml')
+    manager = CrawlManager(work_dir=str(tmp_path))
+    job = manager.create_job(sitemap=site.url('/sitemap.xml'))
+
+    job.run()
+
+    assert job.urls == [site.url('/a'), site.url('/b')]
+    assert job.to_dict()['counts'] == {'done': 2}
+
+def test_crawl_resume_only_retries_unfinished(site, tmp_path):
+    manager = CrawlManager(work_dir=str(tmp_path))
+    job = manager.create_job(urls=[site.url('/a'), site.url('/later')])
+    job.run()
+    assert job.to_dict()['counts'] == {'done': 1, 'failed': 1}
+
+    # A fresh manager (e.g. after a restart) rebuilds the job from disk
+    site.add('/later', page('L', 'Later page appeared after the first attempt finished.'))
+    resumed = CrawlManager(work_dir=str(tmp_path)).get(job.id)
+    assert resumed.status == 'interrupted'
+    assert resumed.pending_urls() == [site.url('/later')]
+
+    hits_before = site.hits.count('/a')
+    resumed.run()
+    assert resumed.to_dict()['counts'] == {'done': 2}
+    assert site.hits.count('/a') == hits_before
+
+def test_interleave_by_host():
+    urls = ['http://a/1', 'http://a/2', 'http://a/3', 'http://b/1']
+    assert _interleave_by_host(urls) == ['http://a/1', 'http://b/1', 'http://a/2', 'http://a/3']
+
+def test_create_job_validates_input(tmp_path):
+    manager = CrawlManager(work_dir=str(tmp_path))
+    with pytest.raises(ValueError):
+        manager.create_job()
+    with pytest.raises(ValueError):
+        manager.create_job(urls=['not a url'])
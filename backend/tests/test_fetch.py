@@ -0,0 +1,80 @@
+import socket
+import threading
+import time
+import pytest
+from backend.fetch import FetchError, detect_encoding, fetch_html
+from backend.parser import ExtractionError, method3_readability
+
+ARTICLE = '''<html><head><title>News</title><script>var tracking = 1;</script></head>
+<body><nav>Menu</nav><article><h1>Headline</h1>
+<p>The first paragraph of the article is long enough to count as content. ''' + 'More words here. ' * 20 + '''</p>
+<p>A second paragraph follows with further detail about the story. ''' + 'Even more text. ' * 20 + '''</p>
+</article></body></html>'''
+
+def test_detect_encoding_prefers_bom_then_header_then_meta():
+    assert detect_encoding(b'\xef\xbb\xbf<html>', 'text/html; charset=cp1251') == 'utf-8'
+    assert detect_encoding(b'<html>', 'text/html; charset=windows-1251') == 'cp1251'
+    assert detect_encoding(b'<meta charset="koi8-r"><html>', 'text/html') == 'koi8-r'
+    assert detect_encoding('<p>café</p>'.encode('utf-8'), 'text/html') == 'utf-8'
+    assert detect_encoding('<p>café crème</p>'.encode('cp1252'), 'text/html') == 'cp1252'
+
+def test_fetch_html_decodes_meta_charset(local_site):
+    local_site.add('/ru', '<meta charset="windows-1251"><p>Привет</p>'.encode('cp1251'), content_type='text/html')
+    html, final_url = fetch_html(local_site.url('/ru'))
+    assert 'Привет' in html
+    assert final_url == local_site.url('/ru')
+
+def test_fetch_html_rejects_binary_before_reading(local_site):
+    local_site.add('/file.pdf', b'%PDF-1.4' + b'\x00' * 1000, content_type='application/pdf')
+    with pytest.raises(FetchError) as exc_info:
+        fetch_html(local_site.url('/file.pdf'))
+    assert 'Unsupported content type' in str(exc_info.value)
+
+def test_fetch_html_truncates_large_body(local_site):
+    local_site.add('/big', '<html><body>' + 'x' * 200000 + '</body></html>')
+    html, _ = fetch_html(local_site.url('/big'), max_bytes=1000)
+    assert len(html) == 1000
+
+def test_method3_readability_extracts_article(local_site):
+    local_site.add('/article', ARTICLE)
+    text = method3_readability(local_site.url('/article'))
+    assert 'The first paragraph of the article' in text
+    assert 'A second paragraph follows' in text
+    assert 'tracking' not in text
+    assert '<p>' not in text
+
+def test_method3_readability_raises_on_errors(local_site):
+    local_site.add('/image', b'\x89PNG', content_type='image/png')
+    with pytest.raises(ExtractionError) as exc_info:
+        method3_readability(local_site.url('/image'))
+    assert 'Unsupported content type' in str(exc_info.value)
+
+def test_fetch_html_deadline_stops_trickling_server():
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1)
+    stop = threading.Event()
+
+    def trickle():
+        conn, _ = listener.accept()
+        conn.recv(4096)
+        conn.sendall(b'HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nContent-Length: 100000\r\n\r\n<html>')
+        # One byte at a time, each well within the per-read timeout
+        while not stop.wait(0.1):
+            try:
+                conn.sendall(b'x')
+            except OSError:
+                break
+        conn.close()
+
+    thread = threading.Thread(target=trickle, daemon=True)
+    thread.start()
+    started = time.monotonic()
+    try:
+        with pytest.raises(FetchError) as exc_info:
+            fetch_html(f'http://127.0.0.1:{listener.getsockname()[1]}/', timeout=1)
+    finally:
+        stop.set()
+        listener.close()
+    assert 'Timed out' in str(exc_info.value)
+    assert time.monotonic() - started < 2
@@ -0,0 +1,76 @@
+import os
+import time
+from unittest.mock import MagicMock
+from backend.incremental import DocumentStore, IncrementalTranslator, split_segments
+
+DOC = "First paragraph.\n\nSecond paragraph.\n\nThird paragraph."
+
+def test_split_segments_round_trips():
+    text = "Intro line.\n\n" + "A sentence here. " * 40 + "\n\n\n  Last one!"
+    for max_chars in (30, 100, 10000):
+        segments = split_segments(text, max_chars)
+        assert ''.join(segment + separator for segment, separator in segments) == text
+    assert max(len(s) for s, _ in split_segments(text, 100)) <= 100
+    assert [s for s, _ in split_segments(DOC)] == ['First paragraph.', 'Second paragraph.', 'Third paragraph.']
+
+def _translator(tmp_path):
+    wrapper = MagicMock()
+    wrapper.translate_segment.side_effect = lambda segment, src, tgt, before, after, model=None: segment.upper()
+    return IncrementalTranslator(wrapper, DocumentStore(str(tmp_path))), wrapper
+
+def test_only_changed_segments_are_translated(tmp_path):
+    translator, wrapper = _translator(tmp_path)
+
+    first = translator.update('doc', DOC, 'en', 'ru')
+    assert first['translated_text'] == DOC.upper()
+    assert first['segments_translated'] == 3 and first['version'] == 1
+
+    wrapper.translate_segment.reset_mock()
+    edited = DOC.replace('Second paragraph.', 'Second paragraph, edited.')
+    second = translator.update('doc', edited, 'en', 'ru')
+
+    assert second['translated_text'] == edited.upper()
+    assert second['segments_translated'] == 1 and second['version'] == 2
+    args = wrapper.translate_segment.call_args[0]
+    assert args[0] == 'Second paragraph, edited.'
+    # Neighbouring source segments are passed as context
+    assert args[3:5] == ('First paragraph.', 'Third paragraph.')
+
+def test_inserted_and_removed_paragraphs(tmp_path):
+    translator, wrapper = _translator(tmp_path)
+    translator.update('doc', DOC, 'en', 'ru')
+    wrapper.translate_segment.reset_mock()
+
+    edited = "New opening.\n\nFirst paragraph.\n\nThird paragraph."
+    result = translator.update('doc', edited, 'en', 'ru')
+    assert result['translated_text'] == edited.upper()
+    assert [c[0][0] for c in wrapper.translate_segment.call_args_list] == ['New opening.']
+
+def test_language_change_translates_everything(tmp_path):
+    translator, wrapper = _translator(tmp_path)
+    translator.update('doc', DOC, 'en', 'ru')
+    result = translator.update('doc', DOC, 'en', 'de')
+    assert result['segments_translated'] == 3
+    assert result['version'] == 2
+
+def test_pending_segments_counts_only_changes(tmp_path):
+    translator, _ = _translator(tmp_path)
+    assert translator.pending_segments('doc', DOC, 'en', 'ru') == 3
+    translator.update('doc', DOC, 'en', 'ru')
+
+    edited = DOC.replace('Second paragraph.', 'Second paragraph, edited.')
+    assert translator.pending_segments('doc', edited, 'en', 'ru') == 1
+    assert translator.pending_segments('doc', edited, 'auto', 'ru') == 1
+    assert translator.pending_segments('doc', edited, 'en', 'de') == 3
+
+def test_store_drops_locks_and_expired_documents(tmp_path):
+    translator, _ = _translator(tmp_path)
+    translator.update('old', DOC, 'en', 'ru')
+    translator.update('new', DOC, 'en', 'ru')
+    assert translator.store._locks == {}
+
+    old_path = translator.store.path('old')
+    os.utime(old_path, (time.time() - translator.store.ttl - 10,) * 2)
+    assert translator.store.cleanup() == 1
+    assert not os.path.exists(old_path)
+    assert translator.store.load('new') is not None
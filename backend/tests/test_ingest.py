@@ -0,0 +1,131 @@
+import io
+import os
+import zipfile
+import pytest
+from unittest.mock import MagicMock
+from backend.extract import detect_kind, iter_document_text, HTMLTextExtractor
+from backend.ingest import IngestManager, UploadTooLarge, spool_stream
+from backend.ollama_wrapper import OllamaWrapper
+
+DOCX_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:body>'
+    '<w:p><w:r><w:t>First </w:t></w:r><w:r><w:t>paragraph.</w:t></w:r></w:p>'
+    '<w:p><w:r><w:t>Second paragraph.</w:t></w:r></w:p>'
+    '</w:body></w:document>'
+)
+
+@pytest.fixture
+def wrapper():
+    wrapper = OllamaWrapper()
+    wrapper._translate_chunk = MagicMock(side_effect=lambda chunk, *args: chunk.upper())
+    return wrapper
+
+def test_detect_kind():
+    assert detect_kind('report.docx') == 'docx'
+    assert detect_kind('page.HTML') == 'html'
+    assert detect_kind(None, 'application/pdf') == 'pdf'
+    assert detect_kind('notes', 'application/octet-stream') == 'text'
+
+def test_html_extractor_handles_split_markup():
+    extractor = HTMLTextExtractor()
+    for piece in ['<html><head><title>x</title></he', 'ad><body><p>Hel', 'lo</p><scr',
+                  'ipt>var a = 1;</script><p>World &amp; more</p></body></html>']:
+        extractor.feed(piece)
+    extractor.close()
+    text = extractor.pop_text()
+    assert 'Hello' in text
+    assert 'World & more' in text
+    assert 'var a' not in text
+    assert 'x' not in text.split()
+
+def test_iter_text_file_decodes_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr('backend.extract.INGEST_BLOCK_SIZE', 3)
+    path = tmp_path / 'doc.txt'
+    path.write_text('Привет, мир', encoding='utf-8')
+    assert ''.join(iter_document_text(str(path), 'text')) == 'Привет, мир'
+
+def test_iter_docx_file(tmp_path):
+    path = tmp_path / 'doc.docx'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', DOCX_XML)
+    assert list(iter_document_text(str(path), 'docx')) == [
+        'First paragraph.\n\n', 'Second paragraph.\n\n'
+    ]
+
+def test_iter_docx_file_detaches_finished_paragraphs(tmp_path, monkeypatch):
+    from xml.etree import ElementTree
+    body = ''.join(f'<w:p><w:r><w:t>Paragraph {i}.</w:t></w:r></w:p>' for i in range(50))
+    table = '<w:tbl><w:tr><w:tc><w:p><w:r><w:t>Cell.</w:t></w:r></w:p></w:tc></w:tr></w:tbl>'
+    path = tmp_path / 'doc.docx'
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', (
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}{table}</w:body></w:document>'
+        ))
+
+    roots = []
+    iterparse = ElementTree.iterparse
+
+    def recording_iterparse(source, events):
+        for event, elem in iterparse(source, events):
+            if not roots:
+                roots.append(elem)
+            yield event, elem
+
+    monkeypatch.setattr('backend.extract.ElementTree.iterparse', recording_iterparse)
+    paragraphs = list(iter_document_text(str(path), 'docx'))
+
+    assert len(paragraphs) == 51 and paragraphs[-1] == 'Cell.\n\n'
+    assert [len(child) for child in roots[0]] == [0]
+
+def test_iter_chunks_matches_split_text():
+    wrapper = OllamaWrapper()
+    text = ' '.join(f'Sentence number {i}.' for i in range(2000))
+    pieces = [text[i:i + 777] for i in range(0, len(text), 777)]
+    streamed = [chunk.strip() for chunk in wrapper._iter_chunks(pieces)]
+    assert streamed == wrapper._split_text(text)
+
+def test_spool_stream_enforces_limit(tmp_path):
+    with pytest.raises(UploadTooLarge):
+        spool_stream(io.BytesIO(b'x' * 100), str(tmp_path / 'spool'), max_bytes=10)
+
+def test_ingest_job_writes_result(tmp_path, wrapper):
+    manager = IngestManager(work_dir=str(tmp_path))
+    job = manager.create_job(io.BytesIO(b'Hello world.\nSecond line.'), filename='a.txt',
+                             source_lang='auto', target_lang='ru')
+    detect = MagicMock(return_value='en')
+
+    job.run(wrapper, detect)
+
+    assert job.status == 'done'
+    assert job.source_lang == 'en'
+    assert job.chunks_done == 1
+    with open(job.result_path, encoding='utf-8') as f:
+        assert f.read().strip() == 'HELLO WORLD.\nSECOND LINE.'
+    assert manager.get(job.id) is job
+
+def test_ingest_job_invalid_language(tmp_path, wrapper):
+    manager = IngestManager(work_dir=str(tmp_path))
+    job = manager.create_job(io.BytesIO(b'Hello'), filename='a.txt',
+                             source_lang='en', target_lang='xx')
+    job.run(wrapper)
+    assert job.status == 'failed'
+    assert 'Invalid language code' in job.error
+
+def test_cleanup_removes_expired_jobs_and_files(tmp_path, wrapper):
+    manager = IngestManager(work_dir=str(tmp_path), job_ttl=60)
+    job = manager.create_job(io.BytesIO(b'Hello'), filename='a.txt', source_lang='en', target_lang='ru')
+    job.run(wrapper)
+    stale = tmp_path / 'leftover.txt'
+    stale.write_text('old')
+    os.utime(stale, (0, 0))
+
+    assert manager.cleanup(now=job.finished_at + 30) == 0
+    assert manager.get(job.id) is job
+
+    assert manager.cleanup(now=job.finished_at + 120) == 1
+    assert manager.get(job.id) is None
+    assert not os.path.exists(job.result_path)
+    assert not stale.exists()
@@ -1,6 +1,9 @@
 import pytest
 from unittest.mock import patch, MagicMock
+from backend.cache import MemoryCache
+from backend.config import OLLAMA_REQUEST_TIMEOUT
 from backend.language_detector import LanguageDetector
+from backend.ollama_wrapper import OllamaWrapper
 
 def test_detect_language_success():
     detector = LanguageDetector()
@@ -31,4 +34,50 @@ def test_is_supported_language():
     detector = LanguageDetector()
     assert detector.is_supported_language("en") is True
     assert detector.is_supported_language("ru") is True
-    assert detector.is_supported_language("xx") is False 
\ No newline at end of file
+    assert detector.is_supported_language("xx") is False 
+
+def test_detect_language_structured_reply():
+    detector = LanguageDetector()
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"response": '{"language": "ru"}'}
+
+    with patch('requests.post', return_value=mock_response) as mock_post:
+        assert detector.detect_language("Привет, мир! " * 500) == "ru"
+
+    payload = mock_post.call_args[1]['json']
+    assert payload['format']['properties']['language']['enum'] == list(detector.supported_languages)
+    assert len(payload['prompt']) < 1200
+
+def test_detect_language_does_not_substring_match():
+    detector = LanguageDetector(structured=False)
+    mock_response = MagicMock()
+    mock_response.json.return_value = {"response": "The language is Spanish (es)."}
+
+    with patch('requests.post', return_value=mock_response):
+        assert detector.detect_language("Hola") == "es"
+
+def test_detect_language_uses_cache():
+    detector = LanguageDetector(cache=MemoryCache())
+    with patch('requests.post') as mock_post:
+        mock_post.return_value.json.return_value = {'response': '{"language": "fr"}'}
+        assert detector.detect_language('Bonjour le monde') == 'fr'
+        assert detector.detect_language('Bonjour le monde') == 'fr'
+        mock_post.assert_called_once()
+
+def test_detect_language_goes_through_wrapper_limiter():
+    wrapper = OllamaWrapper()
+    detector = LanguageDetector(ollama=wrapper)
+    with patch('requests.post') as mock_post:
+        mock_post.return_value.json.return_value = {'response': '{"language": "de"}'}
+        assert detector.detect_language('Hallo Welt') == 'de'
+
+    assert mock_post.call_args[1]['timeout'] == OLLAMA_REQUEST_TIMEOUT
+    assert wrapper.metrics()[detector.model]['successes'] == 1
+
+def test_prime_bypasses_cache():
+    detector = LanguageDetector(cache=MemoryCache())
+    with patch('requests.post') as mock_post:
+        mock_post.return_value.json.return_value = {'response': '{"language": "en"}'}
+        detector.detect_language('Hello, world.')
+        assert detector.prime() == 'en'
+        assert mock_post.call_count == 2
@@ -0,0 +1,87 @@
+import json
+import threading
+import time
+import pytest
+import requests
+from unittest.mock import patch
+from werkzeug.serving import make_server
+from loadtest.harness import (
+    EndpointStats, check_thresholds, compare_baseline, percentile, run_load, synthetic_requests,
+)
+from loadtest.mock_ollama import MockOllama, serve
+from backend.structured import TRANSLATION_SCHEMA, batch_schema
+
+@pytest.fixture
+def mock_ollama():
+    server = serve(MockOllama(token_rate=2000, prompt_rate=20000, parallel=2))
+    yield server
+    server.shutdown()
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_mock_replies_match_schema(mock_ollama):
+    reply = requests.post(_url(mock_ollama) + '/api/generate', json={
+        'model': 'gemma:latest', 'prompt': 'Translate from English to Russian.\n\nHello there.',
+        'format': TRANSLATION_SCHEMA, 'stream': False,
+    }).json()
+    assert json.loads(reply['response']) == {'translation': 'Hello there.'}
+    assert reply['eval_count'] > 0 and reply['eval_duration'] > 0
+
+    body = json.dumps({'texts': ['One', 'Two']})
+    reply = requests.post(_url(mock_ollama) + '/api/generate', json={
+        'model': 'gemma:latest', 'prompt': f'Translate from English to Russian.\n\nTranslate each.\n{body}',
+        'format': batch_schema(2),
+    }).json()
+    assert json.loads(reply['response'])['translations'] == ['One', 'Two']
+
+def test_mock_latency_follows_token_rate():
+    mock = MockOllama(token_rate=1000, prompt_rate=1e9, parallel=1, jitter=0)
+    started = time.monotonic()
+    status, reply = mock.reply({'model': 'm', 'prompt': 'Translate this: ' + 'x' * 400})
+    assert status == 200
+    assert time.monotonic() - started >= reply['eval_count'] / 1000 * 0.9
+
+def test_mock_releases_slot_when_generation_fails():
+    mock = MockOllama(parallel=1, jitter=0)
+    with patch.object(mock, '_generate', side_effect=RuntimeError('boom')):
+        with pytest.raises(RuntimeError):
+            mock.reply({'model': 'm', 'prompt': 'Hello'})
+    assert mock._waiting == 0
+    assert mock._slots.acquire(blocking=False)
+
+def test_percentile_and_thresholds():
+    assert percentile([], 95) is None
+    assert percentile(list(range(1, 101)), 95) == 95
+    stats = EndpointStats()
+    for latency in (0.1, 0.2, 0.3):
+        stats.record(latency, 200)
+    stats.record(0.1, 429)
+    stats.record(0.1, 500)
+    summary = stats.summary(1.0)
+    assert summary['ok'] == 3 and summary['rejected'] == 1 and summary['error_rate'] == 0.2
+
+    report = {'endpoints': {'translate': summary}, 'total': summary}
+    assert check_thresholds(report, {'*': {'p95_ms': 1000}}) == []
+    failures = check_thresholds(report, {'translate': {'p95_ms': 250, 'error_rate': 0.1}, 'total': {'min_rps': 5}})
+    assert len(failures) == 3
+
+    baseline = {'endpoints': {'translate': dict(summary, p95_ms=100, rps=3)}}
+    assert len(compare_baseline(report, baseline, tolerance=0.25)) == 1
+
+def test_run_load_against_app(mock_ollama):
+    from backend.app import app, ollama_wrapper, language_detector
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with patch.object(ollama_wrapper, 'base_url', _url(mock_ollama)), \
+             patch.object(language_detector, 'base_url', _url(mock_ollama)):
+            source = synthetic_requests({'mix': {'translate': 2, 'detect_language': 1}, 'text_sizes': [100]})
+            report = run_load(f"http://127.0.0.1:{server.server_port}", source, clients=3, duration=0.5)
+    finally:
+        server.shutdown()
+
+    assert report['total']['requests'] > 0
+    assert report['total']['errors'] == 0
+    assert set(report['endpoints']) <= {'translate', 'detect_language'}
+    assert report['backend']['samples'] >= 0
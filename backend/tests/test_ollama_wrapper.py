@@ -1,6 +1,9 @@
+from json import dumps
 import pytest
 from unittest.mock import patch, MagicMock
+from backend.cache import MemoryCache
 from backend.ollama_wrapper import OllamaWrapper
+from backend.segments import SegmentedTranslation
 
 @pytest.fixture
 def ollama_wrapper():
@@ -11,7 +14,7 @@ def test_translate_success(ollama_wrapper):
         # Mock successful response
         mock_response = MagicMock()
         mock_response.json.return_value = {
-            'response': 'Translated text'
+            'response': '{"translation": "Translated text"}'
         }
         mock_post.return_value = mock_response
 
@@ -20,8 +23,11 @@ def test_translate_success(ollama_wrapper):
         assert result == 'Translated text'
         mock_post.assert_called_once()
         call_args = mock_post.call_args[1]
-        assert call_args['json']['prompt'] == 'Translate the following text from English to Russian: Hello'
-        assert call_args['json']['model'] == 'llama2'
+        assert call_args['json']['prompt'] == 'Translate from English to Russian.\n\nHello'
+        assert call_args['json']['model'] == 'gemma:latest'
+        assert call_args['json']['format']['required'] == ['translation']
+        # Output budget is sized from the input instead of unlimited
+        assert 0 < call_args['json']['options']['num_predict'] < 200
 
 def test_translate_error(ollama_wrapper):
     with patch('requests.post') as mock_post:
@@ -39,4 +45,180 @@ def test_translate_invalid_language(ollama_wrapper):
     with pytest.raises(ValueError) as exc_info:
         ollama_wrapper.translate('Hello', 'invalid', 'ru')
     
-    assert str(exc_info.value) == 'Invalid language code: invalid' 
\ No newline at end of file
+    assert str(exc_info.value) == 'Invalid language code: invalid'
+
+def test_translate_chunks_concurrently_in_order(ollama_wrapper):
+    text = ' '.join(f'Sentence {i}.' for i in range(600))
+    chunks = ollama_wrapper._split_text(text)
+    assert len(chunks) > 1
+
+    def fake_post(url, json, timeout):
+        response = MagicMock()
+        chunk = json['prompt'].split('\n\n', 1)[1]
+        reply = {'translation': str(chunks.index(chunk))}
+        response.json.return_value = {'response': dumps(reply), 'eval_count': 10,
+                                      'eval_duration': 10 ** 8, 'total_duration': 10 ** 8}
+        return response
+
+    with patch('requests.post', side_effect=fake_post):
+        result = ollama_wrapper.translate(text, 'en', 'ru')
+
+    assert result == ' '.join(str(i) for i in range(len(chunks)))
+    metrics = ollama_wrapper.metrics()['gemma:latest']
+    assert metrics['successes'] == len(chunks)
+    assert metrics['inflight'] == 0
+
+def test_translate_rejects_chatty_reply(ollama_wrapper):
+    with patch('requests.post') as mock_post:
+        mock_post.return_value.json.return_value = {'response': 'Here is the translation: Привет'}
+        with pytest.raises(ValueError) as exc_info:
+            ollama_wrapper.translate('Hello', 'en', 'ru')
+    assert 'not valid JSON' in str(exc_info.value)
+
+def test_truncated_reply_retried_with_larger_budget(ollama_wrapper):
+    with patch('requests.post') as mock_post:
+        truncated = MagicMock()
+        truncated.json.return_value = {'response': '{"translation": "Прив', 'done_reason': 'length'}
+        complete = MagicMock()
+        complete.json.return_value = {'response': '{"translation": "Привет"}', 'done_reason': 'stop'}
+        mock_post.side_effect = [truncated, complete]
+
+        assert ollama_wrapper.translate('Hello', 'en', 'ru') == 'Привет'
+        budgets = [call[1]['json']['options']['num_predict'] for call in mock_post.call_args_list]
+        assert budgets[1] == 2 * budgets[0]
+
+def test_translate_batch_packs_items(ollama_wrapper):
+    with patch('requests.post') as mock_post:
+        mock_post.return_value.json.return_value = {
+            'response': dumps({'translations': ['Один', 'Два', 'Три']})
+        }
+        result = ollama_wrapper.translate_batch(['One', 'Two', 'Three'], 'en', 'ru')
+
+    assert result == ['Один', 'Два', 'Три']
+    mock_post.assert_called_once()
+    assert mock_post.call_args[1]['json']['format']['properties']['translations']['minItems'] == 3
+
+def test_translate_batch_falls_back_on_misalignment(ollama_wrapper):
+    with patch('requests.post') as mock_post:
+        packed = MagicMock()
+        packed.json.return_value = {'response': dumps({'translations': ['Один Два']})}
+        single = [MagicMock(), MagicMock()]
+        single[0].json.return_value = {'response': dumps({'translation': 'Один'})}
+        single[1].json.return_value = {'response': dumps({'translation': 'Два'})}
+        mock_post.side_effect = [packed] + single
+
+        assert ollama_wrapper.translate_batch(['One', 'Two'], 'en', 'ru') == ['Один', 'Два']
+
+def test_cached_chunks_are_not_translated_again():
+    wrapper = OllamaWrapper(cache=MemoryCache())
+    with patch('requests.post') as mock_post:
+        mock_post.return_value.json.return_value = {'response': dumps({'translation': 'Привет'})}
+        assert wrapper.translate('Hello', 'en', 'ru') == 'Привет'
+        assert wrapper.translate('Hello', 'en', 'ru') == 'Привет'
+        assert mock_post.call_count == 1
+
+        # A batch only sends the items that are not cached yet
+        mock_post.return_value.json.return_value = {'response': dumps({'translation': 'Мир'})}
+        assert wrapper.translate_batch(['Hello', 'World'], 'en', 'ru') == ['Привет', 'Мир']
+        assert mock_post.call_count == 2
+        assert 'Hello' not in mock_post.call_args[1]['json']['prompt']
+
+def test_translate_many_splits_once_and_interleaves_targets(ollama_wrapper):
+    calls = []
+
+    def fake_chunk(chunk, source_lang, target_lang, model=None):
+        calls.append((chunk, target_lang))
+        return f'{target_lang}:{chunk}'
+
+    with patch.object(ollama_wrapper, '_split_text', wraps=ollama_wrapper._split_text) as mock_split, \
+         patch.object(ollama_wrapper, '_translate_chunk', side_effect=fake_chunk), \
+         patch('backend.ollama_wrapper.OLLAMA_MAX_CONCURRENCY', 1), \
+         patch('backend.ollama_wrapper.CHUNK_SIZE', 20):
+        translations, errors = ollama_wrapper.translate_many(
+            'First sentence here. Second sentence here.', 'en', ['de', 'fr'])
+
+    mock_split.assert_called_once()
+    assert errors == {}
+    assert translations['de'].startswith('de:First') and 'de:Second' in translations['de']
+    assert translations['fr'].startswith('fr:First') and 'fr:Second' in translations['fr']
+    # With one worker the queue order is visible: each chunk for all targets in turn
+    chunks = len(calls) // 2
+    assert chunks >= 2
+    assert [target for _, target in calls] == ['de', 'fr'] * chunks
+
+def test_translate_many_reports_failed_target(ollama_wrapper):
+    def fake_chunk(chunk, source_lang, target_lang, model=None):
+        if target_lang == 'fr':
+            raise Exception('model crashed')
+        return 'Hallo'
+
+    with patch.object(ollama_wrapper, '_translate_chunk', side_effect=fake_chunk):
+        translations, errors = ollama_wrapper.translate_many('Hello', 'en', ['de', 'fr'])
+
+    assert translations == {'de': 'Hallo'}
+    assert 'model crashed' in errors['fr']
+
+def test_tiered_translation_escalates_only_failing_drafts():
+    from backend.tiering import TierPolicy
+    wrapper = OllamaWrapper(tiering=TierPolicy(enabled=True, draft_model='small'))
+    replies = {
+        'Good morning': {'small': 'Доброе утро'},
+        'Good evening': {'small': '', 'gemma:latest': 'Добрый вечер'},
+    }
+
+    def fake_post(url, json=None, **kwargs):
+        text = json['prompt'].rsplit('\n', 1)[-1]
+        response = MagicMock()
+        response.json.return_value = {'response': dumps({'translation': replies[text][json['model']]})}
+        return response
+
+    with patch('requests.post', side_effect=fake_post) as mock_post:
+        assert wrapper.translate('Good morning', 'en', 'ru') == 'Доброе утро'
+        assert [c[1]['json']['model'] for c in mock_post.call_args_list] == ['small']
+        assert wrapper.translate('Good evening', 'en', 'ru') == 'Добрый вечер'
+        assert [c[1]['json']['model'] for c in mock_post.call_args_list][1:] == ['small', 'gemma:latest']
+
+    stats = wrapper.tiering.snapshot()['en-ru']
+    assert stats['escalated'] == 1 and stats['reasons'] == {'empty': 1}
+
+def test_prime_skips_draft_model():
+    from backend.tiering import TierPolicy
+    wrapper = OllamaWrapper(tiering=TierPolicy(enabled=True, draft_model='small'))
+    with patch('requests.post') as mock_post:
+        mock_post.return_value.json.return_value = {'response': dumps({'translation': 'Hola.'})}
+        wrapper.prime('gemma:latest')
+
+    assert [c[1]['json']['model'] for c in mock_post.call_args_list] == ['gemma:latest']
+
+def test_translate_segment_sends_context(ollama_wrapper):
+    with patch('requests.post') as mock_post:
+        mock_post.return_value.json.return_value = {'response': dumps({'translation': 'Второй.'})}
+        result = ollama_wrapper.translate_segment('Second.', 'en', 'ru', before='First.', after='Third.')
+
+    assert result == 'Второй.'
+    prompt = mock_post.call_args[1]['json']['prompt']
+    assert 'First.' in prompt and 'Third.' in prompt
+    assert prompt.endswith('Second.')
+
+def test_translate_segments_keeps_offsets(ollama_wrapper):
+    text = ' '.join(f'Sentence {i}.' for i in range(400)) + '\n'
+
+    with patch.object(ollama_wrapper, '_translate_chunk', side_effect=lambda chunk, *args: chunk.upper()):
+        result = ollama_wrapper.translate_segments(text, 'en', 'ru')
+
+    assert len(result) > 2
+    assert [result.source_text(i) for i in range(len(result))] == ollama_wrapper._split_text(text)
+    assert all(segment.target == result.source_text(segment.chunk_id).upper() for segment in result)
+    assert result.text() == ollama_wrapper._join_chunks(result.targets)
+    body = result.to_dict()
+    assert body['model'] == 'gemma:latest'
+    assert len(body['starts']) == len(body['ends']) == len(body['targets']) == len(body['durations_ms'])
+
+def test_segmented_translation_keeps_paragraph_breaks():
+    source = 'One.\n\nTwo. Three.\nFour.'
+    result = SegmentedTranslation(source, 'en', 'de')
+    for start, end in [(0, 4), (6, 10), (11, 17), (18, 23)]:
+        result.append(start, end, source[start:end].lower())
+
+    assert result.text() == 'one.\n\ntwo. three.\nfour.'
+    assert result[-1].start == 18 and result[-1].chunk_id == 3
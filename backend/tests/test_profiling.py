@@ -0,0 +1,68 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from backend.profiling import Profile, ProfileStore, activate, deactivate, span, traced, propagate
+
+@traced('work')
+def _work(x):
+    with span('inner', x=x):
+        return x * 2
+
+def test_spans_are_noops_without_profile():
+    assert _work(2) == 4
+
+def test_spans_recorded_across_executor_threads():
+    profile = Profile('test')
+    token = activate(profile)
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            futures = [pool.submit(propagate(_work), x) for x in (1, 3)]
+            results = [f.result() for f in futures]
+        # Not propagated: the worker thread has no active profile
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(_work, 5).result()
+    finally:
+        deactivate(token)
+
+    assert results == [2, 6]
+    names = [e['name'] for e in profile.events]
+    assert names.count('work') == 2
+    assert names.count('inner') == 2
+    assert {e['args'].get('x') for e in profile.events if e['name'] == 'inner'} == {1, 3}
+
+def test_chrome_trace_and_store(tmp_path):
+    profile = Profile('POST /translate', mode='cprofile')
+    token = activate(profile)
+    profile.start_cprofile()
+    try:
+        _work(1)
+    finally:
+        profile.stop_cprofile()
+        deactivate(token)
+
+    store = ProfileStore(str(tmp_path))
+    path = store.save(profile)
+    assert path == store.path(profile.id)
+    with open(path, encoding='utf-8') as f:
+        trace = json.load(f)
+
+    spans = [e for e in trace['traceEvents'] if e['ph'] == 'X']
+    assert {e['name'] for e in spans} == {'work', 'inner'}
+    assert all(e['dur'] >= 0 and 'tid' in e for e in spans)
+    assert trace['otherData']['name'] == 'POST /translate'
+    assert 'cumulative' in trace['otherData']['cprofile']
+
+def test_store_keeps_newest_traces(tmp_path):
+    store = ProfileStore(str(tmp_path), max_files=3, max_age=3600)
+    stale = tmp_path / 'stale.trace.json'
+    stale.write_text('{}')
+    os.utime(stale, (0, 0))
+
+    profiles = [Profile(f'GET /{i}') for i in range(5)]
+    for i, profile in enumerate(profiles):
+        path = store.save(profile)
+        os.utime(path, (time.time() - 10 + i,) * 2)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        f'{profile.id}.trace.json' for profile in profiles[2:])
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+from unittest.mock import MagicMock
+from backend.startup import HEAVY_MODULES, LazyComponent, StartupTimer
+
+BACKEND_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_app_import_does_not_load_heavy_modules():
+    code = (
+        "import sys, backend.app\n"
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=BACKEND_ROOT, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
+
+def test_lazy_component_defers_construction():
+    class Engine:
+        def speak(self, text):
+            return text.upper()
+
+    factory = MagicMock(side_effect=Engine)
+    factory.speak = Engine.speak
+    lazy = LazyComponent(factory, 'engine')
+
+    speak = lazy.speak
+    assert not lazy.loaded
+    factory.assert_not_called()
+
+    assert speak('hi') == 'HI'
+    assert lazy.loaded
+    assert lazy.speak('ok') == 'OK'
+    factory.assert_called_once()
+
+def test_startup_timer_marks_are_monotonic():
+    timer = StartupTimer()
+    timer.mark('a')
+    timer.mark('b')
+    assert 0 <= timer.marks['a'] <= timer.marks['b']
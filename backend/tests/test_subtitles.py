@@ -0,0 +1,61 @@
+import threading
+from backend.subtitles import Cue, SubtitleStats, batch_cues, format_timestamp, iter_translated_subtitles, make_cues
+
+
+class FakeWrapper:
+    def __init__(self, fail_on=None):
+        self.calls = []
+        self.fail_on = fail_on
+        self._lock = threading.Lock()
+
+    def translate_batch(self, texts, source_lang, target_lang, model=None):
+        with self._lock:
+            self.calls.append(list(texts))
+        if self.fail_on in texts:
+            raise RuntimeError('model unavailable')
+        return [f'[{target_lang}] {text}' for text in texts]
+
+
+def test_make_cues_drops_blanks_and_overlaps():
+    cues = make_cues([(0.0, 3.0, 'Hello\nthere'), (2.5, 2.0, '  '), (2.5, 2.0, 'world'), (10.0, 1.5, 'bye')])
+    assert cues == [Cue(0.0, 2.5, 'Hello there'), Cue(2.5, 4.5, 'world'), Cue(10.0, 11.5, 'bye')]
+
+
+def test_batch_cues_respects_token_budget():
+    cues = [Cue(i, i + 1, 'x' * 40) for i in range(10)]  # 11 estimated tokens each
+    batches = batch_cues(cues, max_tokens=30)
+    assert [len(batch) for batch in batches] == [2, 2, 2, 2, 2]
+    assert [cue for batch in batches for cue in batch] == cues
+
+
+def test_format_timestamp():
+    assert format_timestamp(3723.4567, 'srt') == '01:02:03,457'
+    assert format_timestamp(59.9996, 'vtt') == '00:01:00.000'
+
+
+def test_srt_keeps_every_cue_aligned_with_its_timestamps():
+    cues = [Cue(i * 2.0, i * 2.0 + 1.5, f'Line {i}.') for i in range(40)]
+    wrapper = FakeWrapper()
+
+    srt = ''.join(iter_translated_subtitles(wrapper, cues, 'en', 'de', 'srt', max_tokens=10))
+
+    assert len(wrapper.calls) > 1
+    blocks = srt.strip().split('\n\n')
+    assert len(blocks) == 40
+    assert blocks[0] == '1\n00:00:00,000 --> 00:00:01,500\n[de] Line 0.'
+    assert blocks[39] == '40\n00:01:18,000 --> 00:01:19,500\n[de] Line 39.'
+
+
+def test_vtt_failed_batch_keeps_source_text():
+    cues = [Cue(0.0, 1.0, 'One.'), Cue(1.0, 2.0, 'Two.')]
+    wrapper = FakeWrapper(fail_on='Two.')
+
+    stats = SubtitleStats()
+
+    vtt = ''.join(iter_translated_subtitles(wrapper, cues, 'en', 'fr', 'vtt', max_tokens=1, stats=stats))
+
+    assert vtt == ('WEBVTT\n\n00:00:00.000 --> 00:00:01.000\n[fr] One.\n\n'
+                   'NOTE Cues 2-2 could not be translated and keep the source text\n\n'
+                   '00:00:01.000 --> 00:00:02.000\nTwo.\n\n')
+    assert stats.snapshot() == {'failed_batches': 1, 'untranslated_cues': 1,
+                                'untranslated_cues_by_lang': {'fr': 1}}
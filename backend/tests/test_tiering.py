@@ -0,0 +1,37 @@
+from backend.tiering import TierPolicy, check_draft
+
+SOURCE = "The weather is lovely today, so we are going for a long walk in the park."
+
+def test_good_draft_passes():
+    draft = "Погода сегодня прекрасная, поэтому мы идём на долгую прогулку в парк."
+    assert check_draft(SOURCE, draft, 'en', 'ru') is None
+    # Short strings skip the ratio and language checks
+    assert check_draft("Hi", "Привет", 'en', 'ru') is None
+
+def test_bad_drafts_are_flagged():
+    assert check_draft(SOURCE, "", 'en', 'ru') == 'empty'
+    assert check_draft(SOURCE, SOURCE, 'en', 'ru') == 'untranslated'
+    assert check_draft(SOURCE, "Погода.", 'en', 'ru') == 'length_ratio'
+    assert check_draft(SOURCE, "Das Wetter ist heute herrlich, also machen wir einen langen Spaziergang im Park.",
+                       'en', 'ru') == 'wrong_language'
+    assert check_draft("Please review the attached quarterly budget report",
+                       "Пожалуйста review the attached quarterly budget report", 'en', 'ru',
+                       min_detect_chars=1000) == 'copied_source'
+
+def test_policy_pair_overrides_and_stats():
+    policy = TierPolicy(enabled=True, draft_model='small', pairs={
+        '*-ja': {'enabled': False},
+        'en-ja': {'enabled': True, 'draft_model': 'small-ja'},
+        'en-*': {'length_ratio': (0.1, 5)},
+    })
+    assert policy.plan('de', 'ja', 'big') is None
+    assert policy.plan('en', 'ja', 'big')['draft_model'] == 'small-ja'
+    assert policy.plan('en', 'ru', 'big')['length_ratio'] == (0.1, 5)
+    assert policy.plan('en', 'ru', 'small') is None
+
+    policy.record('en', 'ru', None)
+    policy.record('en', 'ru', 'length_ratio')
+    stats = policy.snapshot()['en-ru']
+    assert stats['drafted'] == 2 and stats['escalated'] == 1
+    assert stats['escalation_rate'] == 0.5
+    assert stats['reasons'] == {'length_ratio': 1}
@@ -1,3 +1,4 @@
+import io
 import pytest
 from unittest.mock import patch, MagicMock
 from backend.tts.engine import TTSEngine
@@ -33,4 +34,23 @@ def test_text_to_speech_api_error():
     
     with pytest.raises(Exception) as exc_info:
         engine.text_to_speech("Hello, world!", "en")
-    assert str(exc_info.value) == "TTS Error" 
\ No newline at end of file
+    assert str(exc_info.value) == "TTS Error"
+
+def test_synthesize_encodes_each_sentence():
+    # Stand-ins for torch and Coqui TTS, so the encode path runs without them
+    mock_tts = MagicMock()
+    mock_tts.tts.return_value = [0.0] * 1000
+    mock_tts.synthesizer.output_sample_rate = 22050
+    tts_api = MagicMock()
+    tts_api.TTS.return_value.to.return_value = mock_tts
+    with patch.dict('sys.modules', {'torch': MagicMock(), 'TTS': MagicMock(), 'TTS.api': tts_api}):
+        engine = TTSEngine(device='cpu')
+    assert engine.tts is mock_tts
+
+    with patch('backend.tts.engine.encode_audio') as mock_encode:
+        mock_encode.side_effect = lambda blocks, rate, fmt, out: out.write(b''.join(b'x' for _ in blocks))
+        out = io.BytesIO()
+        engine.synthesize("First sentence. Second one!", "en", "mp3", out)
+
+    assert out.getvalue() == b'xx'
+    assert mock_encode.call_args[0][1:3] == (22050, 'mp3')
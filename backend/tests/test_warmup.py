@@ -0,0 +1,35 @@
+from unittest.mock import MagicMock
+from backend.warmup import WarmupState, run_warmup, start_warmup
+
+def test_run_warmup_preloads_and_primes_each_model():
+    wrapper = MagicMock()
+    wrapper.model = 'gemma:latest'
+    detector = MagicMock()
+    tts_loader = MagicMock()
+    state = WarmupState()
+
+    run_warmup(state, wrapper, detector, models=['gemma:latest', 'qwen2.5:3b'], tts_loader=tts_loader)
+
+    assert state.ready
+    assert [c[0][0] for c in wrapper.preload_model.call_args_list] == ['gemma:latest', 'qwen2.5:3b']
+    assert wrapper.prime.call_count == 2
+    detector.prime.assert_called_once()
+    tts_loader.assert_called_once()
+    assert set(state.to_dict()['steps']) == {
+        'preload:gemma:latest', 'prime:gemma:latest',
+        'preload:qwen2.5:3b', 'prime:qwen2.5:3b',
+        'language_detector', 'tts',
+    }
+
+def test_failed_step_does_not_block_readiness():
+    wrapper = MagicMock()
+    wrapper.model = 'gemma:latest'
+    wrapper.preload_model.side_effect = Exception('connection refused')
+    state = WarmupState()
+
+    start_warmup(state, wrapper, MagicMock()).join()
+
+    assert state.ready
+    step = state.to_dict()['steps']['preload:gemma:latest']
+    assert step['ok'] is False
+    assert 'connection refused' in step['error']
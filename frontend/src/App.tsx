@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useRef } from 'react';
 import { ArrowsRightLeftIcon, SpeakerWaveIcon, ClipboardDocumentIcon, Cog6ToothIcon } from '@heroicons/react/24/outline';
 import SettingsModal from './components/SettingsModal';
 import UrlScraper from './components/UrlScraper';
@@ -50,6 +50,9 @@ function App() {
   const [targetSummary, setTargetSummary] = useState('');
   const [showSourceSummary, setShowSourceSummary] = useState(false);
   const [showTargetSummary, setShowTargetSummary] = useState(false);
+  // Identifies this editing session's document, so the backend only
+  // re-translates the paragraphs changed since the last translation
+  const docId = useRef(`doc-${Date.now()}-${Math.random().toString(36).slice(2)}`);
 
   useEffect(() => {
     // Check saved dark mode preference
@@ -88,12 +91,13 @@ function App() {
     setError(null);
     
     try {
-      const response = await fetch('http://localhost:5002/translate', {
+      const response = await fetch('http://localhost:5002/translate/incremental', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
+          doc_id: docId.current,
           text: sourceText,
           source_lang: sourceLang.code,
           target_lang: targetLang.code,
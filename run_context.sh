@@ -26,12 +26,13 @@ start_backend() {
     
     # Wait for backend to be ready
     echo "Waiting for backend to start..."
-    for i in {1..20}; do
+    # The backend answers /health well under a second after launch, so poll often
+    for i in {1..100}; do
         if check_backend; then
             echo "Backend is now running."
             return 0
         fi
-        sleep 1
+        sleep 0.2
     done
     echo "Warning: Backend did not start properly, but continuing anyway."
     return 1